@@ -0,0 +1,367 @@
+# ======================================================================
+# --- File: antrian_simpan.py ---
+# ======================================================================
+# Antrian write-behind untuk menyimpan hasil prediksi individual. Halaman
+# memanggil kirim() lalu langsung menampilkan hasil; satu thread latar
+# mengambil record dari antrian (dibatasi KAPASITAS), mengelompokkannya
+# menjadi batch, dan menulis tiap batch dalam satu transaksi.
+#
+#   antrian = AntrianSimpan(simpan_prediksi_tertunda)
+#   id_simpan = antrian.kirim(data_pasien, user_id)
+#   antrian.status(id_simpan)   # 'menunggu' / 'tersimpan' / 'tertunda' / 'gagal'
+#
+# Jika database tidak bisa dihubungi, batch dicoba ulang dengan backoff
+# eksponensial lalu ditulis ke jurnal lokal (JSON Lines, di-fsync) dengan
+# status 'tertunda'. Jurnal diputar ulang ke database saat thread mulai dan
+# setiap kali backoff habis, jadi data tidak hilang walaupun aplikasi
+# di-restart saat database mati. Record yang ditolak database karena isinya
+# (bukan karena koneksi) dipindah ke file .ditolak untuk diperiksa manual.
+#
+# created_at dan statistik harian memakai jam database saat record ditulis
+# (sama dengan simpan kolektif), jadi record dari jurnal tercatat pada
+# tanggal diputar ulang, bukan tanggal prediksi dibuat.
+#
+# Beberapa proses (worker Streamlit) bisa memakai jurnal yang sama: tambah,
+# baca, dan tulis ulang jurnal dijaga kunci file <jurnal>.lock, dan hanya
+# satu proses yang memutar ulang jurnal pada satu waktu (<jurnal>.putar.lock).
+#
+# Pengiriman bersifat at-least-once: jika koneksi putus tepat setelah COMMIT
+# sebelum balasannya diterima, batch yang sama bisa tertulis dua kali.
+# ======================================================================
+import atexit
+import datetime
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector.errors import InterfaceError, OperationalError, PoolError
+
+from instrumentasi import ukur, tambah
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Relatif ke folder aplikasi (bukan working directory) agar semua proses memakai jurnal yang sama
+PATH_JURNAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jurnal', 'simpan_prediksi.jsonl')
+KAPASITAS = 1000            # record maksimum di antrian memori; kelebihannya langsung ke jurnal
+UKURAN_BATCH = 50           # record maksimum per transaksi
+JEDA_KUMPUL = 0.05          # detik menunggu record lain sebelum batch ditulis
+MAKS_PERCOBAAN = 3          # percobaan per batch sebelum dipindah ke jurnal
+BACKOFF_AWAL = 0.5          # detik
+BACKOFF_MAKS = 60.0         # detik, jeda terlama sebelum jurnal dicoba lagi
+MAKS_STATUS = 10_000        # status terakhir yang diingat untuk ditampilkan di UI
+
+STATUS_MENUNGGU = 'menunggu'
+STATUS_TERSIMPAN = 'tersimpan'
+STATUS_TERTUNDA = 'tertunda'
+STATUS_GAGAL = 'gagal'
+
+def _error_koneksi(e):
+    """True jika error kemungkinan sementara (koneksi/pool), False jika karena isi data."""
+    return isinstance(e, (InterfaceError, OperationalError, PoolError))
+
+class KunciFile:
+    """
+    Kunci eksklusif antar proses pada file `path` (flock di POSIX,
+    msvcrt.locking di Windows). Kunci dilepas otomatis jika proses mati.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def _coba(self, f):
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, blocking=True):
+        """True jika kunci didapat; dengan blocking=False langsung False jika dipegang proses lain."""
+        f = open(self.path, 'a+b')
+        if blocking and fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while not self._coba(f):
+                if not blocking:
+                    f.close()
+                    return False
+                time.sleep(0.01)
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class AntrianSimpan:
+    def __init__(self, tulis_batch, path_jurnal=PATH_JURNAL, kapasitas=KAPASITAS, ukuran_batch=UKURAN_BATCH,
+                 jeda_kumpul=JEDA_KUMPUL, maks_percobaan=MAKS_PERCOBAAN, backoff_awal=BACKOFF_AWAL,
+                 backoff_maks=BACKOFF_MAKS):
+        self.tulis_batch = tulis_batch
+        self.path_jurnal = path_jurnal
+        self.ukuran_batch = ukuran_batch
+        self.jeda_kumpul = jeda_kumpul
+        self.maks_percobaan = maks_percobaan
+        self.backoff_awal = backoff_awal
+        self.backoff_maks = backoff_maks
+
+        self._antrian = queue.Queue(maxsize=kapasitas)
+        self._id = itertools.count(1)
+        self._status = OrderedDict()
+        self._lock_status = threading.Lock()
+        self._lock_jurnal = threading.Lock()
+        self._kunci_jurnal = KunciFile(path_jurnal + '.lock')
+        self._kunci_putar = KunciFile(path_jurnal + '.putar.lock')
+        self._berhenti = threading.Event()
+        self._backoff = backoff_awal
+        self._coba_lagi_pada = 0.0  # time.monotonic(); sebelum ini database dianggap mati
+
+        os.makedirs(os.path.dirname(path_jurnal) or '.', exist_ok=True)
+        self._thread = threading.Thread(target=self._jalankan, name='antrian-simpan', daemon=True)
+        self._thread.start()
+        atexit.register(self.hentikan)
+
+    # --- Sisi halaman ---
+
+    def kirim(self, data_pasien, user_id):
+        """Memasukkan satu record ke antrian dan langsung kembali dengan id untuk status()."""
+        # dikirim_pada hanya untuk pemeriksaan jurnal/.ditolak; created_at diisi jam database
+        record = dict(data_pasien, created_by=user_id,
+                      dikirim_pada=datetime.datetime.now().isoformat(timespec='seconds'),
+                      id_antrian=f'{os.getpid()}-{next(self._id)}')
+        self._set_status([record], STATUS_MENUNGGU)
+        tambah('antrian.masuk')
+        try:
+            self._antrian.put_nowait(record)
+        except queue.Full:
+            # Halaman tidak boleh ikut menunggu database; simpan ke jurnal saja
+            tambah('antrian.penuh')
+            self._ke_jurnal([record])
+        return record['id_antrian']
+
+    def status(self, id_simpan):
+        with self._lock_status:
+            return self._status.get(id_simpan)
+
+    def info(self):
+        """Ringkasan untuk panel admin: panjang antrian, isi jurnal, dan sisa backoff."""
+        with self._jurnal_terkunci():
+            di_jurnal = len(self._baca_jurnal())
+        return {'antrian': self._antrian.qsize(), 'jurnal': di_jurnal,
+                'database_mati_detik': round(max(0.0, self._coba_lagi_pada - time.monotonic()), 1)}
+
+    def hentikan(self, timeout=5.0):
+        """Menghentikan thread; record yang belum tertulis dipindah ke jurnal."""
+        self._berhenti.set()
+        self._thread.join(timeout)
+        sisa = []
+        while True:
+            try:
+                sisa.append(self._antrian.get_nowait())
+            except queue.Empty:
+                break
+        if sisa:
+            self._ke_jurnal(sisa)
+
+    # --- Thread latar ---
+
+    def _set_status(self, daftar_record, status):
+        with self._lock_status:
+            for record in daftar_record:
+                self._status[record['id_antrian']] = status
+                self._status.move_to_end(record['id_antrian'])
+            while len(self._status) > MAKS_STATUS:
+                self._status.popitem(last=False)
+
+    def _database_mati(self):
+        return time.monotonic() < self._coba_lagi_pada
+
+    def _tandai_database_mati(self, e):
+        print(f"ANTRIAN SIMPAN: database tidak tersedia, dicoba lagi dalam {self._backoff:g} detik ({e})")
+        self._coba_lagi_pada = time.monotonic() + self._backoff
+        self._backoff = min(self._backoff * 2, self.backoff_maks)
+
+    def _ambil_batch(self):
+        try:
+            batch = [self._antrian.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        batas = time.monotonic() + self.jeda_kumpul
+        while len(batch) < self.ukuran_batch:
+            sisa = batas - time.monotonic()
+            try:
+                batch.append(self._antrian.get(timeout=sisa) if sisa > 0 else self._antrian.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _jalankan(self):
+        while not self._berhenti.is_set():
+            if not self._database_mati() and os.path.exists(self.path_jurnal):
+                self._putar_ulang_jurnal()
+            batch = self._ambil_batch()
+            if batch:
+                self._tulis(batch)
+
+    def _tulis(self, batch):
+        """Menulis batch dengan percobaan ulang; True jika tersimpan, False jika dipindah ke jurnal."""
+        if self._database_mati():
+            self._ke_jurnal(batch)
+            return False
+        for percobaan in range(self.maks_percobaan):
+            try:
+                with ukur('antrian.tulis_batch'):
+                    self.tulis_batch(batch)
+            except mysql.connector.Error as e:
+                if not _error_koneksi(e):
+                    self._tulis_per_record(batch)
+                    return True
+                error = e
+                tambah('antrian.coba_ulang')
+                if self._berhenti.wait(self.backoff_awal * 2 ** percobaan):
+                    break
+            else:
+                self._backoff = self.backoff_awal
+                self._set_status(batch, STATUS_TERSIMPAN)
+                tambah('antrian.tersimpan', len(batch))
+                return True
+        else:
+            self._tandai_database_mati(error)
+        self._ke_jurnal(batch)
+        return False
+
+    def _tulis_per_record(self, batch):
+        """Batch ditolak karena isinya: tulis satu per satu agar hanya record bermasalah yang disisihkan."""
+        for record in batch:
+            try:
+                self.tulis_batch([record])
+            except mysql.connector.Error as e:
+                if _error_koneksi(e):
+                    self._ke_jurnal([record])
+                    continue
+                print(f"ANTRIAN SIMPAN: record ditolak database ({e})")
+                with self._jurnal_terkunci():
+                    self._tulis_baris(self.path_jurnal + '.ditolak', [dict(record, error=str(e))])
+                self._set_status([record], STATUS_GAGAL)
+                tambah('antrian.ditolak')
+            else:
+                self._set_status([record], STATUS_TERSIMPAN)
+                tambah('antrian.tersimpan')
+
+    # --- Jurnal ---
+
+    @contextmanager
+    def _jurnal_terkunci(self):
+        """Kunci jurnal antar thread proses ini dan antar proses."""
+        with self._lock_jurnal, self._kunci_jurnal:
+            yield
+
+    @staticmethod
+    def _tulis_baris(path, daftar_record):
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in daftar_record:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ke_jurnal(self, batch):
+        try:
+            with self._jurnal_terkunci():
+                self._tulis_baris(self.path_jurnal, batch)
+        except OSError as e:
+            print(f"ANTRIAN SIMPAN: gagal menulis jurnal, {len(batch)} record hilang ({e})")
+            self._set_status(batch, STATUS_GAGAL)
+            return
+        self._set_status(batch, STATUS_TERTUNDA)
+        tambah('antrian.ke_jurnal', len(batch))
+
+    def _baca_jurnal(self):
+        if not os.path.exists(self.path_jurnal):
+            return []
+        with open(self.path_jurnal, encoding='utf-8') as f:
+            # Baris terakhir bisa terpotong jika proses mati saat menulis; lewati saja
+            baris = f.read().split('\n')
+        record = []
+        for b in baris:
+            try:
+                record.append(json.loads(b))
+            except ValueError:
+                continue
+        return record
+
+    def _buang_dari_jurnal(self, jumlah):
+        """Menghapus `jumlah` record pertama jurnal (record baru hanya ditambah di akhir)."""
+        with self._jurnal_terkunci():
+            sisa = self._baca_jurnal()[jumlah:]
+            if not sisa:
+                os.remove(self.path_jurnal)
+                return
+            sementara = f'{self.path_jurnal}.{os.getpid()}.tmp'
+            if os.path.exists(sementara):
+                os.remove(sementara)
+            self._tulis_baris(sementara, sisa)
+            os.replace(sementara, self.path_jurnal)
+
+    def _putar_ulang_jurnal(self):
+        # Proses lain sedang memutar ulang: lewati, record yang sama tidak boleh ditulis dua kali
+        if not self._kunci_putar.acquire(blocking=False):
+            return
+        try:
+            self._putar_ulang_terkunci()
+        finally:
+            self._kunci_putar.release()
+
+    def _putar_ulang_terkunci(self):
+        with self._jurnal_terkunci():
+            record = self._baca_jurnal()
+        if not record:
+            self._buang_dari_jurnal(0)
+            return
+        print(f"ANTRIAN SIMPAN: memutar ulang {len(record)} record dari jurnal")
+        for awal in range(0, len(record), self.ukuran_batch):
+            batch = record[awal:awal + self.ukuran_batch]
+            try:
+                with ukur('antrian.tulis_batch'):
+                    self.tulis_batch(batch)
+            except mysql.connector.Error as e:
+                if _error_koneksi(e):
+                    self._tandai_database_mati(e)
+                    return
+                # _tulis_per_record menulis ulang record koneksi-gagal ke akhir jurnal
+                self._tulis_per_record(batch)
+            else:
+                self._backoff = self.backoff_awal
+                self._set_status(batch, STATUS_TERSIMPAN)
+                tambah('antrian.tersimpan', len(batch))
+            self._buang_dari_jurnal(len(batch))
+            if self._berhenti.is_set():
+                return
\ No newline at end of file
@@ -1,10 +1,11 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-import pandas as pd
-from utils import get_db_connection, check_hashes, make_hashes, get_user_history
-# Impor modul halaman
-import page_individual 
-import page_collective
+from utils import get_db_connection, release_db_connection, check_hashes, make_hashes, get_user_history_page
+import instrumentasi
+# Modul halaman (page_individual, page_collective) sengaja TIDAK diimpor di sini.
+# Keduanya menarik plotly, model, dsb. yang tidak dibutuhkan halaman login,
+# jadi baru diimpor di router saat halamannya dipilih (lihat bagian bawah).
+# Ukur dampaknya dengan: python benchmarks/startup_importtime.py
 
 # ======================================================================
 # --- Konfigurasi Halaman ---
@@ -15,6 +16,31 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# ======================================================================
+# --- Instrumentasi ---
+# Dikonfigurasi lewat [instrumentasi] di secrets.toml:
+#   aktif = true                  # mulai mencatat sejak proses start
+#   admin = ["username", ...]     # user yang boleh membuka Panel Admin
+#   port_prometheus = 9464        # opsional: endpoint GET /metrics
+#   file_prometheus = "/var/lib/node_exporter/pregnancy_risk.prom"  # opsional
+def config_instrumentasi():
+    return st.secrets.get('instrumentasi', {})
+
+@st.cache_resource
+def siapkan_instrumentasi():
+    """Menerapkan konfigurasi sekali per proses (toggle di panel admin tetap berlaku setelahnya)."""
+    config = config_instrumentasi()
+    if config.get('aktif'):
+        instrumentasi.set_aktif(True)
+    if config.get('port_prometheus'):
+        instrumentasi.jalankan_endpoint(int(config['port_prometheus']))
+    return True
+
+def is_admin():
+    return st.session_state.get('username') in config_instrumentasi().get('admin', [])
+
+siapkan_instrumentasi()
+
 # ======================================================================
 # --- Fungsi Halaman Profil ---
 def show_profile():
@@ -25,15 +51,39 @@ def show_profile():
     st.write(f"**Profesi:** {st.session_state.get('profesi', 'N/A')}")
     
     st.divider()
-    st.subheader("Riwayat 10 Pemeriksaan Terakhir")
-    
+    st.subheader("Riwayat Pemeriksaan")
+
+    # Filter dijalankan di database, bukan di DataFrame
+    col_risiko, col_mulai, col_akhir = st.columns([2, 1, 1])
+    risiko = col_risiko.multiselect("Tingkat risiko", ['KRR', 'KRT', 'KRST'], placeholder="Semua tingkat risiko")
+    tanggal_mulai = col_mulai.date_input("Dari tanggal", value=None)
+    tanggal_akhir = col_akhir.date_input("Sampai tanggal", value=None)
+
+    # Tumpukan kursor halaman: elemen terakhir adalah kursor halaman yang sedang
+    # ditampilkan (None = halaman pertama). Direset setiap filter berubah.
+    filter_aktif = (tuple(risiko), tanggal_mulai, tanggal_akhir)
+    if st.session_state.get('riwayat_filter') != filter_aktif:
+        st.session_state.riwayat_filter = filter_aktif
+        st.session_state.riwayat_kursor = [None]
+    tumpukan_kursor = st.session_state.riwayat_kursor
+
     user_id = st.session_state.get('user_id')
-    history_df = get_user_history(user_id)
+    history_df, kursor_berikutnya = get_user_history_page(
+        user_id, cursor=tumpukan_kursor[-1], risiko=risiko,
+        tanggal_mulai=tanggal_mulai, tanggal_akhir=tanggal_akhir
+    )
 
     if history_df is None:
-        st.error("Gagal terhubung ke database riwayat. Silakan coba lagi nanti.")
-    elif history_df.empty:
-        st.info("Anda belum memiliki riwayat pemeriksaan. Silakan lakukan pemeriksaan pertama Anda.")
+        st.error("Gagal mengambil riwayat dari database. Silakan coba lagi nanti.")
+        # Tetap bisa kembali ke halaman sebelumnya jika yang gagal bukan halaman pertama
+        if len(tumpukan_kursor) > 1 and st.button("← Kembali ke halaman pertama"):
+            st.session_state.riwayat_kursor = [None]
+            st.rerun()
+    elif history_df.empty and len(tumpukan_kursor) == 1:
+        if any(filter_aktif):
+            st.info("Tidak ada riwayat pemeriksaan yang cocok dengan filter.")
+        else:
+            st.info("Anda belum memiliki riwayat pemeriksaan. Silakan lakukan pemeriksaan pertama Anda.")
     else:
         # Fungsi untuk mewarnai hasil prediksi agar lebih informatif
         def style_prediksi(val):
@@ -41,10 +91,72 @@ def show_profile():
             return f'color: {color_map.get(val, "black")}; font-weight: bold;'
         
         st.dataframe(
-            history_df.style.applymap(style_prediksi, subset=['hasil_prediksi']),
+            history_df.drop(columns=['id']).style.applymap(style_prediksi, subset=['hasil_prediksi']),
             use_container_width=True
         )
 
+        col_prev, col_info, col_next = st.columns([1, 2, 1])
+        if col_prev.button("← Sebelumnya", disabled=len(tumpukan_kursor) == 1, use_container_width=True):
+            tumpukan_kursor.pop()
+            st.rerun()
+        col_info.markdown(f"<p style='text-align: center;'>Halaman {len(tumpukan_kursor)}</p>", unsafe_allow_html=True)
+        if col_next.button("Berikutnya →", disabled=kursor_berikutnya is None, use_container_width=True):
+            tumpukan_kursor.append(kursor_berikutnya)
+            st.rerun()
+
+# ======================================================================
+# --- Fungsi Panel Admin ---
+def show_admin_panel():
+    st.title("Panel Admin: Waktu per Tahap")
+    config = config_instrumentasi()
+
+    col_toggle, col_reset = st.columns([3, 1])
+    aktif = col_toggle.toggle("Instrumentasi aktif (berlaku untuk semua sesi di proses ini)", value=instrumentasi.aktif())
+    if aktif != instrumentasi.aktif():
+        instrumentasi.set_aktif(aktif)
+    if col_reset.button("Reset data", use_container_width=True):
+        instrumentasi.reset()
+
+    import page_individual  # impor lazy, sama seperti di menu
+    info = page_individual.get_antrian_simpan().info()
+    col_antrian, col_jurnal, col_db = st.columns(3)
+    col_antrian.metric("Antrian simpan", info['antrian'])
+    col_jurnal.metric("Record di jurnal", info['jurnal'])
+    col_db.metric("Database dicoba lagi dalam", f"{info['database_mati_detik']} detik")
+
+    cache = page_individual.get_prediction_cache().info()
+    dicari = cache['hits'] + cache['misses']
+    col_hit, col_isi, col_versi = st.columns(3)
+    col_hit.metric("Cache prediksi: hit", f"{cache['hits']:,} / {dicari:,}",
+                   f"{cache['hits'] / dicari:.0%} hit rate" if dicari else None, delta_color="off")
+    col_isi.metric("Isi cache prediksi", f"{cache['currsize']:,} / {cache['maxsize']:,}")
+    col_versi.metric("Versi model di cache", cache['versi_model'] or "-")
+
+    data = instrumentasi.ringkasan()
+    if not data['tahap'] and not data['counter']:
+        st.info("Belum ada data. Aktifkan instrumentasi lalu jalankan prediksi individual/kolektif.")
+        return
+
+    st.subheader("Tahap")
+    st.caption(f"Persentil dihitung dari {instrumentasi.SAMPEL_PER_TAHAP} sampel terakhir per tahap; jumlah dan total sejak proses start atau reset.")
+    st.dataframe(data['tahap'], use_container_width=True, hide_index=True)
+    if data['counter']:
+        st.subheader("Counter")
+        st.dataframe([{'counter': nama, 'nilai': nilai} for nama, nilai in sorted(data['counter'].items())],
+                     use_container_width=True, hide_index=True)
+
+    st.subheader("Ekspor Prometheus")
+    teks = instrumentasi.format_prometheus()
+    col_unduh, col_file = st.columns(2)
+    col_unduh.download_button("Unduh metrics.prom", data=teks, file_name='metrics.prom', mime='text/plain', use_container_width=True)
+    if config.get('file_prometheus') and col_file.button(f"Tulis ke {config['file_prometheus']}", use_container_width=True):
+        instrumentasi.tulis_prometheus(config['file_prometheus'])
+        st.success("File metrik ditulis.")
+    if config.get('port_prometheus'):
+        st.caption(f"Endpoint scrape: http://127.0.0.1:{config['port_prometheus']}/metrics")
+    with st.expander("Lihat teks"):
+        st.code(teks, language='text')
+
 # ======================================================================
 # --- Fungsi Halaman Login & Sign Up ---
 def show_login_page():
@@ -61,10 +173,13 @@ def show_login_page():
             if submitted:
                 conn = get_db_connection()
                 if conn:
-                    cursor = conn.cursor(dictionary=True)
-                    cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-                    user_data = cursor.fetchone()
-                    conn.close()
+                    try:
+                        # buffered=True agar tidak ada sisa hasil query saat koneksi dikembalikan ke pool
+                        cursor = conn.cursor(dictionary=True, buffered=True)
+                        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                        user_data = cursor.fetchone()
+                    finally:
+                        release_db_connection(conn)
                     if user_data and check_hashes(password, user_data["password"]):
                         st.session_state.logged_in = True
                         st.session_state.username = user_data["username"]
@@ -105,15 +220,17 @@ def show_signup_page():
                 else:
                     conn = get_db_connection()
                     if conn:
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT username FROM users WHERE username = %s", (new_username,))
-                        if cursor.fetchone(): st.warning("Nama pengguna ini sudah digunakan.")
-                        else:
-                            hashed_password = make_hashes(new_password)
-                            cursor.execute("INSERT INTO users (username, password, nama_lengkap, profesi) VALUES (%s, %s, %s, %s)", (new_username, hashed_password, new_nama_lengkap, profesi_final))
-                            conn.commit()
-                            st.success("Akun berhasil dibuat! Silakan masuk sekarang.")
-                        conn.close()
+                        try:
+                            cursor = conn.cursor(buffered=True)
+                            cursor.execute("SELECT username FROM users WHERE username = %s", (new_username,))
+                            if cursor.fetchone(): st.warning("Nama pengguna ini sudah digunakan.")
+                            else:
+                                hashed_password = make_hashes(new_password)
+                                cursor.execute("INSERT INTO users (username, password, nama_lengkap, profesi) VALUES (%s, %s, %s, %s)", (new_username, hashed_password, new_nama_lengkap, profesi_final))
+                                conn.commit()
+                                st.success("Akun berhasil dibuat! Silakan masuk sekarang.")
+                        finally:
+                            release_db_connection(conn)
                     else: st.error("Gagal terhubung ke server database.")
         if st.button("Sudah punya akun? Masuk", use_container_width=True, type="secondary"):
             st.session_state.page = "login"
@@ -145,10 +262,15 @@ if st.session_state.get("logged_in", False):
         )
 
         # --- MENU NAVIGASI ---
+        menu_options = ["Profil & Riwayat", "Pemeriksaan Individu", "Pemeriksaan Kolektif"]
+        menu_icons = ["person-badge", "file-earmark-person-fill", "files"]
+        if is_admin():
+            menu_options.append("Panel Admin")
+            menu_icons.append("speedometer2")
         selected_page = option_menu(
             menu_title=None, 
-            options=["Profil & Riwayat", "Pemeriksaan Individu", "Pemeriksaan Kolektif"],
-            icons=["person-badge", "file-earmark-person-fill", "files"], 
+            options=menu_options,
+            icons=menu_icons, 
             menu_icon="cast",
             default_index=0,
             styles={
@@ -172,13 +294,17 @@ if st.session_state.get("logged_in", False):
     if selected_page == "Profil & Riwayat":
         show_profile() 
     elif selected_page == "Pemeriksaan Individu":
+        import page_individual  # impor lazy: hanya dibayar sekali per proses
         page_individual.show()
     elif selected_page == "Pemeriksaan Kolektif":
+        import page_collective  # impor lazy: hanya dibayar sekali per proses
         page_collective.show()
+    elif selected_page == "Panel Admin" and is_admin():
+        show_admin_panel()
 
 else:
     # ---- KONDISI: PENGGUNA BELUM LOGIN ----
     if st.session_state.get('page', 'login') == 'signup':
         show_signup_page()
     else:
-        show_login_page()
+        show_login_page()
\ No newline at end of file
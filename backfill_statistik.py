@@ -0,0 +1,102 @@
+# ======================================================================
+# --- File: backfill_statistik.py ---
+# ======================================================================
+# Membangun ulang tabel statistik_risiko_harian dari seluruh data_pasien.
+# Dijalankan sekali setelah migrations/002 (untuk data lama), atau kapan
+# saja jika statistik diduga tidak sinkron. Baris data_pasien dibaca per
+# batch (keyset pada id) sehingga memori tetap kecil untuk jutaan baris.
+# Penghitungan dan penggantian isi tabel berjalan dalam satu transaksi
+# dengan locking read, jadi aplikasi boleh tetap menyimpan selama backfill.
+#
+# Cara pakai (dari root repo, koneksi dari [mysql] di .streamlit/secrets.toml):
+#   python backfill_statistik.py
+#   python backfill_statistik.py --dry-run
+# ======================================================================
+import argparse
+
+import pandas as pd
+
+from migrate import koneksi_dari_secrets
+from utils import kelompokkan_umur_gravida
+
+BARIS_PER_BATCH = 50_000
+KUNCI = ['tanggal', 'created_by', 'hasil_prediksi', 'kelompok_umur', 'kelompok_gravida']
+QUERY_INSERT_STATISTIK = """
+    INSERT INTO statistik_risiko_harian (
+        tanggal, created_by, hasil_prediksi, kelompok_umur, kelompok_gravida, jumlah
+    ) VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE jumlah = jumlah + VALUES(jumlah)
+"""
+
+def hitung_statistik(conn, id_setelah=0, batch=BARIS_PER_BATCH, kunci=False):
+    """
+    Jumlah baris data_pasien per KUNCI untuk id > id_setelah.
+    Dengan kunci=True dibaca sebagai locking read (LOCK IN SHARE MODE) di
+    dalam transaksi pemanggil: selalu melihat data terbaru yang sudah commit,
+    menunggu baris yang belum commit, dan menahan insert data_pasien baru di
+    rentang yang sudah dibaca sampai commit.
+    """
+    total = None
+    while True:
+        query = """
+            SELECT id, DATE(created_at) AS tanggal, created_by, hasil_prediksi, umur_ibu, gravida
+            FROM data_pasien
+            WHERE id > %s AND created_by IS NOT NULL AND hasil_prediksi IS NOT NULL
+        """
+        query += " ORDER BY id LIMIT %s"
+        if kunci:
+            query += " LOCK IN SHARE MODE"
+        df = pd.read_sql(query, conn, params=[id_setelah, batch])
+        if df.empty:
+            break
+
+        df['kelompok_umur'], df['kelompok_gravida'] = kelompokkan_umur_gravida(df['umur_ibu'], df['gravida'])
+        jumlah = df.groupby(KUNCI).size()
+        total = jumlah if total is None else total.add(jumlah, fill_value=0).astype(int)
+        id_setelah = int(df['id'].iloc[-1])
+        print(f"  ... sampai id {id_setelah:,}")
+    return total if total is not None else pd.Series(dtype=int)
+
+def _baris_statistik(jumlah):
+    return [(tanggal, int(created_by), risiko, umur, gravida, int(n))
+            for (tanggal, created_by, risiko, umur, gravida), n in jumlah.items()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangun ulang statistik_risiko_harian dari data_pasien.")
+    parser.add_argument('--dry-run', action='store_true', help="Hanya hitung, tidak menulis ke database.")
+    args = parser.parse_args()
+
+    conn = koneksi_dari_secrets()
+    try:
+        if args.dry_run:
+            total = hitung_statistik(conn)
+            print(f"{len(total):,} baris statistik dari {int(total.sum()):,} pemeriksaan.")
+            return
+
+        # Hitung dan ganti isi tabel dalam SATU transaksi, dari satu pandangan
+        # data. Semua batch dibaca dengan locking read: baris yang masih dalam
+        # transaksi aplikasi ditunggu sampai commit (jadi tidak terlewat walau
+        # id-nya lebih kecil dari baris yang sudah commit), dan next-key lock
+        # menahan INSERT ke rentang yang sudah dibaca. Insert aplikasi selalu
+        # di ujung index, sehingga baru tertahan saat scan mencapai ujung tabel
+        # dan dilanjutkan setelah commit, menambah statistik di atas hasil ini.
+        # Urutan kunci sama dengan aplikasi (data_pasien lalu statistik), jadi
+        # tidak deadlock. Gap lock ini perlu REPEATABLE READ, bukan READ COMMITTED.
+        conn.start_transaction(isolation_level='REPEATABLE READ')
+        print("Menghitung statistik dari seluruh data_pasien...")
+        total = hitung_statistik(conn, kunci=True)
+        print(f"{len(total):,} baris statistik dari {int(total.sum()):,} pemeriksaan.")
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM statistik_risiko_harian")
+        if len(total):
+            cursor.executemany(QUERY_INSERT_STATISTIK, _baris_statistik(total))
+        conn.commit()
+        print("Statistik selesai dibangun ulang.")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,168 @@
+# ======================================================================
+# --- File: benchmarks/history_pagination.py ---
+# ======================================================================
+# Membandingkan waktu ambil satu halaman riwayat dengan keyset pagination
+# (utils.query_riwayat) dan dengan LIMIT/OFFSET, di berbagai kedalaman
+# halaman. Dijalankan pada database MySQL lokal khusus benchmark yang diisi
+# data sintetis (default 1 juta baris, separuhnya milik satu user "berat").
+# Dengan index dari migrations/, waktu keyset harus tetap datar (juga dengan
+# filter satu atau beberapa tingkat risiko), sedangkan OFFSET makin lambat
+# seiring kedalaman halaman.
+#
+# Cara pakai (dari root repo, JANGAN arahkan ke database produksi):
+#   python benchmarks/history_pagination.py --user root --password rahasia
+#   python benchmarks/history_pagination.py --baris 1000000 --output riwayat.json
+# ======================================================================
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+
+import mysql.connector
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import query_riwayat, KOLOM_DATA_PASIEN, KOLOM_RIWAYAT, UKURAN_HALAMAN_RIWAYAT
+from migrate import terapkan_migrasi
+
+USER_BERAT = 1
+SKEMA_BENCHMARK = [
+    """CREATE TABLE IF NOT EXISTS data_pasien (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        nama_pasien VARCHAR(255), umur_ibu INT, gravida INT, umur_kehamilan INT,
+        tinggi_badan FLOAT, tekanan_sistolik INT, tekanan_diastolik INT,
+        penyakit_anemia VARCHAR(20), posisi_janin VARCHAR(20), hasil_tes_VDRL VARCHAR(20),
+        hasil_tes_HbsAg VARCHAR(20), hasil_prediksi VARCHAR(10), versi_model VARCHAR(32), created_by INT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+def isi_data(conn, jumlah_baris, jumlah_user, chunk=10_000, seed=0):
+    """Mengisi data_pasien dengan baris acak; setengahnya milik USER_BERAT."""
+    rng = np.random.default_rng(seed)
+    cursor = conn.cursor()
+    kolom_insert = KOLOM_DATA_PASIEN + ['created_by', 'created_at']
+    query = f"INSERT INTO data_pasien ({', '.join(kolom_insert)}) VALUES ({', '.join(['%s'] * len(kolom_insert))})"
+    awal = datetime.datetime(2023, 1, 1)
+    for mulai in range(0, jumlah_baris, chunk):
+        n = min(chunk, jumlah_baris - mulai)
+        pilih = lambda *nilai: rng.choice(nilai, n).tolist()
+        kolom = {
+            'nama_pasien': [f'Pasien {mulai + i}' for i in range(n)],
+            'umur_ibu': rng.integers(15, 50, n).tolist(),
+            'gravida': rng.integers(1, 8, n).tolist(),
+            'umur_kehamilan': rng.integers(4, 42, n).tolist(),
+            'tinggi_badan': rng.integers(140, 180, n).tolist(),
+            'tekanan_sistolik': rng.integers(80, 180, n).tolist(),
+            'tekanan_diastolik': rng.integers(50, 120, n).tolist(),
+            'penyakit_anemia': pilih('Negatif', 'Positif'),
+            'posisi_janin': pilih('Normal', 'Abnormal'),
+            'hasil_tes_VDRL': pilih('Negatif', 'Positif'),
+            'hasil_tes_HbsAg': pilih('Negatif', 'Positif'),
+            'hasil_prediksi': pilih('KRR', 'KRT', 'KRST'),
+            'versi_model': [None] * n,
+        }
+        created_by = np.where(rng.random(n) < 0.5, USER_BERAT, rng.integers(2, jumlah_user + 1, n)).tolist()
+        detik = np.sort(rng.integers(0, 3 * 365 * 86400, n))
+        created_at = [awal + datetime.timedelta(seconds=int(s)) for s in detik]
+        baris = [tuple(kolom[k][i] for k in KOLOM_DATA_PASIEN) + (created_by[i], created_at[i]) for i in range(n)]
+        cursor.executemany(query, baris)
+        conn.commit()
+        print(f"\r  {mulai + n:,}/{jumlah_baris:,} baris", end='', flush=True)
+    print()
+
+def waktu_query(conn, sql, params, ulang):
+    cursor = conn.cursor(buffered=True)
+    hasil = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        cursor.execute(sql, params)
+        baris = cursor.fetchall()
+        hasil.append(time.perf_counter() - mulai)
+    return statistics.median(hasil) * 1000, baris
+
+def query_offset(user_id, risiko, limit, offset):
+    """Pembanding: halaman riwayat dengan LIMIT/OFFSET dan filter risiko IN (...)."""
+    kondisi, params = "created_by = %s", [user_id]
+    if risiko:
+        kondisi += f" AND hasil_prediksi IN ({', '.join(['%s'] * len(risiko))})"
+        params.extend(risiko)
+    sql = f"""
+        SELECT {KOLOM_RIWAYAT.strip()}
+        FROM data_pasien
+        WHERE {kondisi}
+        ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s
+    """
+    return sql, params + [limit, offset]
+
+def kursor_di(conn, user_id, posisi, risiko):
+    """(created_at, id) baris ke-`posisi` (untuk memulai halaman keyset di kedalaman itu)."""
+    cursor = conn.cursor(buffered=True)
+    cursor.execute(*query_offset(user_id, risiko, 1, posisi - 1))
+    baris = cursor.fetchone()
+    return (baris[-1], baris[0]) if baris else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyset pagination riwayat vs OFFSET.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3306)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', default='pregnancy_bench', help="Database khusus benchmark (dibuat jika belum ada).")
+    parser.add_argument('--baris', type=int, default=1_000_000)
+    parser.add_argument('--jumlah-user', type=int, default=50)
+    parser.add_argument('--halaman', type=int, nargs='+', default=[1, 10, 100, 1_000, 10_000])
+    parser.add_argument('--ulang', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Simpan hasil sebagai JSON ke path ini.")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(host=args.host, port=args.port, user=args.user, password=args.password)
+    cursor = conn.cursor(buffered=True)
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    conn.database = args.database
+    for statement in SKEMA_BENCHMARK:
+        cursor.execute(statement)
+
+    cursor.execute("SELECT COUNT(*) FROM data_pasien")
+    sudah_ada = cursor.fetchone()[0]
+    if sudah_ada < args.baris:
+        print(f"Mengisi {args.baris - sudah_ada:,} baris sintetis...")
+        isi_data(conn, args.baris - sudah_ada, args.jumlah_user, seed=sudah_ada)
+    terapkan_migrasi(conn)
+    cursor.execute("ANALYZE TABLE data_pasien")
+    cursor.fetchall()
+
+    hasil = []
+    for risiko in (None, ['KRST'], ['KRT', 'KRST']):
+        label = 'semua' if risiko is None else ','.join(risiko)
+        for halaman in args.halaman:
+            posisi = (halaman - 1) * UKURAN_HALAMAN_RIWAYAT
+            kursor = kursor_di(conn, USER_BERAT, posisi, risiko) if posisi else None
+            if posisi and kursor is None:
+                continue # Riwayat user tidak sedalam ini
+
+            sql, params = query_riwayat(USER_BERAT, cursor=kursor, risiko=risiko)
+            ms_keyset, baris_keyset = waktu_query(conn, sql, params, args.ulang)
+
+            sql_offset, params_offset = query_offset(USER_BERAT, risiko, UKURAN_HALAMAN_RIWAYAT + 1, posisi)
+            ms_offset, baris_offset = waktu_query(conn, sql_offset, params_offset, args.ulang)
+
+            sama = [b[0] for b in baris_keyset] == [b[0] for b in baris_offset]
+            hasil.append({'filter': label, 'halaman': halaman, 'keyset_ms': round(ms_keyset, 2),
+                          'offset_ms': round(ms_offset, 2), 'sama': sama})
+            print(f"filter {label:<8} halaman {halaman:>7,} | keyset {ms_keyset:8.2f} ms | "
+                  f"offset {ms_offset:8.2f} ms | hasil sama: {sama}")
+    conn.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'baris': args.baris, 'ukuran_halaman': UKURAN_HALAMAN_RIWAYAT, 'hasil': hasil}, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+# ======================================================================
+# --- File: benchmarks/parallel_scoring_bench.py ---
+# ======================================================================
+# Membandingkan scoring kolektif di satu proses (preprocess + predict) dengan
+# ParallelScorer (shard di process pool) untuk input sintetis 1k/100k/1M baris.
+# Input sintetis dibuat dengan mengambil sampel baris pregnancy-dataset.csv
+# (dengan pengembalian), jadi variasi nilai dan format teksnya tetap realistis.
+# Hasil kedua jalur dicek identik sebelum waktunya dilaporkan.
+#
+# Bagian kedua mengukur mode streaming halaman kolektif (proses_streaming:
+# baca CSV per chunk -> scoring -> tulis CSV hasil) dengan scorer satu proses
+# dibanding ParallelScorer.score_stream dengan ambang bawaan, dan mengecek
+# file hasil keduanya sama persis.
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/parallel_scoring_bench.py
+#   python benchmarks/parallel_scoring_bench.py --ukuran 100000 1000000 --workers 32
+#   python benchmarks/parallel_scoring_bench.py --ukuran-stream 1000000
+# ======================================================================
+import argparse
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import preprocess_input_for_pipeline
+from parallel_scoring import ParallelScorer, ukuran_shard
+from compiled_model import load_compiled_model
+from page_collective import proses_streaming
+
+def data_sintetis(n, seed=0):
+    df = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv'))
+    return df.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+
+def ukur(fungsi, ulang):
+    """Waktu terbaik dari beberapa percobaan, beserta hasil percobaan terakhir."""
+    terbaik = float('inf')
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        hasil = fungsi()
+        terbaik = min(terbaik, time.perf_counter() - mulai)
+    return terbaik, hasil
+
+def file_csv(df):
+    """Objek mirip UploadedFile Streamlit (punya .name) berisi df sebagai CSV."""
+    buffer = io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+    buffer.name = 'unggahan.csv'
+    return buffer
+
+def streaming(uploaded_file, scorer, model_aktif):
+    hasil = proses_streaming(uploaded_file, scorer, model_aktif)
+    isi = hasil['file'].read()
+    hasil['file'].close()
+    return isi
+
+def bench_streaming(ukuran, workers, model_aktif, ulang):
+    serial, paralel = ParallelScorer(workers=1), ParallelScorer(workers=workers)
+    try:
+        paralel.score(data_sintetis(paralel.workers * 1000), model_aktif.model, model_aktif.path)  # pemanasan
+        for n in ukuran:
+            uploaded_file = file_csv(data_sintetis(n))
+            waktu_serial, isi_serial = ukur(lambda: streaming(uploaded_file, serial, model_aktif), ulang)
+            waktu_paralel, isi_paralel = ukur(lambda: streaming(uploaded_file, paralel, model_aktif), ulang)
+            print(f"streaming {n:>10,} baris | satu proses {waktu_serial:7.3f} s | "
+                  f"score_stream {waktu_paralel:7.3f} s | percepatan {waktu_serial / waktu_paralel:5.2f}x | "
+                  f"hasil {'sama' if isi_serial == isi_paralel else 'BERBEDA'}")
+            if isi_serial != isi_paralel:
+                sys.exit("Hasil streaming paralel tidak sama dengan satu proses!")
+    finally:
+        paralel.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoring kolektif serial vs process pool.")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--workers', type=int, default=None, help="Jumlah worker (default: jumlah CPU).")
+    parser.add_argument('--ukuran-stream', type=int, nargs='*', default=[100_000, 1_000_000],
+                        help="Ukuran file CSV untuk benchmark mode streaming (kosongkan untuk melewati).")
+    parser.add_argument('--ulang', type=int, default=3, help="Percobaan per ukuran (diambil yang tercepat).")
+    parser.add_argument('--model', default=os.path.join(ROOT, 'pregnancy_risk_model.npz'))
+    args = parser.parse_args()
+
+    # ambang_paralel=0 memaksa jalur process pool agar overhead-nya ikut terukur;
+    # di aplikasi, file di bawah AMBANG_PARALEL tetap diproses di proses utama.
+    scorer = ParallelScorer(workers=args.workers, ambang_paralel=0)
+    model = load_compiled_model(args.model)
+    print(f"workers: {scorer.workers}")
+    try:
+        # Pemanasan: worker di-spawn dan memuat model sekali
+        scorer.score(data_sintetis(scorer.workers * 1000), model, args.model)
+
+        for n in args.ukuran:
+            df = data_sintetis(n)
+            waktu_serial, hasil_serial = ukur(lambda: model.predict(preprocess_input_for_pipeline(df)), args.ulang)
+            waktu_paralel, hasil_paralel = ukur(lambda: scorer.score(df, model, args.model), args.ulang)
+            beda = int((hasil_serial != hasil_paralel).sum())
+            print(f"{n:>10,} baris | shard {ukuran_shard(n, scorer.workers):>7,} | "
+                  f"serial {waktu_serial:7.3f} s ({n / waktu_serial:>10,.0f} baris/s) | "
+                  f"paralel {waktu_paralel:7.3f} s ({n / waktu_paralel:>10,.0f} baris/s) | "
+                  f"percepatan {waktu_serial / waktu_paralel:5.2f}x | beda {beda}")
+            if beda:
+                sys.exit("Hasil paralel tidak sama dengan serial!")
+    finally:
+        scorer.shutdown()
+
+    if args.ukuran_stream:
+        bench_streaming(args.ukuran_stream, args.workers, SimpleNamespace(model=model, path=args.model), args.ulang)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+# ======================================================================
+# --- File: benchmarks/predict_one_latency.py ---
+# ======================================================================
+# Membandingkan latensi prediksi satu record:
+#   - jalur DataFrame: pd.DataFrame([record]) -> preprocess_input_for_pipeline -> predict
+#   - jalur cepat    : utils.predict_one(record, model)
+# Sebelum mengukur, kedua jalur dicek memberi hasil yang sama untuk seluruh
+# baris pregnancy-dataset.csv dan sampel input bergaya form individual
+# (tinggi badan integer, dan float seperti dari kolom FLOAT database).
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/predict_one_latency.py
+#   python benchmarks/predict_one_latency.py --ulang 50000
+# ======================================================================
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import preprocess_input_for_pipeline, predict_one
+from compiled_model import load_compiled_model
+
+def record_form_acak(n, seed=0):
+    """Record acak dengan rentang yang sama seperti number_input/selectbox di page_individual."""
+    rng = np.random.default_rng(seed)
+    biner = lambda a, b: rng.choice([a, b], n).tolist()
+    kolom = {
+        'umur_ibu': rng.integers(15, 61, n).tolist(),
+        'gravida': rng.integers(1, 8, n).tolist(),
+        'umur_kehamilan': rng.integers(4, 46, n).tolist(),
+        'tinggi_badan': rng.integers(130, 201, n).tolist(),
+        'tekanan_sistolik': rng.integers(70, 251, n).tolist(),
+        'tekanan_diastolik': rng.integers(40, 151, n).tolist(),
+        'penyakit_anemia': biner('Negatif', 'Positif'),
+        'posisi_janin': biner('Normal', 'Abnormal'),
+        'hasil_tes_VDRL': biner('Negatif', 'Positif'),
+        'hasil_tes_HbsAg': biner('Negatif', 'Positif'),
+    }
+    return [dict(zip(kolom, nilai)) for nilai in zip(*kolom.values())]
+
+def cek_parity(model, records, nama):
+    batch = model.predict(preprocess_input_for_pipeline(pd.DataFrame(records)))
+    satu_per_satu = np.array([predict_one(record, model) for record in records], dtype=object)
+    beda = int((batch != satu_per_satu).sum())
+    print(f"parity {nama}: {len(records)} record, {beda} berbeda")
+    return beda == 0
+
+def ukur(fungsi, ulang):
+    mulai = time.perf_counter()
+    for _ in range(ulang):
+        fungsi()
+    return (time.perf_counter() - mulai) / ulang
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark predict_one vs jalur DataFrame.")
+    parser.add_argument('--ulang', type=int, default=20000, help="Jumlah panggilan predict_one yang diukur.")
+    parser.add_argument('--model', default=os.path.join(ROOT, 'pregnancy_risk_model.npz'))
+    args = parser.parse_args()
+
+    model = load_compiled_model(args.model)
+    dataset = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv')).to_dict('records')
+    ok = cek_parity(model, dataset, 'pregnancy-dataset.csv')
+    ok = cek_parity(model, record_form_acak(20000), 'input form acak') and ok
+    tinggi_float = [dict(r, tinggi_badan=r['tinggi_badan'] + 0.5) for r in record_form_acak(20000, seed=1)]
+    ok = cek_parity(model, tinggi_float, 'tinggi badan float') and ok
+    if not ok:
+        sys.exit("predict_one tidak sama dengan jalur DataFrame!")
+
+    record = record_form_acak(1)[0]
+    ulang_df = max(1, args.ulang // 100)
+    waktu_df = ukur(lambda: model.predict(preprocess_input_for_pipeline(pd.DataFrame([record]))), ulang_df)
+    waktu_satu = ukur(lambda: predict_one(record, model), args.ulang)
+    print(f"jalur DataFrame : {waktu_df * 1e6:10.1f} us/record ({ulang_df} kali)")
+    print(f"predict_one     : {waktu_satu * 1e6:10.1f} us/record ({args.ulang} kali)")
+    print(f"percepatan      : {waktu_df / waktu_satu:10.0f}x")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
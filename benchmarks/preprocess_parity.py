@@ -0,0 +1,192 @@
+# ======================================================================
+# --- File: benchmarks/preprocess_parity.py ---
+# ======================================================================
+# Mengecek utils.preprocess_input_for_pipeline (versi per kolom) memberi
+# DataFrame yang sama persis dengan implementasi lama (apply per baris,
+# disalin di bawah sebagai preprocess_referensi) untuk:
+#   - seluruh baris pregnancy-dataset.csv
+#   - input bergaya form individual (tekanan_sistolik/tekanan_diastolik)
+#   - tinggi badan dan tekanan darah dengan format tidak lazim/rusak
+#   - tinggi badan yang tidak bisa dikonversi (keduanya harus error sama)
+#   - kolom integer seperti hasil baca Parquet/Feather
+# lalu membandingkan waktu keduanya pada salinan dataset yang diperbesar.
+# Keluar dengan status 1 jika ada perbedaan. Perbedaan yang disengaja:
+#   - kolom tekanan_darah tanpa '/' di semua baris dulu membuat implementasi
+#     lama error (TypeError), sekarang menjadi 'Tidak diketahui' (tidak dicek)
+#   - kolom tinggi_badan bertipe float (mis. FLOAT dari snapshot database)
+#     dulu dibaca sebagai feet.inches (155.0 -> 4724.4 cm), sekarang dianggap
+#     sudah dalam cm; dicek terpisah terhadap nilai aslinya
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/preprocess_parity.py
+#   python benchmarks/preprocess_parity.py --baris 1000000
+# ======================================================================
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import preprocess_input_for_pipeline
+
+def preprocess_referensi(df_raw):
+    """Implementasi preprocess_input_for_pipeline sebelum divektorisasi (jangan diubah)."""
+    df = df_raw.copy()
+
+    def feet_to_cm(value):
+        try:
+            feet, inches = map(float, str(value).replace('"', '').replace("'", '').split('.'))
+            return round((feet * 30.48) + (inches * 2.54), 2)
+        except:
+            return value
+
+    def klasifikasi_tekanan_darah(s, d):
+        s, d = pd.to_numeric(s, errors='coerce'), pd.to_numeric(d, errors='coerce')
+        if pd.isna(s) or pd.isna(d): return 'Tidak diketahui'
+        if s < 90 or d < 60: return 'Hipotensi'
+        elif 90 <= s < 120 and 60 <= d < 80: return 'Normal'
+        elif 120 <= s < 140 or 80 <= d < 90: return 'Prehipertensi'
+        elif 140 <= s < 160 or 90 <= d < 100: return 'Hipertensi Stage 1'
+        elif s >= 160 or d >= 100: return 'Hipertensi Stage 2'
+        else: return 'Tidak diketahui'
+
+    for col in ['gravida', 'umur_kehamilan']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].astype(str).str.extract(r'(\d+)', expand=False), errors='coerce').fillna(0)
+
+    if 'tinggi_badan' in df.columns:
+        df['tinggi_badan'] = df['tinggi_badan'].apply(feet_to_cm).astype(float)
+
+    if 'tekanan_darah' in df.columns:
+        parts = df['tekanan_darah'].astype(str).str.split('/', expand=True)
+        sistolik = pd.to_numeric(parts[0], errors='coerce')
+        diastolik = pd.to_numeric(parts.get(1), errors='coerce')
+        df['kategori_tekanan_darah'] = [klasifikasi_tekanan_darah(s, d) for s, d in zip(sistolik, diastolik)]
+    elif 'tekanan_sistolik' in df.columns and 'tekanan_diastolik' in df.columns:
+        df['kategori_tekanan_darah'] = df.apply(
+            lambda row: klasifikasi_tekanan_darah(row['tekanan_sistolik'], row['tekanan_diastolik']),
+            axis=1
+        )
+
+    if 'penyakit_anemia' in df.columns:
+        df['penyakit_anemia'] = df['penyakit_anemia'].fillna("Negatif").replace({'Minimal': 'Positif', 'Medium': 'Positif'})
+    for col in ['hasil_tes_VDRL', 'hasil_tes_HbsAg']:
+        if col in df.columns:
+            df[col] = df[col].replace({'Negative': 'Negatif', 'Positive': 'Positif'})
+
+    return df
+
+def data_form_acak(n, seed=0):
+    """Input bergaya form individual: angka sistolik/diastolik terpisah."""
+    rng = np.random.default_rng(seed)
+    biner = lambda a, b: rng.choice([a, b], n)
+    return pd.DataFrame({
+        'umur_ibu': rng.integers(15, 61, n),
+        'gravida': rng.integers(1, 8, n),
+        'umur_kehamilan': rng.integers(4, 46, n),
+        'tinggi_badan': rng.integers(130, 201, n),
+        'tekanan_sistolik': rng.integers(70, 251, n),
+        'tekanan_diastolik': rng.integers(40, 151, n),
+        'penyakit_anemia': biner('Negatif', 'Positif'),
+        'posisi_janin': biner('Normal', 'Abnormal'),
+        'hasil_tes_VDRL': biner('Negatif', 'Positif'),
+        'hasil_tes_HbsAg': biner('Negatif', 'Positif'),
+    })
+
+def data_rusak(dataset):
+    """Baris dataset dengan tinggi badan, tekanan darah, dan gravida berformat tidak lazim."""
+    tinggi = ["5.3", "5'3.0\"", "4.11", "160", "5 . 3", None, "6.", ".5", 158.5, "5.3\"", "-5.3"]
+    tekanan = ["120/80", "abc", "120", "", None, "/80", "200/130/1", "85/55", " 110 / 70 ", "140/", "9O/60"]
+    gravida = ["3rd", "1st", "G2", "", None, "tidak tahu", 4, "12"]
+    n = len(tinggi) * len(tekanan)
+    df = dataset.sample(n, replace=True, random_state=0).reset_index(drop=True).astype(object)
+    df['tinggi_badan'] = [tinggi[i % len(tinggi)] for i in range(n)]
+    df['tekanan_darah'] = [tekanan[i // len(tinggi)] for i in range(n)]
+    df['gravida'] = [gravida[i % len(gravida)] for i in range(n)]
+    df.loc[::7, 'penyakit_anemia'] = None
+    return df
+
+def data_integer(dataset):
+    """Kolom angka bertipe integer, seperti hasil baca Parquet/Feather hasil ekspor aplikasi."""
+    df = preprocess_referensi(dataset)[dataset.columns]
+    return df.astype({'gravida': 'int64', 'umur_kehamilan': 'int64'}).assign(
+        tinggi_badan=df['tinggi_badan'].round().astype('int64'))
+
+def cek_tinggi_float(dataset):
+    """Kolom tinggi_badan float (cm) harus lolos apa adanya; kolom lain tetap sama dengan implementasi lama."""
+    df = preprocess_referensi(dataset)[dataset.columns].astype({'tinggi_badan': 'float64'})
+    df.loc[::3, 'tinggi_badan'] = np.nan
+    harapan = preprocess_referensi(df.drop(columns='tinggi_badan'))
+    harapan.insert(df.columns.get_loc('tinggi_badan'), 'tinggi_badan', df['tinggi_badan'])
+    try:
+        assert_frame_equal(preprocess_input_for_pipeline(df), harapan)
+        sama, keterangan = True, ''
+    except AssertionError as e:
+        sama, keterangan = False, str(e)
+    print(f"tinggi_badan float: {len(df)} baris, {'tetap cm' if sama else 'BERBEDA'} {keterangan}".rstrip())
+    return sama
+
+# Tinggi badan yang tetap berupa teks setelah feet_to_cm membuat astype(float) gagal
+TINGGI_TIDAK_VALID = ["abc", "", "5.3.1", "5'3\"", "160 cm"]
+
+def _jalankan(fungsi, df):
+    """DataFrame hasil, atau tipe exception jika fungsi gagal."""
+    try:
+        return fungsi(df)
+    except Exception as e:
+        return type(e)
+
+def cek_parity(df, nama):
+    baru, lama = _jalankan(preprocess_input_for_pipeline, df), _jalankan(preprocess_referensi, df)
+    if isinstance(baru, type) or isinstance(lama, type):
+        sama = baru is lama
+        keterangan = f"error {baru.__name__} / {lama.__name__}" if sama else f"sekarang {baru}, lama {lama}"
+    else:
+        try:
+            assert_frame_equal(baru, lama)
+            sama, keterangan = True, ''
+        except AssertionError as e:
+            sama, keterangan = False, str(e)
+    print(f"parity {nama}: {len(df)} baris, {'sama' if sama else 'BERBEDA'} {keterangan}".rstrip())
+    return sama
+
+def ukur(fungsi, df, ulang=3):
+    terbaik = float('inf')
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi(df)
+        terbaik = min(terbaik, time.perf_counter() - mulai)
+    return terbaik
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek parity dan waktu preprocess_input_for_pipeline vs implementasi lama.")
+    parser.add_argument('--baris', type=int, default=100_000, help="Ukuran salinan dataset untuk pengukuran waktu.")
+    args = parser.parse_args()
+
+    dataset = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv'))
+    ok = cek_parity(dataset, 'pregnancy-dataset.csv')
+    ok = cek_parity(data_form_acak(20_000), 'input form acak') and ok
+    ok = cek_parity(data_rusak(dataset), 'format tidak lazim') and ok
+    ok = cek_parity(data_integer(dataset), 'kolom integer') and ok
+    ok = cek_tinggi_float(dataset) and ok
+    for tinggi in TINGGI_TIDAK_VALID:
+        df = dataset.head(3).astype({'tinggi_badan': object})
+        df.loc[1, 'tinggi_badan'] = tinggi
+        ok = cek_parity(df, f"tinggi_badan {tinggi!r}") and ok
+    if not ok:
+        sys.exit("preprocess_input_for_pipeline tidak sama dengan implementasi lama!")
+
+    besar = dataset.sample(args.baris, replace=True, random_state=0).reset_index(drop=True)
+    waktu_lama = ukur(preprocess_referensi, besar, ulang=1)
+    waktu_baru = ukur(preprocess_input_for_pipeline, besar)
+    print(f"{args.baris:,} baris: lama {waktu_lama:.3f} detik, sekarang {waktu_baru:.3f} detik "
+          f"({waktu_lama / waktu_baru:.1f}x)")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
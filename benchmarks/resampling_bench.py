@@ -0,0 +1,79 @@
+# ======================================================================
+# --- File: benchmarks/resampling_bench.py ---
+# ======================================================================
+# Membandingkan pilihan resampling training (lihat resampling.py) pada
+# beberapa ukuran data: rata-rata waktu fit per fold (preprocess +
+# resampling + tree) dan F1-macro CV, memakai parameter tree terbaik dari
+# model_manifest.json dan StratifiedKFold yang sama dengan train_model.py.
+#
+# Data sintetis diambil dari distribusi tiap kolom pregnancy-dataset.csv
+# secara independen lalu diberi label dengan realistic_labeling, sehingga
+# jumlah kombinasi fitur berbeda ikut bertambah seiring jumlah baris
+# (tidak hanya mengulang 998 baris asli).
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/resampling_bench.py
+#   python benchmarks/resampling_bench.py --ukuran 100000 1000000 --pilihan smote smote_unik
+# ======================================================================
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import preprocess_input_for_pipeline
+from train_model import realistic_labeling, bandingkan_resampling, cetak_perbandingan_resampling
+from resampling import PILIHAN_RESAMPLING
+from model_manifest import muat_manifest, MANIFEST_PATH
+from sklearn.model_selection import StratifiedKFold
+
+def data_sintetis(n, seed=0):
+    """n baris mentah; setiap kolom ditarik dari distribusi nilai kolom itu di dataset."""
+    dataset = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv'))
+    rng = np.random.default_rng(seed)
+    kolom = {}
+    for nama in dataset.columns:
+        kode, nilai_unik = pd.factorize(dataset[nama], use_na_sentinel=False)
+        kolom[nama] = nilai_unik.take(kode[rng.integers(0, len(kode), n)])
+    return pd.DataFrame(kolom)
+
+def data_training(n):
+    """(X, y) siap masuk pipeline, sama seperti langkah 2-4 train_model.py."""
+    df = realistic_labeling(preprocess_input_for_pipeline(data_sintetis(n)))
+    return df.drop(columns=['label_risiko', 'skor_risiko']), df['label_risiko']
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu fit dan F1-macro pilihan resampling.")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+    parser.add_argument('--pilihan', nargs='+', default=PILIHAN_RESAMPLING, choices=PILIHAN_RESAMPLING)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--output', default=None, help="Path file JSON hasil (opsional).")
+    args = parser.parse_args()
+
+    params = muat_manifest(os.path.join(ROOT, MANIFEST_PATH))['cv']['best_params']
+    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    print(f"Parameter tree: {params}")
+
+    semua = []
+    for n in args.ukuran:
+        X, y = data_training(n)
+        print(f"\n{n:,} baris | distribusi label {y.value_counts().to_dict()}")
+        mulai = time.perf_counter()
+        hasil = bandingkan_resampling(X, y, params, cv, n_jobs=args.n_jobs, pilihan=args.pilihan)
+        cetak_perbandingan_resampling(hasil)
+        print(f"({time.perf_counter() - mulai:.1f} detik)")
+        semua.extend(dict(h, baris=n) for h in hasil)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'params': params, 'hasil': semua}, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
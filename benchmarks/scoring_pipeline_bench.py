@@ -0,0 +1,197 @@
+# ======================================================================
+# --- File: benchmarks/scoring_pipeline_bench.py ---
+# ======================================================================
+# Benchmark end-to-end jalur scoring. Setiap tahap diukur terpisah pada
+# beberapa ukuran batch (default 1k, 100k, 1 juta baris):
+#   preprocess  : utils.preprocess_input_for_pipeline
+#   labeling    : train_model.realistic_labeling
+#   predict     : predict model ringan (.npz) yang dipakai aplikasi
+#   alasan      : predict + kolom alasan (jalur keputusan per baris) seperti di halaman kolektif
+#   kolektif_csv / kolektif_xlsx / kolektif_parquet : alur halaman kolektif,
+#                 yaitu baca file unggahan -> preprocess -> predict -> ekspor CSV
+# Dicatat waktu (terbaik dan median dari --ulang percobaan) dan memori puncak
+# (tracemalloc, diukur di percobaan terpisah agar tidak memperlambat waktu).
+#
+# Data sintetis diambil dari distribusi tiap kolom pregnancy-dataset.csv
+# (per kolom secara independen, termasuk sel kosong), sehingga format
+# mentahnya sama dengan file unggahan asli.
+#
+# Hasil disimpan sebagai JSON. Dengan --bandingkan, hasil dibandingkan dengan
+# JSON lain (mis. dari branch main) dan skrip keluar dengan kode 1 jika ada
+# tahap yang lebih lambat dari --toleransi (dan lebih dari --min-selisih detik,
+# agar noise pada tahap yang hanya butuh beberapa milidetik tidak dihitung).
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/scoring_pipeline_bench.py --output bench_main.json
+#   python benchmarks/scoring_pipeline_bench.py --ukuran 1000 100000 --bandingkan bench_main.json
+# ======================================================================
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import preprocess_input_for_pipeline
+from train_model import realistic_labeling
+from parallel_scoring import ParallelScorer
+from compiled_model import load_compiled_model
+from model_manifest import hash_file
+from page_collective import baca_file
+
+# Excel lambat ditulis/dibaca dan maksimal 1.048.576 baris per sheet
+MAKS_BARIS_XLSX = 100_000
+
+def data_sintetis(n, seed=0):
+    """n baris mentah; setiap kolom ditarik dari distribusi nilai kolom itu di dataset."""
+    dataset = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv'))
+    rng = np.random.default_rng(seed)
+    kolom = {}
+    for nama in dataset.columns:
+        kode, nilai_unik = pd.factorize(dataset[nama], use_na_sentinel=False)
+        kolom[nama] = nilai_unik.take(kode[rng.integers(0, len(kode), n)])
+    return pd.DataFrame(kolom)
+
+def file_unggahan(df, format_file):
+    """Isi file seperti yang diunggah pengguna (tidak ikut diukur)."""
+    buffer = io.BytesIO()
+    if format_file == 'csv':
+        df.to_csv(buffer, index=False)
+    elif format_file == 'parquet':
+        df.to_parquet(buffer, index=False)
+    else:
+        df.to_excel(buffer, index=False, engine='openpyxl')
+    return buffer.getvalue()
+
+class FileUnggahan(io.BytesIO):
+    """Pengganti UploadedFile Streamlit (BytesIO dengan atribut name)."""
+
+    def __init__(self, isi, name):
+        super().__init__(isi)
+        self.name = name
+
+def alur_kolektif(isi_file, format_file, scorer, model, model_path):
+    """Sama dengan jalur non-streaming page_collective: baca -> score -> ekspor CSV."""
+    df_input = baca_file(FileUnggahan(isi_file, f'unggahan.{format_file}'))
+    df_input['hasil_prediksi'] = scorer.score(df_input, model, model_path)
+    output = io.BytesIO()
+    df_input.to_csv(output, index=False, encoding='utf-8')
+    return output
+
+def ukur(fungsi, ulang):
+    """(waktu terbaik, waktu median, memori puncak MB). Memori diukur di percobaan tambahan."""
+    waktu = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        waktu.append(time.perf_counter() - mulai)
+
+    tracemalloc.start()
+    try:
+        fungsi()
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(waktu), statistics.median(waktu), puncak / 1024 / 1024
+
+def info_lingkungan(model_path):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'waktu': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu': os.cpu_count(),
+        'model_sha256': hash_file(model_path),
+    }
+
+def bandingkan(hasil, path_dasar, toleransi, min_selisih):
+    """Mencetak rasio waktu terhadap JSON dasar; True jika ada tahap yang melambat."""
+    with open(path_dasar) as f:
+        dasar = {(h['tahap'], h['baris']): h for h in json.load(f)['hasil']}
+    ada_regresi = False
+    print(f"\nDibandingkan dengan {path_dasar} (toleransi {toleransi:.0%}):")
+    for h in hasil:
+        lama = dasar.get((h['tahap'], h['baris']))
+        if lama is None:
+            continue
+        rasio = h['detik_terbaik'] / lama['detik_terbaik']
+        regresi = rasio > 1 + toleransi and h['detik_terbaik'] - lama['detik_terbaik'] > min_selisih
+        ada_regresi = ada_regresi or regresi
+        print(f"  {h['tahap']:<16} {h['baris']:>10,} baris | {lama['detik_terbaik']:8.3f} s -> "
+              f"{h['detik_terbaik']:8.3f} s ({rasio:5.2f}x) | memori {lama['memori_puncak_mb']:8.1f} -> "
+              f"{h['memori_puncak_mb']:8.1f} MB{'  <-- REGRESI' if regresi else ''}")
+    return ada_regresi
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end jalur scoring (waktu + memori puncak).")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    semua_tahap = ['preprocess', 'labeling', 'predict', 'alasan', 'kolektif_csv', 'kolektif_xlsx', 'kolektif_parquet']
+    parser.add_argument('--tahap', nargs='+', default=semua_tahap, choices=semua_tahap)
+    parser.add_argument('--ulang', type=int, default=3, help="Percobaan per tahap dan ukuran.")
+    parser.add_argument('--maks-baris-xlsx', type=int, default=MAKS_BARIS_XLSX,
+                        help="Ukuran di atas ini dilewati untuk kolektif_xlsx.")
+    parser.add_argument('--model', default=os.path.join(ROOT, 'pregnancy_risk_model.npz'))
+    parser.add_argument('--output', default='scoring_pipeline_bench.json', help="Path file JSON hasil.")
+    parser.add_argument('--bandingkan', default=None, help="JSON hasil sebelumnya untuk dibandingkan.")
+    parser.add_argument('--toleransi', type=float, default=0.10, help="Perlambatan maksimum sebelum dianggap regresi.")
+    parser.add_argument('--min-selisih', type=float, default=0.005, help="Selisih waktu minimum (detik) untuk regresi.")
+    args = parser.parse_args()
+
+    model = load_compiled_model(args.model)
+    scorer = ParallelScorer()
+    hasil = []
+    for n in args.ukuran:
+        df_raw = data_sintetis(n)
+        df_cleaned = preprocess_input_for_pipeline(df_raw)
+        tugas = {
+            'preprocess': lambda: preprocess_input_for_pipeline(df_raw),
+            'labeling': lambda: realistic_labeling(df_cleaned),
+            'predict': lambda: model.predict(df_cleaned),
+            'alasan': lambda: model.alasan_dari_daun(model.daun(df_cleaned)),
+        }
+        for format_file in ('csv', 'xlsx', 'parquet'):
+            tahap = f'kolektif_{format_file}'
+            if tahap not in args.tahap or (format_file == 'xlsx' and n > args.maks_baris_xlsx):
+                continue
+            isi_file = file_unggahan(df_raw, format_file)
+            tugas[tahap] = lambda isi=isi_file, fmt=format_file: alur_kolektif(isi, fmt, scorer, model, args.model)
+
+        for tahap in args.tahap:
+            if tahap not in tugas:
+                print(f"{tahap:<16} {n:>10,} baris | dilewati")
+                continue
+            terbaik, median, memori = ukur(tugas[tahap], args.ulang)
+            hasil.append({'tahap': tahap, 'baris': n, 'detik_terbaik': round(terbaik, 6),
+                          'detik_median': round(median, 6), 'baris_per_detik': round(n / terbaik),
+                          'memori_puncak_mb': round(memori, 2)})
+            print(f"{tahap:<16} {n:>10,} baris | {terbaik:8.3f} s (median {median:8.3f} s) | "
+                  f"{n / terbaik:>12,.0f} baris/s | memori puncak {memori:8.1f} MB")
+    scorer.shutdown()
+
+    with open(args.output, 'w') as f:
+        json.dump({'lingkungan': info_lingkungan(args.model), 'ulang': args.ulang, 'hasil': hasil}, f, indent=2)
+    print(f"Hasil disimpan ke {args.output}")
+
+    if args.bandingkan and bandingkan(hasil, args.bandingkan, args.toleransi, args.min_selisih):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+# ======================================================================
+# --- File: benchmarks/service_loadtest.py ---
+# ======================================================================
+# Uji beban untuk prediction_service.py. Membuka beberapa koneksi keep-alive
+# sekaligus, mengirim record dari pregnancy-dataset.csv ke /predict (atau
+# /predict/batch), lalu melaporkan latensi p50/p99 dan throughput.
+#
+# Cara pakai (dari root repo, layanan sudah berjalan):
+#   python prediction_service.py --port 8080 &
+#   python benchmarks/service_loadtest.py --url http://127.0.0.1:8080 --koneksi 32 --request 5000
+#   python benchmarks/service_loadtest.py --endpoint /predict/batch --ukuran-batch 100
+# ======================================================================
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def muat_record():
+    df = pd.read_csv(os.path.join(ROOT, 'pregnancy-dataset.csv'))
+    # NaN tidak valid di JSON standar
+    return [{k: v for k, v in r.items() if not (isinstance(v, float) and np.isnan(v))} for r in df.to_dict('records')]
+
+async def kirim(reader, writer, host, path, body):
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    panjang = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        if line.lower().startswith(b'content-length:'):
+            panjang = int(line.split(b':')[1])
+    await reader.readexactly(panjang)
+    return status
+
+async def klien(url, path, body_list, jatah, latensi, gagal):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        while jatah:
+            body = body_list[jatah.pop() % len(body_list)]
+            mulai = time.perf_counter()
+            status = await kirim(reader, writer, url.hostname, path, body)
+            latensi.append(time.perf_counter() - mulai)
+            if status != 200:
+                gagal.append(status)
+    finally:
+        writer.close()
+
+async def main_async(args):
+    url = urlparse(args.url)
+    records = muat_record()
+    if args.endpoint == '/predict':
+        body_list = [json.dumps(r).encode() for r in records]
+        record_per_request = 1
+    else:
+        body_list = [json.dumps(records[i:i + args.ukuran_batch]).encode()
+                     for i in range(0, len(records) - args.ukuran_batch + 1, args.ukuran_batch)]
+        record_per_request = args.ukuran_batch
+
+    jatah = list(range(args.request))
+    latensi, gagal = [], []
+    mulai = time.perf_counter()
+    await asyncio.gather(*(klien(url, args.endpoint, body_list, jatah, latensi, gagal) for _ in range(args.koneksi)))
+    durasi = time.perf_counter() - mulai
+
+    lat_ms = np.array(latensi) * 1000
+    print(f"endpoint        : {args.endpoint} ({record_per_request} record/request, {args.koneksi} koneksi)")
+    print(f"request         : {len(latensi)} selesai, {len(gagal)} gagal, {durasi:.2f} detik")
+    print(f"throughput      : {len(latensi) / durasi:,.0f} request/detik, {len(latensi) * record_per_request / durasi:,.0f} record/detik")
+    print(f"latensi p50/p99 : {np.percentile(lat_ms, 50):.2f} / {np.percentile(lat_ms, 99):.2f} ms (maks {lat_ms.max():.2f} ms)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban layanan prediksi.")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--endpoint', choices=['/predict', '/predict/batch'], default='/predict')
+    parser.add_argument('--koneksi', type=int, default=32, help="Jumlah koneksi paralel.")
+    parser.add_argument('--request', type=int, default=5000, help="Total request yang dikirim.")
+    parser.add_argument('--ukuran-batch', type=int, default=100, help="Record per request untuk /predict/batch.")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,100 @@
+# ======================================================================
+# --- File: benchmarks/startup_importtime.py ---
+# ======================================================================
+# Mengukur biaya import (gaya `python -X importtime`) per halaman aplikasi,
+# supaya regresi cold start ketahuan. Setiap pengukuran dijalankan di proses
+# Python baru agar cache modul tidak ikut terhitung.
+#
+# Cara pakai (dari root repo):
+#   python benchmarks/startup_importtime.py
+#   python benchmarks/startup_importtime.py --ulang 10 --output startup.json
+#   python benchmarks/startup_importtime.py --batas-ms login=800
+# ======================================================================
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def modul_app(path=os.path.join(ROOT, 'app.py')):
+    """Modul yang diimpor di tingkat atas app.py (import lazy di dalam fungsi tidak ikut)."""
+    modul = []
+    for node in ast.parse(open(path, encoding='utf-8').read()).body:
+        if isinstance(node, ast.Import):
+            modul.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modul.append(node.module)
+    return list(dict.fromkeys(modul))
+
+# Modul yang diimpor untuk setiap halaman, mengikuti router di app.py:
+# halaman login hanya butuh modul di bagian atas app.py (dibaca langsung dari
+# app.py agar tidak tertinggal), halaman lain menambah modul halamannya.
+MODUL_APP = modul_app()
+HALAMAN = {
+    'login': MODUL_APP,
+    'individu': MODUL_APP + ['page_individual'],
+    'kolektif': MODUL_APP + ['page_collective'],
+}
+
+def ukur_sekali(modul):
+    """Menjalankan import di proses baru, mengembalikan (total_us, {modul_top_level: cumulative_us})."""
+    kode = '; '.join(f'import {m}' for m in modul)
+    hasil = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', kode],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    per_modul = {}
+    for baris in hasil.stderr.splitlines():
+        if not baris.startswith('import time:') or 'self [us]' in baris:
+            continue
+        _, cumulative, nama = baris[len('import time:'):].split('|')
+        # Hanya baris top-level (tanpa indentasi) supaya tidak terhitung ganda
+        if not nama.startswith('  '):
+            per_modul[nama.strip()] = int(cumulative)
+    return sum(per_modul.values()), per_modul
+
+def ukur_halaman(modul, ulang):
+    """Median total import dari beberapa percobaan, plus modul terberat pada percobaan median."""
+    percobaan = sorted((ukur_sekali(modul) for _ in range(ulang)), key=lambda x: x[0])
+    total, per_modul = percobaan[len(percobaan) // 2]
+    terberat = sorted(per_modul.items(), key=lambda x: x[1], reverse=True)[:5]
+    return {
+        'median_ms': round(total / 1000, 1),
+        'min_ms': round(percobaan[0][0] / 1000, 1),
+        'max_ms': round(percobaan[-1][0] / 1000, 1),
+        'stdev_ms': round(statistics.pstdev(p[0] for p in percobaan) / 1000, 1),
+        'terberat_ms': {nama: round(us / 1000, 1) for nama, us in terberat},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu import per halaman aplikasi.")
+    parser.add_argument('--ulang', type=int, default=5, help="Jumlah percobaan per halaman (diambil median).")
+    parser.add_argument('--output', default=None, help="Simpan hasil sebagai JSON ke path ini.")
+    parser.add_argument('--batas-ms', action='append', default=[], metavar='HALAMAN=MS',
+                        help="Gagal (exit 1) jika median halaman melebihi batas, mis. login=800.")
+    args = parser.parse_args()
+
+    hasil = {halaman: ukur_halaman(modul, args.ulang) for halaman, modul in HALAMAN.items()}
+    for halaman, data in hasil.items():
+        terberat = ', '.join(f'{nama} {ms}ms' for nama, ms in data['terberat_ms'].items())
+        print(f"{halaman:<10} median {data['median_ms']:>8.1f} ms  (min {data['min_ms']}, max {data['max_ms']})  | {terberat}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'ulang': args.ulang, 'halaman': hasil}, f, indent=2)
+        print(f"Hasil disimpan ke {args.output}")
+
+    gagal = False
+    for batas in args.batas_ms:
+        halaman, ms = batas.split('=')
+        if hasil[halaman]['median_ms'] > float(ms):
+            print(f"REGRESI: halaman '{halaman}' {hasil[halaman]['median_ms']} ms > batas {ms} ms")
+            gagal = True
+    sys.exit(1 if gagal else 0)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,248 @@
+# ======================================================================
+# --- File: compiled_model.py ---
+# ======================================================================
+# Versi "ringan" dari pipeline hasil train_model.py.
+# OneHotEncoder dan DecisionTreeClassifier yang sudah di-fit diratakan menjadi
+# array NumPy dan disimpan ke file .npz. Untuk prediksi cukup NumPy + pandas,
+# tanpa perlu meng-import sklearn/imblearn atau unpickle langkah SMOTE
+# (SMOTE memang tidak melakukan apa-apa saat predict).
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSI = 1
+# Nilai children_left untuk node daun (sama dengan sklearn.tree._tree.TREE_LEAF)
+TREE_LEAF = -1
+
+def export_compiled_model(pipeline, path):
+    """
+    Meratakan pipeline (preprocessor -> resampling -> classifier) yang sudah di-fit
+    ke file .npz. Hanya struktur yang dipakai train_model.py yang didukung:
+    kolom 'passthrough' dan OneHotEncoder di dalam ColumnTransformer, lalu
+    DecisionTreeClassifier.
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    classifier = pipeline.named_steps['classifier']
+
+    fitur_numerik, onehot_kolom, onehot_nilai = [], [], []
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if hasattr(transformer, 'categories_'):
+            for j, (col, categories) in enumerate(zip(columns, transformer.categories_)):
+                drop_idx = None if transformer.drop_idx_ is None else transformer.drop_idx_[j]
+                for i, category in enumerate(categories):
+                    if not isinstance(category, str):
+                        raise ValueError(f"Kategori non-string pada kolom '{col}' tidak didukung: {category!r}")
+                    if i != drop_idx:
+                        onehot_kolom.append(col)
+                        onehot_nilai.append(category)
+        elif transformer == 'passthrough' or getattr(transformer, 'func', 'bukan passthrough') is None:
+            # Setelah fit, 'passthrough' disimpan sklearn sebagai FunctionTransformer tanpa func
+            if onehot_kolom:
+                # Kolom numerik harus berada di depan agar urutan fitur sama dengan ColumnTransformer
+                raise ValueError("Kolom numerik setelah kolom one-hot tidak didukung.")
+            fitur_numerik.extend(columns)
+        else:
+            raise ValueError(f"Transformer '{name}' ({type(transformer).__name__}) tidak didukung.")
+
+    tree = classifier.tree_
+    n_nodes = tree.node_count
+    value = tree.value.reshape(n_nodes, -1)
+    missing_go_to_left = getattr(tree, 'missing_go_to_left', np.zeros(n_nodes, dtype=np.uint8))
+
+    np.savez(
+        path,
+        format_versi=np.array(FORMAT_VERSI),
+        fitur_numerik=np.array(fitur_numerik, dtype=str),
+        onehot_kolom=np.array(onehot_kolom, dtype=str),
+        onehot_nilai=np.array(onehot_nilai, dtype=str),
+        feature_names=np.array(preprocessor.get_feature_names_out(), dtype=str),
+        feature_importances=classifier.feature_importances_,
+        classes=np.array(classifier.classes_, dtype=str),
+        feature=tree.feature.astype(np.int64),
+        threshold=tree.threshold.astype(np.float64),
+        children_left=tree.children_left.astype(np.int64),
+        children_right=tree.children_right.astype(np.int64),
+        missing_go_to_left=np.asarray(missing_go_to_left, dtype=bool),
+        value=value.astype(np.float64),
+        max_depth=np.array(tree.max_depth),
+    )
+
+class CompiledModel:
+    """Prediktor murni NumPy yang membaca artefak dari export_compiled_model."""
+
+    def __init__(self, arrays):
+        if int(arrays['format_versi']) != FORMAT_VERSI:
+            raise ValueError(f"Format artefak tidak dikenal: {int(arrays['format_versi'])}")
+        self.fitur_numerik = arrays['fitur_numerik'].tolist()
+        self.onehot_kolom = arrays['onehot_kolom'].tolist()
+        self.onehot_nilai = arrays['onehot_nilai'].tolist()
+        self.feature_names = arrays['feature_names'].tolist()
+        self.feature_importances_ = arrays['feature_importances']
+        self.classes_ = arrays['classes'].astype(object)
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.missing_go_to_left = arrays['missing_go_to_left']
+        self.value = arrays['value']
+        self.max_depth = int(arrays['max_depth'])
+
+        # Struktur untuk predict_record (satu record): list Python lebih cepat dari
+        # indexing array NumPy per elemen untuk tree sekecil ini
+        self._onehot_indeks = {(col, nilai): len(self.fitur_numerik) + k
+                               for k, (col, nilai) in enumerate(zip(self.onehot_kolom, self.onehot_nilai))}
+        self._vektor_kosong = [0.0] * len(self.feature_names)
+        self._node_feature = self.feature.tolist()
+        self._node_threshold = self.threshold.tolist()
+        self._node_left = self.children_left.tolist()
+        self._node_right = self.children_right.tolist()
+        self._node_missing_left = self.missing_go_to_left.tolist()
+        self._kelas_node = self.classes_[np.argmax(self.value, axis=1)]
+        self._node_kelas = self._kelas_node.tolist()
+
+        # Kelompokkan kolom one-hot per kolom sumber: {kolom: (kategori, offset kolom output)}
+        n_num = len(self.fitur_numerik)
+        self._onehot_per_kolom = {}
+        for k, (col, nilai) in enumerate(zip(self.onehot_kolom, self.onehot_nilai)):
+            kategori, offset = self._onehot_per_kolom.setdefault(col, ([], []))
+            kategori.append(nilai)
+            offset.append(n_num + k)
+
+        # Teks alasan per node daun; setiap baris cukup mengambil teks daunnya
+        self._alasan_node = self._susun_alasan()
+
+    def _syarat(self, fitur, ke_kiri, threshold):
+        """Satu cabang tree sebagai (kolom, jenis, nilai) pada kolom sumber."""
+        n_num = len(self.fitur_numerik)
+        if fitur < n_num:
+            return self.fitur_numerik[fitur], ('<=' if ke_kiri else '>'), threshold
+        k = fitur - n_num
+        # Kolom one-hot bernilai 0/1, jadi cabang kiri (<= 0.5) berarti "bukan kategori ini"
+        return self.onehot_kolom[k], ('bukan' if ke_kiri else '='), self.onehot_nilai[k]
+
+    @staticmethod
+    def _format_jalur(jalur):
+        """Menggabungkan syarat sepanjang jalur per kolom menjadi teks ringkas."""
+        per_kolom = {}
+        for kolom, jenis, nilai in jalur:
+            syarat = per_kolom.setdefault(kolom, {'>': None, '<=': None, '=': None, 'bukan': []})
+            if jenis == '>':
+                syarat['>'] = nilai if syarat['>'] is None else max(syarat['>'], nilai)
+            elif jenis == '<=':
+                syarat['<='] = nilai if syarat['<='] is None else min(syarat['<='], nilai)
+            elif jenis == '=':
+                syarat['='] = nilai
+            else:
+                syarat['bukan'].append(nilai)
+
+        bagian = []
+        for kolom, syarat in per_kolom.items():
+            if syarat['='] is not None:
+                bagian.append(f"{kolom} = {syarat['=']}")
+            elif syarat['bukan']:
+                bagian.append(f"{kolom} bukan {'/'.join(syarat['bukan'])}")
+            elif syarat['>'] is not None and syarat['<='] is not None:
+                bagian.append(f"{syarat['>']:g} < {kolom} <= {syarat['<=']:g}")
+            elif syarat['<='] is not None:
+                bagian.append(f"{kolom} <= {syarat['<=']:g}")
+            else:
+                bagian.append(f"{kolom} > {syarat['>']:g}")
+        return '; '.join(bagian)
+
+    def _susun_alasan(self):
+        """
+        Teks alasan untuk setiap daun dari syarat-syarat di jalur root -> daun.
+        Jumlah daun paling banyak 2^max_depth, jadi ini murah dan cukup sekali per model.
+        """
+        alasan = np.full(len(self.feature), '', dtype=object)
+        tumpukan = [(0, [])]
+        while tumpukan:
+            node, jalur = tumpukan.pop()
+            if self.children_left[node] == TREE_LEAF:
+                alasan[node] = self._format_jalur(jalur)
+                continue
+            fitur, threshold = int(self.feature[node]), float(self.threshold[node])
+            tumpukan.append((int(self.children_left[node]), jalur + [self._syarat(fitur, True, threshold)]))
+            tumpukan.append((int(self.children_right[node]), jalur + [self._syarat(fitur, False, threshold)]))
+        return alasan
+
+    def transform(self, df):
+        """Membuat matriks fitur float32 (urutan kolom sama dengan ColumnTransformer)."""
+        n = len(df)
+        X = np.zeros((n, len(self.feature_names)), dtype=np.float32)
+        if self.fitur_numerik:
+            X[:, :len(self.fitur_numerik)] = df[self.fitur_numerik].to_numpy(dtype=np.float64)
+        baris = np.arange(n)
+        for col, (kategori, offset) in self._onehot_per_kolom.items():
+            # Kategori yang tidak dikenal / di-drop mendapat kode -1 -> semua kolomnya 0
+            kode = pd.Categorical(df[col], categories=kategori).codes
+            dikenal = kode >= 0
+            X[baris[dikenal], np.asarray(offset)[kode[dikenal]]] = 1.0
+        return X
+
+    def apply(self, X):
+        """Menelusuri tree untuk seluruh batch sekaligus, mengembalikan indeks node daun per baris."""
+        node = np.zeros(X.shape[0], dtype=np.int64)
+        baris = np.arange(X.shape[0])
+        for _ in range(self.max_depth):
+            daun = self.children_left[node] == TREE_LEAF
+            if daun.all():
+                break
+            # float32 dibandingkan dengan threshold float64, sama seperti sklearn
+            nilai = X[baris, self.feature[node]].astype(np.float64)
+            ke_kiri = np.where(np.isnan(nilai), self.missing_go_to_left[node], nilai <= self.threshold[node])
+            node = np.where(daun, node, np.where(ke_kiri, self.children_left[node], self.children_right[node]))
+        return node
+
+    def daun(self, df):
+        """Indeks node daun setiap baris df (sudah melalui preprocess_input_for_pipeline)."""
+        return self.apply(self.transform(df))
+
+    def kelas_dari_daun(self, daun):
+        return self._kelas_node[daun]
+
+    def alasan_dari_daun(self, daun):
+        """
+        Alasan prediksi per baris: syarat-syarat di jalur keputusan menuju daunnya,
+        mis. "kategori_tekanan_darah = Hipertensi Stage 2; umur_ibu > 35.5".
+        Setara dengan decision_path sklearn untuk seluruh batch, tetapi karena
+        setiap daun punya tepat satu jalur, teksnya cukup diambil per daun.
+        """
+        return self._alasan_node[daun]
+
+    def predict_proba(self, df):
+        proba = self.value[self.daun(df)]
+        return proba / proba.sum(axis=1, keepdims=True)
+
+    def predict(self, df):
+        return self.kelas_dari_daun(self.daun(df))
+
+    def predict_record(self, record):
+        """
+        Prediksi satu record (dict yang sudah dibersihkan) tanpa pandas:
+        vektor fitur dibuat dari salinan vektor nol lalu tree ditelusuri node per node.
+        """
+        x = self._vektor_kosong.copy()
+        for i, col in enumerate(self.fitur_numerik):
+            # Dibulatkan ke float32 seperti input tree sklearn
+            x[i] = float(np.float32(record[col]))
+        for col in self._onehot_per_kolom:
+            k = self._onehot_indeks.get((col, record[col]))
+            if k is not None:
+                x[k] = 1.0
+
+        node = 0
+        while self._node_left[node] != TREE_LEAF:
+            nilai = x[self._node_feature[node]]
+            if nilai != nilai: # NaN
+                ke_kiri = self._node_missing_left[node]
+            else:
+                ke_kiri = nilai <= self._node_threshold[node]
+            node = self._node_left[node] if ke_kiri else self._node_right[node]
+        return self._node_kelas[node]
+
+def load_compiled_model(path):
+    """Memuat artefak .npz menjadi CompiledModel."""
+    with np.load(path, allow_pickle=False) as arrays:
+        return CompiledModel({key: arrays[key] for key in arrays.files})
\ No newline at end of file
@@ -0,0 +1,281 @@
+# ======================================================================
+# --- File: eksperimen.py ---
+# ======================================================================
+# Runner eksperimen model (pengganti perbandingan DecisionTree vs
+# RandomForest di notebook model/*.ipynb). Daftar model, resampling, dan
+# grid parameter ditulis di file config JSON (lihat eksperimen.json).
+#
+# Dataset dibersihkan (utils.preprocess_input_for_pipeline) dan diberi label
+# (train_model.realistic_labeling) satu kali, lalu disimpan di --cache-dir.
+# Cache dipakai lagi selama file data dan kode preprocessing/labeling tidak
+# berubah. Encoding (preprocessor dari train_model.build_full_pipeline) tidak
+# ikut di-cache: preprocessor adalah langkah pertama pipeline setiap tugas,
+# sehingga hanya di-fit pada data latih (per fold CV dan split uji), sama
+# seperti pipeline di train_model. Setiap kombinasi (eksperimen, parameter)
+# adalah satu tugas di process pool; worker memuat dataset sekali per proses.
+#
+# Setiap tugas menghitung F1-macro CV (StratifiedKFold pada data latih) dan
+# F1-macro/akurasi pada data uji, beserta rata-rata waktu fit (preprocessor +
+# resampling + model) dan predict.
+# Leaderboard (urut F1 CV) ditulis ke <output>.json dan <output>.parquet.
+#
+# Cara pakai (dari root repo):
+#   python eksperimen.py
+#   python eksperimen.py --config eksperimen.json --workers 4 --output hasil_eksperimen
+#   python eksperimen.py --hanya dt_smote rf_class_weight
+# ======================================================================
+import argparse
+import datetime
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import sklearn
+from imblearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from utils import preprocess_input_for_pipeline
+from train_model import (realistic_labeling, build_full_pipeline, numeric_features, categorical_features,
+                         KOLOM_SNAPSHOT)
+from resampling import buat_resampler, class_weight_untuk
+from model_manifest import hash_file
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DEFAULT = 'eksperimen.json'
+DIREKTORI_CACHE = '.cache_eksperimen'
+MODEL = {
+    'decision_tree': DecisionTreeClassifier,
+    'random_forest': RandomForestClassifier,
+}
+# Kode yang menentukan isi dataset hasil labeling; perubahan di file ini membatalkan cache
+FILE_KODE_DATASET = ['utils.py', 'train_model.py']
+# Naikkan jika isi folder cache berubah bentuk (2: fitur mentah, bukan hasil encode)
+VERSI_CACHE = 2
+
+# --- Dataset ---
+
+def kunci_dataset(config_data):
+    """Hash sumber data + kode preprocessing/labeling, dipakai sebagai nama folder cache."""
+    sha = hashlib.sha256(f"versi:{VERSI_CACHE}".encode())
+    if config_data.get('sumber', 'csv') == 'snapshot':
+        from ekstraksi_data import baca_watermark
+        watermark = baca_watermark(config_data['direktori'])
+        sha.update(f"snapshot:{watermark['id_terakhir']}:{watermark['jumlah_baris']}".encode())
+    else:
+        sha.update(hash_file(config_data['path']).encode())
+    for nama in FILE_KODE_DATASET:
+        sha.update(hash_file(os.path.join(ROOT, nama)).encode())
+    return sha.hexdigest()[:16]
+
+def muat_data_mentah(config_data):
+    if config_data.get('sumber', 'csv') == 'snapshot':
+        from ekstraksi_data import muat_snapshot
+        return muat_snapshot(config_data['direktori'], kolom=KOLOM_SNAPSHOT)
+    return pd.read_csv(config_data['path'])
+
+def siapkan_dataset(config_data, direktori_cache=DIREKTORI_CACHE):
+    """
+    Membersihkan dan memberi label dataset sekali, lalu menyimpan kolom input
+    preprocessor (belum di-encode) sebagai X.pkl dan label sebagai y.npy di folder cache.
+    Mengembalikan path folder tersebut.
+    """
+    folder = os.path.join(direktori_cache, kunci_dataset(config_data))
+    if os.path.exists(os.path.join(folder, 'info.json')):
+        print(f"Dataset diambil dari cache {folder}")
+        return folder
+
+    mulai = time.perf_counter()
+    df_with_target = realistic_labeling(preprocess_input_for_pipeline(muat_data_mentah(config_data)), parity=True)
+    y = df_with_target['label_risiko'].to_numpy(dtype=str)
+    X = df_with_target[numeric_features + categorical_features].reset_index(drop=True)
+
+    # Ditulis ke folder sementara lalu di-rename agar cache tidak pernah setengah jadi
+    sementara = f'{folder}.{os.getpid()}.tmp'
+    os.makedirs(sementara, exist_ok=True)
+    X.to_pickle(os.path.join(sementara, 'X.pkl'))
+    np.save(os.path.join(sementara, 'y.npy'), y)
+    with open(os.path.join(sementara, 'info.json'), 'w', encoding='utf-8') as f:
+        json.dump({'kolom_fitur': X.columns.tolist(), 'jumlah_baris': len(y),
+                   'distribusi_label': pd.Series(y).value_counts().to_dict()}, f, indent=2)
+    os.replace(sementara, folder)
+    print(f"Dataset {X.shape[0]:,} baris x {X.shape[1]} kolom disiapkan dalam "
+          f"{time.perf_counter() - mulai:.2f} detik -> {folder}")
+    return folder
+
+# --- Tugas (berjalan di worker) ---
+
+_DATA_WORKER = {}
+
+def _data_worker(folder, test_size, random_state):
+    """(X, y, indeks latih, indeks uji) per proses worker; X berupa DataFrame fitur mentah."""
+    kunci = (folder, test_size, random_state)
+    if kunci not in _DATA_WORKER:
+        X = pd.read_pickle(os.path.join(folder, 'X.pkl'))
+        y = np.load(os.path.join(folder, 'y.npy'))
+        latih, uji = train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state, stratify=y)
+        _DATA_WORKER.clear()
+        _DATA_WORKER[kunci] = (X, y, latih, uji)
+    return _DATA_WORKER[kunci]
+
+def buat_pipeline(model, resampling, params):
+    """
+    Pipeline preprocessor -> resampling -> classifier. Preprocessor baru dari
+    build_full_pipeline untuk setiap pipeline, jadi hanya di-fit pada data latih.
+    """
+    params = dict(params)
+    if class_weight_untuk(resampling) is not None:
+        params.setdefault('class_weight', class_weight_untuk(resampling))
+    langkah = [('preprocessor', build_full_pipeline().named_steps['preprocessor'])]
+    resampler = buat_resampler(resampling)
+    if resampler is not None:
+        langkah.append(('resampling', resampler))
+    langkah.append(('classifier', MODEL[model](**params)))
+    return Pipeline(langkah)
+
+def _fit_predict(model, resampling, params, X, y, latih, uji):
+    pipeline = buat_pipeline(model, resampling, params)
+    mulai = time.perf_counter()
+    pipeline.fit(X.iloc[latih], y[latih])
+    detik_fit = time.perf_counter() - mulai
+    mulai = time.perf_counter()
+    prediksi = pipeline.predict(X.iloc[uji])
+    return prediksi, detik_fit, time.perf_counter() - mulai
+
+def jalankan_tugas(tugas):
+    """Satu kombinasi parameter: F1-macro CV pada data latih, lalu evaluasi pada data uji."""
+    X, y, latih, uji = _data_worker(tugas['folder'], tugas['test_size'], tugas['random_state'])
+    cv = StratifiedKFold(n_splits=tugas['n_split'], shuffle=True, random_state=tugas['random_state'])
+    skor, waktu_fit, waktu_predict = [], [], []
+    for fold_latih, fold_validasi in cv.split(latih, y[latih]):
+        prediksi, detik_fit, detik_predict = _fit_predict(tugas['model'], tugas['resampling'], tugas['params'],
+                                                          X, y, latih[fold_latih], latih[fold_validasi])
+        skor.append(f1_score(y[latih[fold_validasi]], prediksi, average='macro'))
+        waktu_fit.append(detik_fit)
+        waktu_predict.append(detik_predict)
+    prediksi, _, _ = _fit_predict(tugas['model'], tugas['resampling'], tugas['params'], X, y, latih, uji)
+    return {
+        'eksperimen': tugas['eksperimen'],
+        'model': tugas['model'],
+        'resampling': tugas['resampling'],
+        'params': tugas['params'],
+        'f1_cv': round(float(np.mean(skor)), 6),
+        'f1_cv_std': round(float(np.std(skor)), 6),
+        'f1_uji': round(float(f1_score(y[uji], prediksi, average='macro')), 6),
+        'akurasi_uji': round(float(accuracy_score(y[uji], prediksi)), 6),
+        'detik_fit': round(float(np.mean(waktu_fit)), 4),
+        'detik_predict': round(float(np.mean(waktu_predict)), 4),
+        'baris_latih': int(len(latih)),
+    }
+
+# --- Config dan leaderboard ---
+
+def daftar_tugas(config, folder, hanya=None):
+    """Satu tugas per kombinasi grid setiap eksperimen (product dari semua nilai grid)."""
+    cv = config.get('cv', {})
+    tugas = []
+    for eksperimen in config['eksperimen']:
+        if hanya and eksperimen['nama'] not in hanya:
+            continue
+        if eksperimen['model'] not in MODEL:
+            raise ValueError(f"Model '{eksperimen['model']}' tidak dikenal (pilihan: {', '.join(MODEL)}).")
+        grid = eksperimen.get('grid', {})
+        for nilai in itertools.product(*grid.values()):
+            tugas.append({
+                'eksperimen': eksperimen['nama'],
+                'model': eksperimen['model'],
+                'resampling': eksperimen.get('resampling', 'smote'),
+                'params': {**eksperimen.get('params', {}), **dict(zip(grid, nilai))},
+                'folder': folder,
+                'n_split': cv.get('n_split', 3),
+                'random_state': cv.get('random_state', 42),
+                'test_size': config.get('test_size', 0.2),
+            })
+    return tugas
+
+def info_lingkungan():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'waktu': datetime.datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'sklearn': sklearn.__version__,
+        'cpu': os.cpu_count(),
+    }
+
+def tulis_leaderboard(hasil, config, folder, output):
+    urut = sorted(hasil, key=lambda h: (-h['f1_cv'], h['detik_fit']))
+    leaderboard = [dict(peringkat=peringkat, **h) for peringkat, h in enumerate(urut, start=1)]
+    with open(os.path.join(folder, 'info.json'), encoding='utf-8') as f:
+        info_dataset = json.load(f)
+
+    with open(f'{output}.json', 'w', encoding='utf-8') as f:
+        json.dump({'lingkungan': info_lingkungan(), 'dataset': dict(info_dataset, cache=folder),
+                   'config': config, 'leaderboard': leaderboard}, f, indent=2, ensure_ascii=False)
+    print(f"Leaderboard disimpan ke {output}.json")
+    try:
+        df = pd.DataFrame(leaderboard)
+        # params berbeda bentuk per model; disimpan sebagai teks JSON agar kolomnya seragam
+        df['params'] = df['params'].map(lambda p: json.dumps(p, sort_keys=True))
+        df.to_parquet(f'{output}.parquet', index=False)
+        print(f"Leaderboard disimpan ke {output}.parquet")
+    except ImportError:
+        print("pyarrow tidak terpasang; leaderboard Parquet dilewati.")
+    return leaderboard
+
+def cetak_leaderboard(leaderboard, teratas=10):
+    print(f"\n{'#':>3} {'eksperimen':<20} {'F1 CV':>8} {'std':>7} {'F1 uji':>8} {'fit':>8} {'predict':>8}  params")
+    for h in leaderboard[:teratas]:
+        print(f"{h['peringkat']:>3} {h['eksperimen']:<20} {h['f1_cv']:>8.4f} {h['f1_cv_std']:>7.4f} {h['f1_uji']:>8.4f} "
+              f"{h['detik_fit']:>7.3f}s {h['detik_predict']:>7.4f}s  {h['params']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Runner eksperimen model dengan leaderboard JSON/Parquet.")
+    parser.add_argument('--config', default=CONFIG_DEFAULT)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Jumlah proses. RandomForest dengan params n_jobs > 1 memakai core tambahan per proses.")
+    parser.add_argument('--cache-dir', default=DIREKTORI_CACHE)
+    parser.add_argument('--output', default='hasil_eksperimen', help="Prefix file leaderboard (.json dan .parquet).")
+    parser.add_argument('--hanya', nargs='+', default=None, help="Hanya jalankan eksperimen dengan nama ini.")
+    args = parser.parse_args()
+
+    with open(args.config, encoding='utf-8') as f:
+        config = json.load(f)
+    folder = siapkan_dataset(config['data'], args.cache_dir)
+    tugas = daftar_tugas(config, folder, args.hanya)
+    print(f"{len(tugas)} kombinasi parameter dari {len({t['eksperimen'] for t in tugas})} eksperimen, "
+          f"{args.workers} worker.")
+
+    mulai = time.perf_counter()
+    hasil = []
+    if args.workers <= 1:
+        for t in tugas:
+            hasil.append(jalankan_tugas(t))
+    else:
+        # 'spawn' seperti parallel_scoring: worker mulai bersih dan memuat dataset dari cache
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(jalankan_tugas, t) for t in tugas]
+            for i, future in enumerate(as_completed(futures), start=1):
+                hasil.append(future.result())
+                if i % 10 == 0 or i == len(futures):
+                    print(f"  ... {i}/{len(futures)} selesai ({time.perf_counter() - mulai:.1f} detik)")
+    print(f"Semua eksperimen selesai dalam {time.perf_counter() - mulai:.1f} detik.")
+
+    cetak_leaderboard(tulis_leaderboard(hasil, config, folder, args.output))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
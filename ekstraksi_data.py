@@ -0,0 +1,210 @@
+# ======================================================================
+# --- File: ekstraksi_data.py ---
+# ======================================================================
+# Ekstraksi inkremental data_pasien ke snapshot Parquet untuk training.
+# Setiap run hanya mengambil baris dengan id di atas watermark run
+# sebelumnya, membacanya lewat cursor unbuffered (baris dialirkan dari
+# server per fetchmany, bukan seluruh hasil query sekaligus), lalu menulis
+# tiap potongan sebagai file Parquet baru yang dipartisi per bulan created_at:
+#
+#   snapshot/data_pasien/bulan=2025-01/bagian-000000000001-000000100000.parquet
+#   snapshot/data_pasien/bulan=2025-02/...
+#   snapshot/data_pasien/_watermark.json     -> id terakhir, jumlah baris, skema
+#
+# Watermark memakai id (AUTO_INCREMENT), bukan created_at, karena created_at
+# hanya berpresisi detik dan tidak unik, sehingga tidak bisa menjadi batas
+# yang pasti antar run.
+# Watermark diperbarui setelah file potongan selesai ditulis; file yang
+# tertulis tanpa watermark (proses mati di tengah) dihapus di run berikutnya
+# dan diekstrak ulang. Baris yang transaksinya belum commit saat ekstraksi
+# berjalan tetapi id-nya di bawah batas run tidak ikut terambil.
+#
+# Hanya kolom yang dipakai training yang diekstrak (tanpa nama_pasien dan
+# created_by). train_model.py --data snapshot membaca snapshot ini lewat
+# muat_snapshot() dengan memory map, hanya kolom yang diminta.
+#
+# Cara pakai (dari root repo, koneksi dari [mysql] di .streamlit/secrets.toml):
+#   python ekstraksi_data.py
+#   python ekstraksi_data.py --ulang      # hapus snapshot lalu ekstrak dari awal
+# ======================================================================
+import argparse
+import datetime
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from mysql.connector import FieldType
+
+from migrate import koneksi_dari_secrets
+
+DIREKTORI_SNAPSHOT = os.path.join('snapshot', 'data_pasien')
+NAMA_WATERMARK = '_watermark.json'
+BARIS_PER_BAGIAN = 100_000
+KOLOM_EKSTRAKSI = [
+    'id', 'created_at', 'umur_ibu', 'gravida', 'umur_kehamilan', 'tinggi_badan',
+    'tekanan_sistolik', 'tekanan_diastolik', 'penyakit_anemia', 'posisi_janin',
+    'hasil_tes_VDRL', 'hasil_tes_HbsAg', 'hasil_prediksi', 'versi_model',
+]
+
+# Kolom ukuran yang di data_pasien selalu angka (cm, mmHg). Dipastikan numerik
+# saat snapshot dimuat: preprocess hanya membaca format feet.inches dari teks.
+KOLOM_UKURAN = ['tinggi_badan', 'tekanan_sistolik', 'tekanan_diastolik']
+
+_TIPE_INTEGER = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24, FieldType.YEAR}
+_TIPE_DESIMAL = {FieldType.DECIMAL, FieldType.NEWDECIMAL, FieldType.FLOAT, FieldType.DOUBLE}
+_TIPE_WAKTU = {FieldType.DATETIME, FieldType.TIMESTAMP}
+
+def _tipe_arrow(kode_tipe):
+    """Tipe kolom Arrow dari kode tipe MySQL di cursor.description."""
+    if kode_tipe in _TIPE_INTEGER:
+        return pa.int64()
+    if kode_tipe in _TIPE_DESIMAL:
+        return pa.float64()
+    if kode_tipe in _TIPE_WAKTU:
+        return pa.timestamp('s')
+    if kode_tipe == FieldType.DATE:
+        return pa.date32()
+    return pa.string()
+
+def skema_dari_cursor(description):
+    return pa.schema([(kolom[0], _tipe_arrow(kolom[1])) for kolom in description])
+
+def baca_watermark(direktori=DIREKTORI_SNAPSHOT):
+    """Isi _watermark.json, atau watermark kosong jika snapshot belum ada."""
+    path = os.path.join(direktori, NAMA_WATERMARK)
+    if not os.path.exists(path):
+        return {'id_terakhir': 0, 'jumlah_baris': 0, 'skema': None}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _tulis_atomik(path, tulis):
+    sementara = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.{os.getpid()}.tmp')
+    tulis(sementara)
+    os.replace(sementara, path)
+
+def simpan_watermark(watermark, direktori=DIREKTORI_SNAPSHOT):
+    def tulis(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(watermark, f, indent=2)
+    _tulis_atomik(os.path.join(direktori, NAMA_WATERMARK), tulis)
+
+def _id_dari_nama(nama):
+    """(id_awal, id_akhir) dari nama file bagian-<awal>-<akhir>.parquet."""
+    _, awal, akhir = nama[:-len('.parquet')].split('-')
+    return int(awal), int(akhir)
+
+def bersihkan_sisa(direktori, id_terakhir):
+    """Menghapus file bagian di atas watermark dan file sementara dari run yang terputus."""
+    for folder, _, daftar in os.walk(direktori):
+        for nama in daftar:
+            sisa_sementara = nama.startswith('.') and nama.endswith('.tmp')
+            di_atas_watermark = nama.startswith('bagian-') and _id_dari_nama(nama)[0] > id_terakhir
+            if sisa_sementara or di_atas_watermark:
+                os.remove(os.path.join(folder, nama))
+
+def _partisi(created_at):
+    return f"bulan={created_at:%Y-%m}" if created_at is not None else 'bulan=tanpa-tanggal'
+
+def tulis_bagian(baris, skema, direktori):
+    """Menulis satu potongan hasil fetchmany sebagai file Parquet per partisi bulan."""
+    i_waktu = skema.get_field_index('created_at')
+    per_partisi = {}
+    for b in baris:
+        per_partisi.setdefault(_partisi(b[i_waktu]), []).append(b)
+
+    for partisi, isi in per_partisi.items():
+        kolom = list(zip(*isi))
+        arrays = []
+        for nilai, field in zip(kolom, skema):
+            if pa.types.is_floating(field.type):
+                # DECIMAL dikembalikan sebagai decimal.Decimal
+                nilai = [None if v is None else float(v) for v in nilai]
+            arrays.append(pa.array(nilai, type=field.type))
+        tabel = pa.Table.from_arrays(arrays, schema=skema)
+        folder = os.path.join(direktori, partisi)
+        os.makedirs(folder, exist_ok=True)
+        nama = f"bagian-{isi[0][0]:012d}-{isi[-1][0]:012d}.parquet"
+        _tulis_atomik(os.path.join(folder, nama), lambda path: pq.write_table(tabel, path))
+
+def ekstrak_inkremental(conn, direktori=DIREKTORI_SNAPSHOT, baris_per_bagian=BARIS_PER_BAGIAN):
+    """
+    Mengambil baris data_pasien dengan id > watermark dan menambahkannya ke
+    snapshot. Mengembalikan watermark baru. Memori yang dipakai sebanding
+    dengan baris_per_bagian, bukan dengan ukuran tabel.
+    """
+    os.makedirs(direktori, exist_ok=True)
+    watermark = baca_watermark(direktori)
+    bersihkan_sisa(direktori, watermark['id_terakhir'])
+
+    query = f"SELECT {', '.join(KOLOM_EKSTRAKSI)} FROM data_pasien"
+    cursor = conn.cursor(buffered=True)
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM data_pasien")
+    id_sampai = cursor.fetchone()[0]
+    cursor.execute(query + " LIMIT 0")
+    skema = skema_dari_cursor(cursor.description)
+    cursor.close()
+    deskripsi_skema = [[field.name, str(field.type)] for field in skema]
+    if watermark['skema'] is not None and watermark['skema'] != deskripsi_skema:
+        raise ValueError("Skema data_pasien berubah sejak ekstraksi terakhir; jalankan ulang dengan --ulang.")
+    if id_sampai <= watermark['id_terakhir']:
+        print(f"Snapshot sudah terbaru (id {watermark['id_terakhir']:,}, {watermark['jumlah_baris']:,} baris).")
+        return watermark
+    print(f"Mengekstrak data_pasien id {watermark['id_terakhir'] + 1:,} sampai {id_sampai:,}...")
+
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(query + " WHERE id > %s AND id <= %s ORDER BY id", (watermark['id_terakhir'], id_sampai))
+        while True:
+            baris = cursor.fetchmany(baris_per_bagian)
+            if not baris:
+                break
+            tulis_bagian(baris, skema, direktori)
+            watermark = {
+                'id_terakhir': int(baris[-1][0]),
+                'jumlah_baris': watermark['jumlah_baris'] + len(baris),
+                'skema': deskripsi_skema,
+                'diperbarui_pada': datetime.datetime.now().isoformat(timespec='seconds'),
+            }
+            simpan_watermark(watermark, direktori)
+            print(f"  ... sampai id {watermark['id_terakhir']:,}")
+    finally:
+        cursor.close()
+    return watermark
+
+def muat_snapshot(direktori=DIREKTORI_SNAPSHOT, kolom=None):
+    """
+    Membaca seluruh snapshot sebagai DataFrame. File dibaca lewat memory map
+    dan hanya `kolom` yang diminta yang didekode; buffer Arrow dilepas selama
+    konversi (self_destruct) sehingga data tidak tersimpan dua kali di memori.
+    Kolom KOLOM_UKURAN dijadikan float jika tersimpan sebagai teks.
+    """
+    if baca_watermark(direktori)['jumlah_baris'] == 0:
+        raise FileNotFoundError(f"Snapshot '{direktori}' kosong. Jalankan 'python ekstraksi_data.py' terlebih dahulu.")
+    tabel = pq.read_table(direktori, columns=kolom, memory_map=True, partitioning='hive')
+    df = tabel.to_pandas(split_blocks=True, self_destruct=True)
+    for kolom_ukuran in KOLOM_UKURAN:
+        if kolom_ukuran in df.columns and not pd.api.types.is_numeric_dtype(df[kolom_ukuran].dtype):
+            df[kolom_ukuran] = pd.to_numeric(df[kolom_ukuran], errors='coerce').astype(float)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description="Ekstraksi inkremental data_pasien ke snapshot Parquet.")
+    parser.add_argument('--direktori', default=DIREKTORI_SNAPSHOT)
+    parser.add_argument('--baris-per-bagian', type=int, default=BARIS_PER_BAGIAN)
+    parser.add_argument('--ulang', action='store_true', help="Hapus snapshot yang ada lalu ekstrak dari awal.")
+    args = parser.parse_args()
+
+    if args.ulang and os.path.isdir(args.direktori):
+        shutil.rmtree(args.direktori)
+    conn = koneksi_dari_secrets()
+    try:
+        watermark = ekstrak_inkremental(conn, args.direktori, args.baris_per_bagian)
+    finally:
+        conn.close()
+    print(f"Snapshot berisi {watermark['jumlah_baris']:,} baris sampai id {watermark['id_terakhir']:,}.")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
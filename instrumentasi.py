@@ -0,0 +1,182 @@
+# ======================================================================
+# --- File: instrumentasi.py ---
+# ======================================================================
+# Timer dan counter ringan untuk jalur panas (baca file, preprocess, predict,
+# simpan ke DB, render grafik). Data disimpan di memori proses dan dibaca
+# oleh panel admin di app.py atau diekspor dalam format teks Prometheus.
+#
+#   with ukur('kolektif.baca_file'):
+#       df = pd.read_csv(...)
+#   tambah('db.baris_tersimpan', jumlah)
+#
+#   @diukur('preprocess')
+#   def preprocess_input_for_pipeline(df_raw): ...
+#
+# Default MATI. Saat mati, ukur() langsung mengembalikan context manager
+# kosong yang sama dan tambah() langsung kembali, jadi biayanya hanya satu
+# pemeriksaan flag. Aktifkan dengan env INSTRUMENTASI=1, [instrumentasi]
+# aktif = true di secrets.toml, atau tombol di panel admin.
+# ======================================================================
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPEL_PER_TAHAP = 1024         # durasi terakhir yang disimpan per tahap (untuk persentil)
+PERSENTIL = (0.5, 0.9, 0.99)
+PREFIX_METRIK = 'pregnancy_risk'
+
+_aktif = os.environ.get('INSTRUMENTASI', '') == '1'
+_lock = threading.Lock()
+_sampel = {}        # nama tahap -> deque durasi (detik) terakhir
+_total = {}         # nama tahap -> [jumlah panggilan, total detik]
+_counter = {}       # nama counter -> nilai
+_KOSONG = nullcontext()
+_endpoint = None
+
+def aktif():
+    return _aktif
+
+def set_aktif(nilai):
+    global _aktif
+    _aktif = bool(nilai)
+
+def catat(nama, durasi):
+    """Mencatat satu durasi (detik) untuk tahap `nama`."""
+    with _lock:
+        sampel = _sampel.get(nama)
+        if sampel is None:
+            sampel = _sampel[nama] = deque(maxlen=SAMPEL_PER_TAHAP)
+            _total[nama] = [0, 0.0]
+        sampel.append(durasi)
+        total = _total[nama]
+        total[0] += 1
+        total[1] += durasi
+
+class _Timer:
+    __slots__ = ('nama', 'mulai')
+
+    def __init__(self, nama):
+        self.nama = nama
+
+    def __enter__(self):
+        self.mulai = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        catat(self.nama, time.perf_counter() - self.mulai)
+        return False
+
+def ukur(nama):
+    """Context manager yang mencatat durasi blok sebagai tahap `nama` (jika instrumentasi aktif)."""
+    if not _aktif:
+        return _KOSONG
+    return _Timer(nama)
+
+def diukur(nama):
+    """Decorator: setiap panggilan fungsi dicatat sebagai tahap `nama`."""
+    def dekorator(fungsi):
+        @functools.wraps(fungsi)
+        def pembungkus(*args, **kwargs):
+            if not _aktif:
+                return fungsi(*args, **kwargs)
+            with _Timer(nama):
+                return fungsi(*args, **kwargs)
+        return pembungkus
+    return dekorator
+
+def tambah(nama, nilai=1):
+    """Menambah counter `nama` (jika instrumentasi aktif)."""
+    if not _aktif:
+        return
+    with _lock:
+        _counter[nama] = _counter.get(nama, 0) + nilai
+
+def reset():
+    with _lock:
+        _sampel.clear()
+        _total.clear()
+        _counter.clear()
+
+def _persentil(terurut, p):
+    # Nearest-rank pada sampel yang sudah diurutkan
+    return terurut[min(len(terurut) - 1, max(0, int(round(p * len(terurut))) - 1))]
+
+def ringkasan():
+    """
+    Statistik per tahap: jumlah panggilan dan total sejak start, serta durasi
+    terakhir dan persentil dari SAMPEL_PER_TAHAP sampel terakhir (milidetik).
+    """
+    with _lock:
+        salinan = {nama: (list(sampel), tuple(_total[nama])) for nama, sampel in _sampel.items()}
+        counter = dict(_counter)
+    tahap = []
+    for nama, (sampel, (jumlah, total)) in sorted(salinan.items()):
+        terurut = sorted(sampel)
+        baris = {'tahap': nama, 'jumlah': jumlah, 'total_detik': round(total, 3),
+                 'terakhir_ms': round(sampel[-1] * 1000, 2)}
+        for p in PERSENTIL:
+            baris[f'p{int(p * 100)}_ms'] = round(_persentil(terurut, p) * 1000, 2)
+        baris['maks_ms'] = round(terurut[-1] * 1000, 2)
+        tahap.append(baris)
+    return {'tahap': tahap, 'counter': counter}
+
+def _nama_metrik(nama):
+    return ''.join(c if c.isalnum() else '_' for c in nama)
+
+def format_prometheus():
+    """Semua metrik dalam format teks eksposisi Prometheus (versi 0.0.4)."""
+    with _lock:
+        salinan = {nama: (sorted(sampel), tuple(_total[nama])) for nama, sampel in _sampel.items()}
+        counter = dict(_counter)
+
+    metrik = f'{PREFIX_METRIK}_tahap_detik'
+    baris = [f'# HELP {metrik} Durasi tahap pemrosesan (persentil dari sampel terakhir).',
+             f'# TYPE {metrik} summary']
+    for nama, (terurut, (jumlah, total)) in sorted(salinan.items()):
+        for p in PERSENTIL:
+            baris.append(f'{metrik}{{tahap="{nama}",quantile="{p}"}} {_persentil(terurut, p):.6f}')
+        baris.append(f'{metrik}_sum{{tahap="{nama}"}} {total:.6f}')
+        baris.append(f'{metrik}_count{{tahap="{nama}"}} {jumlah}')
+    for nama, nilai in sorted(counter.items()):
+        metrik = f'{PREFIX_METRIK}_{_nama_metrik(nama)}_total'
+        baris.append(f'# TYPE {metrik} counter')
+        baris.append(f'{metrik} {nilai}')
+    return '\n'.join(baris) + '\n'
+
+def tulis_prometheus(path):
+    """
+    Menulis metrik ke file (mis. untuk textfile collector node_exporter).
+    Ditulis ke file sementara lalu di-rename agar pembaca tidak melihat file setengah jadi.
+    """
+    sementara = f'{path}.{os.getpid()}.tmp'
+    with open(sementara, 'w', encoding='utf-8') as f:
+        f.write(format_prometheus())
+    os.replace(sementara, path)
+
+class _HandlerMetrik(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        isi = format_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(isi)))
+        self.end_headers()
+        self.wfile.write(isi)
+
+    def log_message(self, *args):
+        pass
+
+def jalankan_endpoint(port, host='127.0.0.1'):
+    """Menjalankan endpoint GET /metrics di thread daemon (sekali per proses)."""
+    global _endpoint
+    with _lock:
+        if _endpoint is None:
+            _endpoint = ThreadingHTTPServer((host, port), _HandlerMetrik)
+            threading.Thread(target=_endpoint.serve_forever, name='instrumentasi-metrics', daemon=True).start()
+    return _endpoint
\ No newline at end of file
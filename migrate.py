@@ -0,0 +1,88 @@
+# ======================================================================
+# --- File: migrate.py ---
+# ======================================================================
+# Menjalankan file SQL di folder migrations/ secara berurutan (berdasarkan
+# nama file). Migrasi yang sudah dijalankan dicatat di tabel
+# schema_migrations, jadi skrip ini aman dijalankan berulang kali.
+#
+# Cara pakai (dari root repo, koneksi dari [mysql] di .streamlit/secrets.toml):
+#   python migrate.py
+#   python migrate.py --daftar        # hanya menampilkan status migrasi
+# ======================================================================
+import argparse
+import os
+
+import mysql.connector
+import streamlit as st
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def koneksi_dari_secrets():
+    """Koneksi langsung (tanpa pool) memakai [mysql] di .streamlit/secrets.toml."""
+    secrets = st.secrets.mysql
+    return mysql.connector.connect(
+        host=secrets.host, user=secrets.user, password=secrets.password,
+        database=secrets.database, port=int(secrets.get('port', 3306))
+    )
+
+def daftar_migrasi(folder=MIGRATIONS_DIR):
+    return sorted(nama for nama in os.listdir(folder) if nama.endswith('.sql'))
+
+def pecah_statement(sql):
+    """Memecah isi file SQL per ';' (tanpa stored procedure), membuang baris komentar."""
+    baris = [b for b in sql.splitlines() if not b.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(baris).split(';') if s.strip()]
+
+def terapkan_migrasi(conn, folder=MIGRATIONS_DIR, verbose=True):
+    """Menjalankan migrasi yang belum tercatat. Mengembalikan daftar nama file yang dijalankan."""
+    cursor = conn.cursor(buffered=True)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            nama VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT nama FROM schema_migrations")
+    sudah = {nama for (nama,) in cursor.fetchall()}
+
+    dijalankan = []
+    for nama in daftar_migrasi(folder):
+        if nama in sudah:
+            continue
+        with open(os.path.join(folder, nama), encoding='utf-8') as f:
+            statements = pecah_statement(f.read())
+        if verbose:
+            print(f"Menjalankan {nama} ({len(statements)} statement)...")
+        # DDL MySQL langsung ter-commit, jadi migrasi yang gagal di tengah
+        # harus diperbaiki manual sebelum skrip ini dijalankan ulang.
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (nama) VALUES (%s)", (nama,))
+        conn.commit()
+        dijalankan.append(nama)
+    return dijalankan
+
+def main():
+    parser = argparse.ArgumentParser(description="Menjalankan migrasi skema database.")
+    parser.add_argument('--daftar', action='store_true', help="Hanya tampilkan status migrasi.")
+    args = parser.parse_args()
+
+    conn = koneksi_dari_secrets()
+    try:
+        if args.daftar:
+            cursor = conn.cursor(buffered=True)
+            cursor.execute("SHOW TABLES LIKE 'schema_migrations'")
+            sudah = set()
+            if cursor.fetchone():
+                cursor.execute("SELECT nama FROM schema_migrations")
+                sudah = {nama for (nama,) in cursor.fetchall()}
+            for nama in daftar_migrasi():
+                print(f"[{'x' if nama in sudah else ' '}] {nama}")
+            return
+        dijalankan = terapkan_migrasi(conn)
+        print(f"{len(dijalankan)} migrasi dijalankan." if dijalankan else "Skema sudah terbaru.")
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,7 @@
+-- Index untuk riwayat pemeriksaan (utils.query_riwayat).
+-- Keyset pagination: WHERE created_by = ? AND (created_at, id) < kursor
+-- ORDER BY created_at DESC, id DESC. Index kedua dipakai saat riwayat
+-- difilter per tingkat risiko, agar halaman tetap dibaca langsung dari index.
+ALTER TABLE data_pasien
+    ADD INDEX idx_data_pasien_riwayat (created_by, created_at, id),
+    ADD INDEX idx_data_pasien_riwayat_risiko (created_by, hasil_prediksi, created_at, id);
\ No newline at end of file
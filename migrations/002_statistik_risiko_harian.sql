@@ -0,0 +1,13 @@
+-- Tabel statistik agregat untuk dashboard (utils.get_statistik_risiko).
+-- Diperbarui bersamaan dengan INSERT ke data_pasien; isi awal / bangun ulang
+-- dengan: python backfill_statistik.py
+CREATE TABLE IF NOT EXISTS statistik_risiko_harian (
+    tanggal DATE NOT NULL,
+    created_by INT NOT NULL,
+    hasil_prediksi VARCHAR(10) NOT NULL,
+    kelompok_umur VARCHAR(32) NOT NULL,
+    kelompok_gravida VARCHAR(32) NOT NULL,
+    jumlah INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, created_by, hasil_prediksi, kelompok_umur, kelompok_gravida),
+    INDEX idx_statistik_pembuat (created_by, tanggal)
+);
\ No newline at end of file
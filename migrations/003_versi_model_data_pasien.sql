@@ -0,0 +1,3 @@
+-- Versi model (model_manifest.json 'versi_model') yang menghasilkan setiap
+-- prediksi. Baris lama tetap NULL karena versinya tidak tercatat.
+ALTER TABLE data_pasien ADD COLUMN versi_model VARCHAR(32) NULL AFTER hasil_prediksi;
\ No newline at end of file
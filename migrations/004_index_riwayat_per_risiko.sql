@@ -0,0 +1,17 @@
+-- Index yang dibutuhkan query_riwayat saat riwayat difilter tingkat risiko:
+-- setiap tingkat dibaca sebagai satu cabang UNION ALL dengan
+-- hasil_prediksi = ?, urut (created_at, id) langsung dari index. Filter
+-- IN (...) pada kolom kedua membuat MySQL melakukan filesort, jadi tidak dipakai.
+-- Index ini sudah dibuat oleh 001 pada database yang menjalankannya; MySQL
+-- tidak punya ADD INDEX IF NOT EXISTS, jadi keberadaannya dicek dulu.
+SET @ada_index = (
+    SELECT COUNT(*) FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = 'data_pasien'
+      AND index_name = 'idx_data_pasien_riwayat_risiko'
+);
+SET @sql_index = IF(@ada_index = 0,
+    'ALTER TABLE data_pasien ADD INDEX idx_data_pasien_riwayat_risiko (created_by, hasil_prediksi, created_at, id)',
+    'DO 0');
+PREPARE tambah_index FROM @sql_index;
+EXECUTE tambah_index;
+DEALLOCATE PREPARE tambah_index
\ No newline at end of file
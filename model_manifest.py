@@ -0,0 +1,125 @@
+# ======================================================================
+# --- File: model_manifest.py ---
+# ======================================================================
+# Manifest model: metadata hasil training dalam satu file JSON kecil
+# (nama fitur, feature importance, kelas, hash data training, skor CV,
+# ambang per kelas dari prediksi out-of-fold CV). Ditulis train_model.py di samping artefak .npz dan
+# dibaca aplikasi tanpa unpickle apa pun.
+import datetime
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.model_selection import check_cv, cross_val_predict
+
+FORMAT_VERSI_MANIFEST = 1
+MANIFEST_PATH = 'model_manifest.json'
+
+def hash_file(path):
+    """SHA-256 isi sebuah file artefak."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for blok in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(blok)
+    return sha.hexdigest()
+
+def hash_dataset(X, y):
+    """SHA-256 isi data training (nilai dan urutan baris, tanpa index)."""
+    sha = hashlib.sha256()
+    sha.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    sha.update(pd.util.hash_pandas_object(pd.Series(y), index=False).to_numpy().tobytes())
+    sha.update(','.join(map(str, X.columns)).encode())
+    return sha.hexdigest()
+
+def _f1_ambang(skor, positif, ambang):
+    prediksi = skor >= ambang
+    tp = int((prediksi & positif).sum())
+    return float(2 * tp / (prediksi.sum() + positif.sum())) if tp else 0.0
+
+def ambang_per_kelas(proba_cv, y_cv, classes, proba_uji, y_uji):
+    """
+    Ambang probabilitas one-vs-rest per kelas yang memaksimalkan F1 pada
+    probabilitas out-of-fold CV data latih (proba_cv); data uji hanya dipakai
+    untuk melaporkan F1 pada ambang terpilih. Tree hanya menghasilkan sedikit
+    nilai probabilitas berbeda, jadi cukup dicoba semua nilai unik sebagai ambang.
+    """
+    y_cv, y_uji = np.asarray(y_cv), np.asarray(y_uji)
+    hasil = {}
+    for k, kelas in enumerate(classes):
+        positif = y_cv == kelas
+        terbaik = (0.0, 0.5)
+        for ambang in np.unique(proba_cv[:, k]):
+            f1 = _f1_ambang(proba_cv[:, k], positif, ambang)
+            if f1 > terbaik[0]:
+                terbaik = (f1, float(ambang))
+        hasil[str(kelas)] = {
+            'ambang': round(terbaik[1], 6),
+            'f1_cv': round(terbaik[0], 6),
+            'f1_uji': round(_f1_ambang(proba_uji[:, k], y_uji == kelas, terbaik[1]), 6),
+        }
+    return hasil
+
+def proba_out_of_fold(pipeline, search, X_train, y_train):
+    """predict_proba out-of-fold untuk data latih, dengan parameter terbaik dan fold CV yang sama dengan search."""
+    cv = check_cv(search.cv, y_train, classifier=True)
+    return cross_val_predict(clone(pipeline), X_train, y_train, cv=cv, method='predict_proba')
+
+def buat_manifest(pipeline, search, X_train, y_train, X_test, y_test, artefak_path):
+    """Menyusun manifest dari pipeline terbaik dan hasil pencarian hyperparameter."""
+    classifier = pipeline.named_steps['classifier']
+    feature_names = pipeline.named_steps['preprocessor'].get_feature_names_out().tolist()
+    classes = classifier.classes_.tolist()
+
+    # Skor tiap fold untuk kombinasi parameter terbaik
+    cv = search.cv_results_
+    i = search.best_index_
+    n_split = search.n_splits_
+    skor_fold = [float(cv[f'split{k}_test_score'][i]) for k in range(n_split)]
+
+    proba_uji = pipeline.predict_proba(X_test)
+    prediksi_uji = np.asarray(classes, dtype=object)[proba_uji.argmax(axis=1)]
+
+    sha_artefak = hash_file(artefak_path)
+    return {
+        'format_versi': FORMAT_VERSI_MANIFEST,
+        'versi_model': sha_artefak[:12],
+        'dibuat_pada': datetime.datetime.now().isoformat(timespec='seconds'),
+        'artefak': {'path': artefak_path, 'sha256': sha_artefak},
+        'feature_names': feature_names,
+        'feature_importances': [float(v) for v in classifier.feature_importances_],
+        'classes': classes,
+        'dataset_training': {
+            'sha256': hash_dataset(X_train, y_train),
+            'jumlah_baris': int(len(X_train)),
+            'distribusi_label': {str(k): int(v) for k, v in pd.Series(y_train).value_counts().items()},
+        },
+        'cv': {
+            'metode': type(search).__name__,
+            'scoring': search.scoring,
+            'n_split': n_split,
+            'best_params': {k: (v.item() if hasattr(v, 'item') else v) for k, v in search.best_params_.items()},
+            'skor_terbaik': float(search.best_score_),
+            'skor_per_fold': skor_fold,
+            'std': float(np.std(skor_fold)),
+        },
+        'evaluasi_uji': {
+            'jumlah_baris': int(len(X_test)),
+            'akurasi': float((prediksi_uji == np.asarray(y_test, dtype=object)).mean()),
+        },
+        'ambang_per_kelas': ambang_per_kelas(proba_out_of_fold(pipeline, search, X_train, y_train), y_train,
+                                             classes, proba_uji, y_test),
+    }
+
+def simpan_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+def muat_manifest(path=MANIFEST_PATH):
+    """Memuat manifest dan memastikan formatnya dikenali."""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_versi') != FORMAT_VERSI_MANIFEST:
+        raise ValueError(f"Format manifest {manifest.get('format_versi')} tidak didukung (harus {FORMAT_VERSI_MANIFEST}).")
+    return manifest
\ No newline at end of file
@@ -0,0 +1,126 @@
+# ======================================================================
+# --- File: model_registry.py ---
+# ======================================================================
+# Registry model bersama untuk satu proses (dipakai halaman individual dan
+# kolektif). Model dimuat sekali, lalu registry memeriksa secara berkala
+# apakah train_model.py sudah menerbitkan versi baru dan menukarnya secara
+# atomik.
+#
+# Tata letak artefak berversi (ditulis terbitkan_model):
+#   models/<versi>/pregnancy_risk_model.npz
+#   models/<versi>/model_manifest.json
+#   models/CURRENT                      -> berisi nama versi yang aktif
+# Jika models/CURRENT belum ada, registry memakai pregnancy_risk_model.npz
+# dan model_manifest.json di root repo.
+#
+# Setiap pemanggil mengambil satu snapshot lewat aktif() dan memakainya
+# sampai permintaannya selesai. Penukaran hanya mengganti referensi snapshot,
+# jadi permintaan yang sedang berjalan tetap memakai versi lama sampai selesai.
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from compiled_model import load_compiled_model
+from model_manifest import muat_manifest, hash_file, MANIFEST_PATH
+
+DIREKTORI_MODEL = 'models'
+NAMA_NPZ = 'pregnancy_risk_model.npz'
+NAMA_MANIFEST = 'model_manifest.json'
+INTERVAL_CEK = 2.0  # detik antar pemeriksaan versi baru
+
+class VersiModel:
+    """Snapshot satu versi model (tidak pernah diubah setelah dibuat)."""
+
+    def __init__(self, versi, model, manifest, path):
+        self.versi = versi
+        self.model = model
+        self.manifest = manifest
+        self.path = path
+
+def terbitkan_model(path_npz, path_manifest, direktori=DIREKTORI_MODEL):
+    """
+    Menyalin artefak ke models/<versi>/ lalu mengganti models/CURRENT.
+    Folder versi ditulis lengkap di folder sementara sebelum di-rename, dan
+    CURRENT diganti dengan os.replace, sehingga registry tidak pernah melihat
+    versi yang setengah jadi.
+    """
+    versi = muat_manifest(path_manifest)['versi_model']
+    tujuan = os.path.join(direktori, versi)
+    os.makedirs(direktori, exist_ok=True)
+    if not os.path.isdir(tujuan):
+        sementara = tempfile.mkdtemp(prefix=f'.{versi}-', dir=direktori)
+        shutil.copy2(path_npz, os.path.join(sementara, NAMA_NPZ))
+        shutil.copy2(path_manifest, os.path.join(sementara, NAMA_MANIFEST))
+        os.replace(sementara, tujuan)
+
+    fd, sementara = tempfile.mkstemp(prefix='.CURRENT-', dir=direktori)
+    with os.fdopen(fd, 'w') as f:
+        f.write(versi)
+    os.replace(sementara, os.path.join(direktori, 'CURRENT'))
+    return versi
+
+class ModelRegistry:
+    def __init__(self, direktori=DIREKTORI_MODEL, interval_cek=INTERVAL_CEK):
+        self.direktori = direktori
+        self.interval_cek = interval_cek
+        self._lock = threading.Lock()
+        self._terakhir_cek = 0.0
+        self._tanda_sumber = None
+        self._aktif = None
+        self._cek_versi_baru()
+        if self._aktif is None:
+            raise FileNotFoundError(f"Artefak model tidak ditemukan ('{self.direktori}/CURRENT' atau '{NAMA_NPZ}').")
+
+    def _sumber(self):
+        """(path file penanda, path manifest) untuk versi yang seharusnya aktif."""
+        pointer = os.path.join(self.direktori, 'CURRENT')
+        if os.path.exists(pointer):
+            with open(pointer) as f:
+                versi = f.read().strip()
+            return pointer, os.path.join(self.direktori, versi, NAMA_MANIFEST)
+        return MANIFEST_PATH, MANIFEST_PATH
+
+    def _cek_versi_baru(self):
+        penanda, path_manifest = self._sumber()
+        stat = os.stat(penanda)
+        tanda = (penanda, stat.st_mtime_ns, stat.st_size)
+        if tanda == self._tanda_sumber:
+            return
+
+        manifest = muat_manifest(path_manifest)
+        if self._aktif is None or manifest['versi_model'] != self._aktif.versi:
+            path_npz = os.path.join(os.path.dirname(path_manifest), NAMA_NPZ)
+            # Di mode root, npz dan manifest ditulis terpisah oleh train_model.py;
+            # tunggu sampai keduanya cocok sebelum menukar model.
+            if hash_file(path_npz) != manifest['artefak']['sha256']:
+                return
+            self._aktif = VersiModel(manifest['versi_model'], load_compiled_model(path_npz), manifest, path_npz)
+            print(f"Model versi {self._aktif.versi} dimuat dari {path_npz}")
+        self._tanda_sumber = tanda
+
+    def aktif(self):
+        """Snapshot versi model yang aktif; memeriksa versi baru paling sering tiap interval_cek detik."""
+        sekarang = time.monotonic()
+        if sekarang - self._terakhir_cek >= self.interval_cek and self._lock.acquire(blocking=False):
+            # Thread lain yang datang selama pemuatan tidak menunggu; mereka memakai versi lama
+            try:
+                self._terakhir_cek = sekarang
+                self._cek_versi_baru()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Gagal memuat versi model baru, tetap memakai versi {self._aktif.versi}: {e}")
+            finally:
+                self._lock.release()
+        return self._aktif
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Satu ModelRegistry per proses, dipakai bersama oleh semua halaman dan sesi."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+    return _registry
\ No newline at end of file
@@ -3,12 +3,343 @@
 # ======================================================================
 import streamlit as st
 import pandas as pd
-import joblib
 import plotly.express as px
+import hashlib
+import importlib.util
 import io
+import os
+import tempfile
+import threading
+import openpyxl
 
 # Impor fungsi yang kita butuhkan dari utils.py
-from utils import save_prediction_to_db, preprocess_input_for_pipeline
+from utils import save_predictions_bulk, kelompokkan_umur_gravida, get_statistik_risiko
+from parallel_scoring import ParallelScorer
+from model_registry import get_registry
+from instrumentasi import ukur, diukur, tambah
+
+# --- Pengaturan mode streaming untuk file besar ---
+BARIS_PER_CHUNK = 50_000            # baris yang diproses per langkah
+BATAS_STREAMING_MB = 20             # file di atas ukuran ini default diproses per chunk
+SPOOL_MAKS_BYTE = 32 * 1024 * 1024  # hasil CSV pindah dari RAM ke disk di atas ukuran ini
+BARIS_PRATINJAU = 1000              # baris hasil yang ditampilkan di tabel pada mode streaming
+
+# Parquet/Feather dibaca lewat pyarrow (opsional); tanpa pyarrow hanya CSV/XLSX
+ADA_PYARROW = importlib.util.find_spec('pyarrow') is not None
+FORMAT_UPLOAD = ['csv', 'xlsx'] + (['parquet', 'feather'] if ADA_PYARROW else [])
+
+KOLOM_TEMPLATE = [
+    'nama_pasien',
+    'umur_ibu', 'gravida', 'umur_kehamilan', 'tinggi_badan',
+    'tekanan_darah', 'penyakit_anemia', 'posisi_janin',
+    'hasil_tes_VDRL', 'hasil_tes_HbsAg'
+]
+
+WARNA_RISIKO = {'KRR': '#28a745', 'KRT': '#ffc107', 'KRST': '#dc3545'}
+
+def hitung_ringkasan(df_output):
+    """
+    Menghitung data untuk grafik dari hasil prediksi: jumlah per tingkat
+    risiko, serta jumlah per (kelompok umur, risiko) dan (kelompok gravida,
+    risiko). Hasilnya berupa Series jumlah sehingga bisa dijumlahkan antar
+    chunk pada mode streaming.
+    """
+    # Aturan pengelompokan (pd.cut) sama dengan tabel statistik di database (utils)
+    kelompok_umur, kelompok_gravida = kelompokkan_umur_gravida(df_output['umur_ibu'], df_output['gravida'])
+    df_viz = pd.DataFrame({
+        'hasil_prediksi': df_output['hasil_prediksi'],
+        'kelompok_umur': kelompok_umur,
+        'kelompok_gravida': kelompok_gravida,
+    })
+
+    return {
+        'risiko': df_viz['hasil_prediksi'].value_counts(),
+        'umur': df_viz.groupby(['kelompok_umur', 'hasil_prediksi']).size(),
+        'gravida': df_viz.groupby(['kelompok_gravida', 'hasil_prediksi']).size(),
+    }
+
+def hash_hasil(df_output):
+    """Hash isi kolom yang dipakai grafik; dihitung sekali saat hasil prediksi dibuat."""
+    nilai = pd.util.hash_pandas_object(df_output[['umur_ibu', 'gravida', 'hasil_prediksi']], index=False)
+    return hashlib.sha256(nilai.to_numpy().tobytes()).hexdigest()
+
+@st.cache_data(max_entries=16)
+def ringkasan_tersimpan(kunci_hasil, _df_output):
+    """
+    hitung_ringkasan yang di-cache per isi hasil prediksi. _df_output tidak
+    di-hash oleh Streamlit (awalan '_'); kuncinya adalah kunci_hasil dari
+    hash_hasil, sehingga rerun (mis. ganti pilihan grafik) tidak menghitung ulang.
+    """
+    return hitung_ringkasan(_df_output)
+
+def gabung_ringkasan(total, tambahan):
+    """Menjumlahkan dua ringkasan dari hitung_ringkasan (dipakai per chunk)."""
+    if total is None:
+        return tambahan
+    return {key: total[key].add(tambahan[key], fill_value=0).astype(int) for key in total}
+
+@st.cache_data
+def template_xlsx():
+    """Isi file template (.xlsx) sebagai bytes; dibuat sekali per proses, bukan setiap rerun."""
+    output_excel = io.BytesIO()
+    with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
+        pd.DataFrame(columns=KOLOM_TEMPLATE).to_excel(writer, index=False, sheet_name='Data Pasien')
+    return output_excel.getvalue()
+
+def format_file(nama_file):
+    """'csv', 'xlsx', 'parquet' atau 'feather' dari ekstensi nama file."""
+    return os.path.splitext(nama_file)[1].lower().lstrip('.')
+
+def _buffer_arrow(uploaded_file):
+    # getbuffer() tidak menyalin isi unggahan; pyarrow membaca langsung dari memori itu
+    import pyarrow as pa
+    return pa.BufferReader(pa.py_buffer(uploaded_file.getbuffer()))
+
+def _arrow_ke_pandas(tabel):
+    # split_blocks: kolom numerik tanpa null dipakai tanpa disalin ke blok gabungan;
+    # self_destruct: memori Arrow dilepas per kolom selama konversi
+    return tabel.to_pandas(split_blocks=True, self_destruct=True)
+
+def baca_file(uploaded_file):
+    """
+    Membaca seluruh file unggahan. Parquet/Feather dibaca dengan tipe kolom
+    aslinya (angka tetap angka), sehingga preprocessing tidak perlu mem-parse
+    teks untuk kolom bertipe integer.
+    """
+    uploaded_file.seek(0)
+    fmt = format_file(uploaded_file.name)
+    if fmt == 'csv':
+        return pd.read_csv(uploaded_file)
+    if fmt == 'xlsx':
+        return pd.read_excel(uploaded_file)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return _arrow_ke_pandas(pq.read_table(_buffer_arrow(uploaded_file)))
+    if fmt == 'feather':
+        import pyarrow.feather as feather
+        return _arrow_ke_pandas(feather.read_table(_buffer_arrow(uploaded_file), memory_map=False))
+    raise ValueError(f"Format file '.{fmt}' tidak didukung.")
+
+def hasil_ke_parquet(df_output):
+    """File Parquet hasil prediksi (BytesIO)."""
+    import pyarrow as pa
+    output = io.BytesIO()
+    try:
+        df_output.to_parquet(output, index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Kolom object berisi campuran angka dan teks (mis. dari Excel) disimpan sebagai teks
+        output = io.BytesIO()
+        kolom_object = df_output.select_dtypes(include='object').columns
+        df_output.astype({kolom: 'string' for kolom in kolom_object}).to_parquet(output, index=False)
+    return output
+
+def baca_file_per_chunk(uploaded_file, chunksize=BARIS_PER_CHUNK):
+    """
+    Membaca file unggahan sebagai potongan DataFrame tanpa memuat semuanya
+    sekaligus: CSV lewat pd.read_csv(chunksize=...), Parquet per record batch,
+    Feather dari tabel yang dibaca tanpa salinan, XLSX lewat openpyxl mode
+    read-only (sheet pertama, baris pertama sebagai header).
+    """
+    uploaded_file.seek(0)
+    fmt = format_file(uploaded_file.name)
+    if fmt == 'csv':
+        yield from pd.read_csv(uploaded_file, chunksize=chunksize)
+        return
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(_buffer_arrow(uploaded_file)).iter_batches(batch_size=chunksize):
+            yield _arrow_ke_pandas(batch)
+        return
+    if fmt == 'feather':
+        import pyarrow.feather as feather
+        tabel = feather.read_table(_buffer_arrow(uploaded_file), memory_map=False)
+        for batch in tabel.to_batches(max_chunksize=chunksize):
+            yield _arrow_ke_pandas(batch)
+        return
+
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue # Lewati baris kosong
+            buffer.append(row)
+            if len(buffer) == chunksize:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+@diukur('kolektif.streaming')
+def proses_streaming(uploaded_file, scorer, model_aktif, chunksize=BARIS_PER_CHUNK, progress_callback=None):
+    """
+    Memproses file per chunk: preprocess -> predict -> langsung ditulis ke
+    file CSV sementara (SpooledTemporaryFile). Yang disimpan di memori hanya
+    ringkasan jumlah untuk grafik dan pratinjau beberapa baris pertama,
+    sehingga pemakaian memori tidak bergantung pada ukuran file. Semua chunk
+    memakai snapshot model_aktif yang sama meskipun model ditukar di tengah jalan.
+    Untuk file besar, chunk berikutnya sudah diprediksi di process pool selagi
+    chunk sekarang ditulis (ParallelScorer.score_stream).
+    Jika file tidak berisi baris data, jumlah_baris 0 dan ringkasan None.
+    """
+    output_file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAKS_BYTE, mode='w+b')
+    ringkasan, pratinjau, jumlah_baris = None, None, 0
+    # Chunk kosong (mis. CSV yang hanya berisi header) dilewati
+    chunks = (chunk for chunk in baca_file_per_chunk(uploaded_file, chunksize) if not chunk.empty)
+    for chunk, (prediksi, alasan) in scorer.score_stream(chunks, model_aktif.model, model_aktif.path,
+                                                         dengan_alasan=True):
+        chunk['hasil_prediksi'], chunk['alasan'] = prediksi, alasan
+        chunk.to_csv(output_file, header=(jumlah_baris == 0), index=False, encoding='utf-8')
+
+        ringkasan = gabung_ringkasan(ringkasan, hitung_ringkasan(chunk))
+        if pratinjau is None or len(pratinjau) < BARIS_PRATINJAU:
+            pratinjau = pd.concat([pratinjau, chunk.head(BARIS_PRATINJAU)]).head(BARIS_PRATINJAU)
+        jumlah_baris += len(chunk)
+        if progress_callback:
+            progress_callback(jumlah_baris)
+    output_file.seek(0)
+    # File dibaca dari dua tempat (unduhan di thread server dan simpan ke database); kunci menjaga posisi seek
+    return {'file': output_file, 'kunci': threading.Lock(), 'ringkasan': ringkasan, 'pratinjau': pratinjau,
+            'jumlah_baris': jumlah_baris}
+
+def unduhan_stream(hasil_stream):
+    """
+    Callable untuk data= st.download_button: isi file hasil baru dibaca saat
+    tombol diklik, bukan disalin ke memori pada setiap rerun.
+    """
+    def baca():
+        with hasil_stream['kunci']:
+            hasil_stream['file'].seek(0)
+            return hasil_stream['file'].read()
+    return baca
+
+def tutup_stream(hasil_stream):
+    """Menutup file hasil streaming sebelumnya (RAM sampai SPOOL_MAKS_BYTE, atau file sementara di disk)."""
+    if hasil_stream is not None:
+        with hasil_stream['kunci']:
+            hasil_stream['file'].close()
+
+@st.cache_data(max_entries=4)
+def tabel_importance(versi_model, _manifest):
+    """Tabel 10 fitur terpenting dari manifest, sekali per versi model."""
+    return pd.DataFrame({
+        'Fitur': _manifest['feature_names'],
+        'Tingkat Kepentingan': _manifest['feature_importances']
+    }).sort_values(by='Tingkat Kepentingan', ascending=False).head(10) # Ambil 10 teratas
+
+@diukur('render.distribusi_risiko')
+def tampilkan_distribusi_risiko(ringkasan):
+    """Grafik 1: jumlah pasien per tingkat risiko."""
+    st.subheader("Distribusi Tingkat Risiko")
+    risk_counts = ringkasan['risiko'].sort_values(ascending=False).reset_index()
+    risk_counts.columns = ['Tingkat Risiko', 'Jumlah Pasien']
+
+    fig_bar = px.bar(
+        risk_counts, 
+        x='Tingkat Risiko', 
+        y='Jumlah Pasien',
+        title='Jumlah Pasien per Kategori Risiko',
+        text='Jumlah Pasien',  # Menampilkan angka di atas bar
+        color='Tingkat Risiko',
+        color_discrete_map=WARNA_RISIKO,
+        labels={'Tingkat Risiko': 'Kategori Risiko', 'Jumlah Pasien': 'Jumlah Pasien'}
+    )
+    fig_bar.update_traces(textposition='outside')
+    st.plotly_chart(fig_bar, use_container_width=True)
+
+@diukur('render.analisis_demografis')
+def tampilkan_analisis_demografis(ringkasan):
+    """Grafik 3: distribusi risiko per kelompok umur atau kelompok gravida."""
+    st.subheader("Analisis Risiko Berdasarkan Faktor Demografis")
+
+    # --- Membuat Visualisasi dengan Pilihan (Tidak ada perubahan di sini) ---
+    st.write("Pilih faktor demografis untuk dianalisis:")
+
+    analysis_option = st.selectbox(
+        "Analisis Berdasarkan:",
+        ("Kelompok Umur", "Jumlah Kehamilan (Gravida)"),
+        label_visibility="collapsed"
+    )
+
+    if analysis_option == "Kelompok Umur":
+        # Hitung jumlah untuk setiap kombinasi kelompok umur dan hasil prediksi
+        df_grouped = ringkasan['umur'].reset_index(name='jumlah')
+
+        # Buat Grouped Bar Chart
+        fig_demo = px.bar(
+            df_grouped,
+            x='kelompok_umur',
+            y='jumlah',
+            color='hasil_prediksi',
+            barmode='group', # Ini yang membuat chart menjadi berkelompok
+            title='Distribusi Risiko Berdasarkan Kelompok Umur',
+            labels={
+                'kelompok_umur': 'Kelompok Umur',
+                'jumlah': 'Jumlah Pasien',
+                'hasil_prediksi': 'Tingkat Risiko'
+            },
+            color_discrete_map=WARNA_RISIKO,
+            text='jumlah' # Menampilkan angka di atas bar
+        )
+        fig_demo.update_traces(textposition='outside')
+        st.plotly_chart(fig_demo, use_container_width=True)
+
+    elif analysis_option == "Jumlah Kehamilan (Gravida)":
+        # Hitung jumlah untuk setiap kombinasi kelompok gravida dan hasil prediksi
+        df_grouped = ringkasan['gravida'].reset_index(name='jumlah')
+
+        # Buat Grouped Bar Chart
+        fig_demo = px.bar(
+            df_grouped,
+            x='kelompok_gravida',
+            y='jumlah',
+            color='hasil_prediksi',
+            barmode='group',
+            title='Distribusi Risiko Berdasarkan Jumlah Kehamilan',
+            labels={
+                'kelompok_gravida': 'Kelompok Jumlah Kehamilan',
+                'jumlah': 'Jumlah Pasien',
+                'hasil_prediksi': 'Tingkat Risiko'
+            },
+            color_discrete_map=WARNA_RISIKO,
+            text='jumlah'
+        )
+        fig_demo.update_traces(textposition='outside')
+        # Urutkan sumbu x secara logis
+        fig_demo.update_xaxes(categoryorder='array', categoryarray=['1 (Primigravida)', '2-4', '> 4 (Grande Multigravida)'])
+        st.plotly_chart(fig_demo, use_container_width=True)
+
+def show_dashboard_agregat():
+    """
+    Mode dashboard: grafik yang sama dengan hasil unggahan, tetapi atas semua
+    data yang tersimpan di database. Hanya membaca tabel statistik agregat.
+    """
+    col_mulai, col_akhir, col_lingkup = st.columns([1, 1, 2])
+    tanggal_mulai = col_mulai.date_input("Dari tanggal", value=None, key='dashboard_mulai')
+    tanggal_akhir = col_akhir.date_input("Sampai tanggal", value=None, key='dashboard_akhir')
+    col_lingkup.write("")
+    hanya_milik_saya = col_lingkup.checkbox("Hanya data yang saya simpan")
+
+    ringkasan = get_statistik_risiko(
+        tanggal_mulai, tanggal_akhir,
+        created_by=st.session_state.get('user_id') if hanya_milik_saya else None
+    )
+    if ringkasan is None:
+        st.error("Gagal terhubung ke database. Silakan coba lagi nanti.")
+        return
+    if ringkasan['risiko'].empty:
+        st.info("Belum ada data tersimpan untuk rentang ini.")
+        return
+
+    st.metric("Total Pasien", f"{int(ringkasan['risiko'].sum()):,}")
+    tampilkan_distribusi_risiko(ringkasan)
+    tampilkan_analisis_demografis(ringkasan)
 
 def show():
     """
@@ -19,20 +350,28 @@ def show():
     st.title("🗂️ Pemeriksaan Risiko Kolektif (Unggah File)")
     st.markdown("Unggah file CSV atau Excel Anda untuk mendapatkan prediksi untuk semua pasien sekaligus.")
 
-    # --- Muat Pipeline Lengkap ---
+    mode = st.radio(
+        "Mode", ["Prediksi dari File", "Dashboard Agregat (Semua Data Tersimpan)"],
+        horizontal=True, label_visibility="collapsed"
+    )
+    if mode != "Prediksi dari File":
+        show_dashboard_agregat()
+        return
+
+    # --- Muat Model ---
+    # Scorer (process pool untuk file besar) dibuat sekali per proses. Modelnya
+    # diambil dari registry bersama, yang menukar versi baru tanpa restart;
+    # snapshot di bawah dipakai untuk seluruh run ini.
     @st.cache_resource
-    def load_artifacts():
-        try:
-            pipeline = joblib.load('pregnancy_risk_full_pipeline.pkl')
-            feature_names = joblib.load('feature_names.pkl')
-            return pipeline, feature_names
-        except FileNotFoundError:
-            st.error("File model/pipeline tidak ditemukan. Mohon jalankan skrip 'train_model.py'.")
-            return None, None
-
-    pipeline, feature_names = load_artifacts()
-    if not pipeline or not feature_names:
+    def load_scorer():
+        return ParallelScorer()
+
+    try:
+        model_aktif = get_registry().aktif()
+    except FileNotFoundError as e:
+        st.error(f"{e} Mohon jalankan skrip 'train_model.py'.")
         st.stop()
+    scorer = load_scorer()
 
     # --- Area untuk Template dan Upload File ---
     col1, col2 = st.columns([1, 3])
@@ -40,24 +379,9 @@ def show():
         st.subheader("Langkah 1: Unduh Template")
         st.write("Gunakan template ini untuk format data yang benar.")
         
-        @st.cache_data
-        def get_template_df():
-            template_cols = [
-                'nama_pasien', 
-                'umur_ibu', 'gravida', 'umur_kehamilan', 'tinggi_badan',
-                'tekanan_darah', 'penyakit_anemia', 'posisi_janin', 
-                'hasil_tes_VDRL', 'hasil_tes_HbsAg'
-            ]
-            return pd.DataFrame(columns=template_cols)
-
-        template_df = get_template_df()
-        output_excel = io.BytesIO()
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            template_df.to_excel(writer, index=False, sheet_name='Data Pasien')
-        
         st.download_button(
             "Unduh Template (.xlsx)",
-            data=output_excel,
+            data=template_xlsx(),
             file_name='template_prediksi_kolektif.xlsx',
             mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             use_container_width=True
@@ -65,71 +389,145 @@ def show():
 
     with col2:
         st.subheader("Langkah 2: Unggah File Anda")
-        st.write("Pilih file CSV atau Excel yang sudah Anda isi.")
-        uploaded_file = st.file_uploader("Pilih file...", type=['csv', 'xlsx'], label_visibility="collapsed")
+        st.write("Pilih file CSV, Excel, Parquet, atau Feather yang sudah Anda isi." if ADA_PYARROW
+                 else "Pilih file CSV atau Excel yang sudah Anda isi.")
+        uploaded_file = st.file_uploader("Pilih file...", type=FORMAT_UPLOAD, label_visibility="collapsed")
     
     st.divider()
 
     # --- Area Utama untuk Proses dan Tampilan Hasil ---
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df_input = pd.read_csv(uploaded_file)
-            else:
-                df_input = pd.read_excel(uploaded_file)
+            # File besar diproses per chunk agar tidak menghabiskan memori worker
+            mode_streaming = st.toggle(
+                "Mode streaming (untuk file besar)",
+                value=uploaded_file.size > BATAS_STREAMING_MB * 1024 * 1024,
+                help="Data dibaca, diprediksi, dan ditulis per bagian. Tabel hasil hanya menampilkan sebagian baris."
+            )
+
+            with ukur('kolektif.baca_file'):
+                if mode_streaming:
+                    df_input = next(baca_file_per_chunk(uploaded_file, chunksize=5), pd.DataFrame())
+                else:
+                    df_input = baca_file(uploaded_file)
             
             st.subheader("1. Pratinjau Data yang Diunggah")
             st.dataframe(df_input.head(), use_container_width=True)
 
-            if st.button("🚀 Proses dan Prediksi Semua Data", type="primary", use_container_width=True):
-                with st.spinner("Membersihkan data dan menjalankan pipeline..."):
-                    
-                    # PANGGIL FUNGSI PREPROCESSING DARI UTILS
-                    df_ready_for_pipeline = preprocess_input_for_pipeline(df_input.copy())
-
-                    # PREDIKSI LANGSUNG
-                    predictions = pipeline.predict(df_ready_for_pipeline)
-                    
-                    # Buat dataframe output dengan data asli dan hasil prediksi
-                    df_output = df_input.copy()
-                    df_output['hasil_prediksi'] = predictions
-                    
-                    st.session_state['processed_df_collective'] = df_output
+            if df_input.empty:
+                st.warning("File tidak berisi data pasien. Isi minimal satu baris di bawah header sesuai template.")
+            elif st.button("🚀 Proses dan Prediksi Semua Data", type="primary", use_container_width=True):
+                st.session_state.pop('processed_df_collective', None)
+                st.session_state.pop('processed_hash_collective', None)
+                tutup_stream(st.session_state.pop('processed_stream_collective', None))
+                st.session_state['processed_model_collective'] = model_aktif
+
+                if mode_streaming:
+                    progress_text = st.empty()
+                    with st.spinner("Membersihkan data dan menjalankan pipeline per bagian..."):
+                        hasil_stream = proses_streaming(
+                            uploaded_file, scorer, model_aktif,
+                            progress_callback=lambda n: progress_text.write(f"{n:,} baris selesai diproses...")
+                        )
+                    progress_text.empty()
+                    if hasil_stream['jumlah_baris'] == 0:
+                        tutup_stream(hasil_stream)
+                        st.warning("File tidak berisi data pasien. Isi minimal satu baris di bawah header sesuai template.")
+                    else:
+                        st.session_state['processed_stream_collective'] = hasil_stream
+                        tambah('kolektif.baris_diprediksi', hasil_stream['jumlah_baris'])
+                else:
+                    with st.spinner("Membersihkan data dan menjalankan pipeline..."):
+                        
+                        # PREPROCESSING + PREDIKSI (paralel per shard untuk file besar)
+                        with ukur('kolektif.scoring'):
+                            predictions, alasan = scorer.score(df_input, model_aktif.model, model_aktif.path,
+                                                               dengan_alasan=True)
+                        tambah('kolektif.baris_diprediksi', len(df_input))
+                        
+                        # Buat dataframe output dengan data asli dan hasil prediksi
+                        # (df_input tidak dipakai lagi, jadi tidak perlu disalin)
+                        df_output = df_input
+                        df_output['hasil_prediksi'] = predictions
+                        df_output['alasan'] = alasan
+                        
+                        st.session_state['processed_df_collective'] = df_output
+                        st.session_state['processed_hash_collective'] = hash_hasil(df_output)
 
         except Exception as e:
             st.error(f"Terjadi error saat membaca atau memproses file: {e}")
             st.warning("Pastikan format file dan nama kolom sudah sesuai dengan template.")
 
     # --- Tampilkan hasil ---
-    if 'processed_df_collective' in st.session_state:
-        df_output = st.session_state['processed_df_collective']
+    hasil_stream = st.session_state.get('processed_stream_collective')
+    if 'processed_df_collective' in st.session_state or hasil_stream is not None:
+        if hasil_stream is not None:
+            df_output = hasil_stream['pratinjau']
+            ringkasan = hasil_stream['ringkasan']
+        else:
+            df_output = st.session_state['processed_df_collective']
+            ringkasan = ringkasan_tersimpan(st.session_state['processed_hash_collective'], df_output)
+        # Versi model yang menghasilkan prediksi ini (bisa lebih lama dari model aktif)
+        model_hasil = st.session_state.get('processed_model_collective', model_aktif)
         
         st.subheader("2. Hasil Klasifikasi")
+        st.caption(f"Diprediksi dengan model versi {model_hasil.versi}. Kolom 'alasan' berisi syarat-syarat "
+                   "pada jalur keputusan model yang menghasilkan tingkat risiko tiap pasien.")
+        if hasil_stream is not None:
+            st.caption(f"Menampilkan {len(df_output):,} baris pertama dari {hasil_stream['jumlah_baris']:,} baris. Unduh file hasil untuk data lengkap.")
         st.dataframe(df_output, use_container_width=True)
 
         col_dl, col_save = st.columns(2)
         with col_dl:
-            output_buffer = io.BytesIO()
-            df_output.to_csv(output_buffer, index=False, encoding='utf-8')
-            output_buffer.seek(0)
-            st.download_button("Unduh Hasil Prediksi (.csv)", data=output_buffer, file_name='hasil_prediksi_kolektif.csv', mime='text/csv', use_container_width=True)
+            # Mode streaming hanya menghasilkan CSV (file sementara yang ditulis per chunk)
+            pilihan_format = ["CSV", "Parquet"] if ADA_PYARROW and hasil_stream is None else ["CSV"]
+            format_unduhan = st.radio("Format unduhan", pilihan_format, horizontal=True)
+            if hasil_stream is not None:
+                # Hasil lengkap sudah berupa file CSV sementara; dibaca saat tombol diklik saja
+                output_buffer = unduhan_stream(hasil_stream)
+            elif format_unduhan == "Parquet":
+                with ukur('kolektif.ekspor_parquet'):
+                    output_buffer = hasil_ke_parquet(df_output)
+            else:
+                output_buffer = io.BytesIO()
+                with ukur('kolektif.ekspor_csv'):
+                    df_output.to_csv(output_buffer, index=False, encoding='utf-8')
+            if hasil_stream is None:
+                output_buffer.seek(0)
+            if format_unduhan == "Parquet":
+                st.download_button("Unduh Hasil Prediksi (.parquet)", data=output_buffer, file_name='hasil_prediksi_kolektif.parquet',
+                                   mime='application/vnd.apache.parquet', use_container_width=True)
+            else:
+                st.download_button("Unduh Hasil Prediksi (.csv)", data=output_buffer, file_name='hasil_prediksi_kolektif.csv', mime='text/csv', use_container_width=True)
         
         with col_save:
             if st.button("Simpan Semua Hasil ke Database", use_container_width=True, type="secondary"):
-                with st.spinner("Menyimpan semua data ke riwayat..."):
-                    success_count = 0
-                    fail_count = 0
-                    for index, row in df_output.iterrows():
-                        data_pasien = row.to_dict()
-                        if 'tekanan_darah' in data_pasien and isinstance(data_pasien['tekanan_darah'], str):
-                            parts = data_pasien['tekanan_darah'].split('/')
-                            data_pasien['tekanan_sistolik'] = parts[0]
-                            data_pasien['tekanan_diastolik'] = parts[1]
-                        is_saved, message = save_prediction_to_db(data_pasien)
-                        if is_saved: success_count += 1
-                        else: fail_count += 1
+                progress_bar = st.progress(0.0, text="Menyimpan semua data ke riwayat...")
+                def update_progress(chunk_ke, jumlah_chunk, jumlah_tersimpan):
+                    progress_bar.progress(chunk_ke / jumlah_chunk, text=f"Batch {chunk_ke}/{jumlah_chunk} selesai, {jumlah_tersimpan} data tersimpan...")
+
+                # Disimpan per batch (executemany), bukan satu koneksi + commit per baris
+                with ukur('kolektif.simpan_db'):
+                    if hasil_stream is not None:
+                        # Baca ulang file hasil per chunk agar data lengkap tidak pernah dimuat sekaligus
+                        success_count, failed_rows, jumlah_total = 0, [], hasil_stream['jumlah_baris']
+                        with hasil_stream['kunci']:
+                            hasil_stream['file'].seek(0)
+                            for df_chunk in pd.read_csv(hasil_stream['file'], chunksize=BARIS_PER_CHUNK):
+                                tersimpan, gagal = save_predictions_bulk(df_chunk, versi_model=model_hasil.versi)
+                                success_count += tersimpan
+                                failed_rows.extend(gagal)
+                                selesai = df_chunk.index[-1] + 1
+                                progress_bar.progress(selesai / jumlah_total, text=f"{selesai:,}/{jumlah_total:,} baris diproses, {success_count:,} data tersimpan...")
+                    else:
+                        success_count, failed_rows = save_predictions_bulk(df_output, progress_callback=update_progress,
+                                                                           versi_model=model_hasil.versi)
+                progress_bar.empty()
                 st.success(f"Penyimpanan Selesai! {success_count} data berhasil disimpan.")
-                if fail_count > 0: st.warning(f"{fail_count} data gagal disimpan.")
+                if failed_rows:
+                    st.warning(f"{len(failed_rows)} data gagal disimpan.")
+                    df_gagal = pd.DataFrame(failed_rows, columns=['baris', 'pesan_error'])
+                    st.dataframe(df_gagal.head(100), use_container_width=True, hide_index=True)
 
         st.divider()
         
@@ -137,23 +535,7 @@ def show():
         st.header("📊 Visualisasi & Analisis Data")
 
         # --- VISUALISASI 1: Distribusi Tingkat Risiko (Bar Chart) ---
-        st.subheader("Distribusi Tingkat Risiko")
-        risk_counts = df_output['hasil_prediksi'].value_counts().reset_index()
-        risk_counts.columns = ['Tingkat Risiko', 'Jumlah Pasien']
-        
-        fig_bar = px.bar(
-            risk_counts, 
-            x='Tingkat Risiko', 
-            y='Jumlah Pasien',
-            title='Jumlah Pasien per Kategori Risiko',
-            text='Jumlah Pasien',  # Menampilkan angka di atas bar
-            color='Tingkat Risiko',
-            color_discrete_map={'KRR': '#28a745', 'KRT': '#ffc107', 'KRST': '#dc3545'},
-            labels={'Tingkat Risiko': 'Kategori Risiko', 'Jumlah Pasien': 'Jumlah Pasien'}
-        )
-        fig_bar.update_traces(textposition='outside')
-        st.plotly_chart(fig_bar, use_container_width=True)
-
+        tampilkan_distribusi_risiko(ringkasan)
 
         # --- VISUALISASI 2: Faktor Risiko Paling Berpengaruh (Feature Importance) ---
         st.subheader("Faktor Risiko Paling Berpengaruh")
@@ -162,119 +544,23 @@ def show():
         Semakin panjang bar, semakin penting faktor tersebut.
         """)
 
-        # Ekstrak model Decision Tree dari dalam pipeline
-        model = pipeline.named_steps['classifier']
-        
-        # Buat DataFrame untuk feature importance
-        importance_df = pd.DataFrame({
-            'Fitur': feature_names,
-            'Tingkat Kepentingan': model.feature_importances_
-        }).sort_values(by='Tingkat Kepentingan', ascending=False).head(10) # Ambil 10 teratas
-
-        fig_importance = px.bar(
-            importance_df,
-            x='Tingkat Kepentingan',
-            y='Fitur',
-            orientation='h', # Membuatnya jadi horizontal bar chart
-            title='10 Faktor Paling Penting dalam Prediksi',
-            text='Tingkat Kepentingan',
-            labels={'Fitur': 'Faktor Risiko', 'Tingkat Kepentingan': 'Tingkat Kepentingan (%)'}
-        )
-        fig_importance.update_traces(texttemplate='%{text:.2%}', textposition='outside')
-        fig_importance.update_yaxes(categoryorder='total ascending') # Urutkan dari bawah ke atas
-        st.plotly_chart(fig_importance, use_container_width=True)
+        # Importance dari manifest versi model yang menghasilkan prediksi di atas
+        with ukur('render.importance'):
+            fig_importance = px.bar(
+                tabel_importance(model_hasil.versi, model_hasil.manifest),
+                x='Tingkat Kepentingan',
+                y='Fitur',
+                orientation='h', # Membuatnya jadi horizontal bar chart
+                title='10 Faktor Paling Penting dalam Prediksi',
+                text='Tingkat Kepentingan',
+                labels={'Fitur': 'Faktor Risiko', 'Tingkat Kepentingan': 'Tingkat Kepentingan (%)'}
+            )
+            fig_importance.update_traces(texttemplate='%{text:.2%}', textposition='outside')
+            fig_importance.update_yaxes(categoryorder='total ascending') # Urutkan dari bawah ke atas
+            st.plotly_chart(fig_importance, use_container_width=True)
 
         # --- VISUALISASI 3: Analisis Risiko Berdasarkan Faktor Demografis ---
-        st.subheader("Analisis Risiko Berdasarkan Faktor Demografis")
-        
-        # --- Fungsi Helper untuk membuat kategori umur & gravida ---
-        def get_age_group(age):
-            if age < 20:
-                return "< 20 Tahun"
-            elif 20 <= age <= 35:
-                return "20-35 Tahun (Optimal)"
-            else:
-                return "> 35 Tahun"
-
-        def get_gravida_group(gravida):
-            if gravida == 1:
-                return "1 (Primigravida)"
-            elif 2 <= gravida <= 4:
-                return "2-4"
-            else:
-                return "> 4 (Grande Multigravida)"
-
-        # --- LANGKAH KUNCI YANG DIPERBAIKI ---
-        # Buat salinan DataFrame dan PASTIKAN TIPE DATA BENAR sebelum apply
-        df_viz = df_output.copy()
-
-        # Konversi 'umur_ibu' ke numerik, ganti error dengan NaN lalu 0
-        df_viz['umur_ibu'] = pd.to_numeric(df_viz['umur_ibu'], errors='coerce').fillna(0)
-
-        # Ekstrak angka dari 'gravida' dan konversi ke numerik
-        df_viz['gravida'] = pd.to_numeric(df_viz['gravida'].astype(str).str.extract(r'(\d+)', expand=False), errors='coerce').fillna(0)
-        # ------------------------------------
-
-        # Sekarang aman untuk membuat kolom kelompok
-        df_viz['kelompok_umur'] = df_viz['umur_ibu'].apply(get_age_group)
-        df_viz['kelompok_gravida'] = df_viz['gravida'].apply(get_gravida_group)
-
-        # --- Membuat Visualisasi dengan Pilihan (Tidak ada perubahan di sini) ---
-        st.write("Pilih faktor demografis untuk dianalisis:")
-        
-        analysis_option = st.selectbox(
-            "Analisis Berdasarkan:",
-            ("Kelompok Umur", "Jumlah Kehamilan (Gravida)"),
-            label_visibility="collapsed"
-        )
-
-        if analysis_option == "Kelompok Umur":
-            # Hitung jumlah untuk setiap kombinasi kelompok umur dan hasil prediksi
-            df_grouped = df_viz.groupby(['kelompok_umur', 'hasil_prediksi']).size().reset_index(name='jumlah')
-            
-            # Buat Grouped Bar Chart
-            fig_demo = px.bar(
-                df_grouped,
-                x='kelompok_umur',
-                y='jumlah',
-                color='hasil_prediksi',
-                barmode='group', # Ini yang membuat chart menjadi berkelompok
-                title='Distribusi Risiko Berdasarkan Kelompok Umur',
-                labels={
-                    'kelompok_umur': 'Kelompok Umur',
-                    'jumlah': 'Jumlah Pasien',
-                    'hasil_prediksi': 'Tingkat Risiko'
-                },
-                color_discrete_map={'KRR': '#28a745', 'KRT': '#ffc107', 'KRST': '#dc3545'},
-                text='jumlah' # Menampilkan angka di atas bar
-            )
-            fig_demo.update_traces(textposition='outside')
-            st.plotly_chart(fig_demo, use_container_width=True)
-
-        elif analysis_option == "Jumlah Kehamilan (Gravida)":
-            # Hitung jumlah untuk setiap kombinasi kelompok gravida dan hasil prediksi
-            df_grouped = df_viz.groupby(['kelompok_gravida', 'hasil_prediksi']).size().reset_index(name='jumlah')
-
-            # Buat Grouped Bar Chart
-            fig_demo = px.bar(
-                df_grouped,
-                x='kelompok_gravida',
-                y='jumlah',
-                color='hasil_prediksi',
-                barmode='group',
-                title='Distribusi Risiko Berdasarkan Jumlah Kehamilan',
-                labels={
-                    'kelompok_gravida': 'Kelompok Jumlah Kehamilan',
-                    'jumlah': 'Jumlah Pasien',
-                    'hasil_prediksi': 'Tingkat Risiko'
-                },
-                color_discrete_map={'KRR': '#28a745', 'KRT': '#ffc107', 'KRST': '#dc3545'},
-                text='jumlah'
-            )
-            fig_demo.update_traces(textposition='outside')
-            # Urutkan sumbu x secara logis
-            fig_demo.update_xaxes(categoryorder='array', categoryarray=['1 (Primigravida)', '2-4', '> 4 (Grande Multigravida)'])
-            st.plotly_chart(fig_demo, use_container_width=True)
+        tampilkan_analisis_demografis(ringkasan)
 
     else:
         st.info("Silakan unggah file Anda di atas untuk memulai analisis.")
\ No newline at end of file
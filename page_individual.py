@@ -1,12 +1,57 @@
 # ======================================================================
 # --- File: page_individual.py (VERSI FINAL & LENGKAP) ---
 # ======================================================================
+import time
+
 import streamlit as st
-import pandas as pd
-import joblib
 
 # Impor fungsi yang kita butuhkan dari utils.py
-from utils import save_prediction_to_db, preprocess_input_for_pipeline
+from utils import simpan_prediksi_tertunda, predict_one, klasifikasi_tekanan_darah
+from prediction_cache import PredictionCache
+from antrian_simpan import AntrianSimpan, STATUS_MENUNGGU, STATUS_TERSIMPAN, STATUS_TERTUNDA
+from model_registry import get_registry
+from instrumentasi import ukur, tambah
+
+@st.cache_resource
+def get_prediction_cache():
+    """Satu cache prediksi untuk semua sesi dalam proses ini."""
+    return PredictionCache(maxsize=4096)
+
+@st.cache_resource
+def get_antrian_simpan():
+    """Satu antrian write-behind (dan satu thread penulis) untuk semua sesi dalam proses ini."""
+    return AntrianSimpan(simpan_prediksi_tertunda)
+
+BATAS_TUNGGU_STATUS = 5.0   # detik menunggu status simpan sebelum halaman berhenti memeriksa
+
+def tampilkan_status_simpan(wadah, antrian, id_simpan):
+    """Memperbarui `wadah` sampai record tersimpan, masuk jurnal, atau batas tunggu habis."""
+    batas = time.monotonic() + BATAS_TUNGGU_STATUS
+    status = antrian.status(id_simpan)
+    while status == STATUS_MENUNGGU and time.monotonic() < batas:
+        time.sleep(0.1)
+        status = antrian.status(id_simpan)
+    if status == STATUS_TERSIMPAN:
+        wadah.success("Data berhasil disimpan ke riwayat.")
+    elif status == STATUS_TERTUNDA:
+        wadah.warning("Database sedang tidak dapat dihubungi. Data disimpan sementara dan akan "
+                      "masuk ke riwayat secara otomatis.")
+    elif status == STATUS_MENUNGGU:
+        wadah.info("Data masih disimpan di latar belakang dan akan muncul di riwayat.")
+    else:
+        wadah.error("Gagal menyimpan: Terjadi error pada database.")
+
+def kunci_prediksi(data):
+    """
+    Kunci cache dari input form yang sudah dinormalisasi. Tekanan darah
+    diwakili kategorinya (hanya itu yang dilihat model), sehingga input yang
+    hanya berbeda sedikit tekanan darahnya tetap memakai hasil yang sama.
+    """
+    return (
+        int(data['umur_ibu']), int(data['gravida']), int(data['umur_kehamilan']), float(data['tinggi_badan']),
+        klasifikasi_tekanan_darah(data['tekanan_sistolik'], data['tekanan_diastolik']),
+        data['penyakit_anemia'], data['posisi_janin'], data['hasil_tes_VDRL'], data['hasil_tes_HbsAg'],
+    )
 
 def show():
     """
@@ -17,19 +62,13 @@ def show():
     st.title("📝 Pemeriksaan Risiko Individual")
     st.info("Silakan isi semua data pasien di bawah ini untuk prediksi.")
 
-    # --- Memuat Pipeline Lengkap ---
-    @st.cache_resource
-    def load_full_pipeline():
-        try:
-            # Memuat pipeline yang sudah mencakup semua langkah preprocessing
-            pipeline = joblib.load('pregnancy_risk_full_pipeline.pkl')
-            return pipeline
-        except FileNotFoundError:
-            st.error("File 'pregnancy_risk_full_pipeline.pkl' tidak ditemukan. Mohon jalankan skrip 'train_model.py'.")
-            return None
-
-    pipeline = load_full_pipeline()
-    if not pipeline:
+    # --- Memuat Model ---
+    # Registry dipakai bersama semua sesi; model baru dari train_model.py
+    # ditukar otomatis tanpa restart. Snapshot ini dipakai sampai run selesai.
+    try:
+        model_aktif = get_registry().aktif()
+    except FileNotFoundError as e:
+        st.error(f"{e} Mohon jalankan skrip 'train_model.py'.")
         st.stop()
 
     # --- Formulir Input Data Pasien ---
@@ -82,25 +121,34 @@ def show():
                     'tekanan_sistolik': tekanan_sistolik,
                     'tekanan_diastolik': tekanan_diastolik
                 }
-                input_df = pd.DataFrame([raw_input_data])
-                
-                # PANGGIL FUNGSI PREPROCESSING DARI UTILS
-                df_ready_for_pipeline = preprocess_input_for_pipeline(input_df)
-                
-                # PREDIKSI LANGSUNG PADA DATA YANG SUDAH SIAP
-                prediction = pipeline.predict(df_ready_for_pipeline)
-                hasil_prediksi = prediction[0]
+
+                # Input yang sama (untuk versi model yang sama) diambil dari cache.
+                # Jika belum ada, predict_one memakai aturan cleaning yang sama dengan
+                # preprocess_input_for_pipeline tanpa membangun DataFrame.
+                with ukur('individual.prediksi'):
+                    hasil_prediksi = get_prediction_cache().get_or_compute(
+                        kunci_prediksi(raw_input_data), model_aktif.versi,
+                        lambda: predict_one(raw_input_data, model_aktif.model)
+                    )
+                tambah('individual.prediksi')
                 
                 # Siapkan data untuk disimpan ke database
                 data_to_save = raw_input_data.copy()
                 data_to_save['nama_pasien'] = nama_pasien_value
                 data_to_save['hasil_prediksi'] = hasil_prediksi
-                is_saved, message = save_prediction_to_db(data_to_save)
+                data_to_save['versi_model'] = model_aktif.versi
+                # Penyimpanan ditulis thread antrian; hasil tidak menunggu database
+                id_simpan = None
+                if st.session_state.get('logged_in'):
+                    id_simpan = get_antrian_simpan().kirim(data_to_save, st.session_state.get('user_id'))
 
             # Tampilkan hasil
             st.subheader("Hasil Prediksi", divider='rainbow')
-            if is_saved: st.success(message)
-            else: st.warning(message)
+            wadah_status = st.empty()
+            if id_simpan is None: wadah_status.warning("Gagal menyimpan: Pengguna tidak login.")
+            else: wadah_status.info("Menyimpan ke riwayat...")
             if hasil_prediksi == 'KRR': st.success("Risiko Rendah (KRR)")
             elif hasil_prediksi == 'KRT': st.warning("Risiko Tinggi (KRT)")
-            else: st.error("Risiko Sangat Tinggi (KRST)")
\ No newline at end of file
+            else: st.error("Risiko Sangat Tinggi (KRST)")
+            if id_simpan is not None:
+                tampilkan_status_simpan(wadah_status, get_antrian_simpan(), id_simpan)
\ No newline at end of file
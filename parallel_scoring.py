@@ -0,0 +1,160 @@
+# ======================================================================
+# --- File: parallel_scoring.py ---
+# ======================================================================
+# Mesin scoring paralel untuk prediksi kolektif. DataFrame mentah dipecah
+# menjadi beberapa shard, lalu setiap shard menjalankan preprocessing dan
+# predict di process pool yang hidup terus (dibuat sekali per proses
+# Streamlit). Setiap worker memuat model sekali saat start, dan memuat versi
+# baru hanya ketika shard pertama untuk versi itu datang (lihat model_registry).
+#
+# File kecil tetap diproses di proses utama, karena biaya mengirim shard ke
+# worker lebih besar daripada waktu prediksinya. Mode streaming memakai
+# score_stream(): ambang berlaku untuk total baris file, dan setiap chunk
+# menjadi satu tugas di pool sehingga chunk berikutnya sudah dikerjakan
+# selagi hasil chunk sebelumnya ditulis.
+import itertools
+import math
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import preprocess_input_for_pipeline
+from compiled_model import load_compiled_model
+from instrumentasi import ukur
+
+AMBANG_PARALEL = 200_000  # jumlah baris minimum sebelum memakai process pool
+SHARD_PER_WORKER = 4      # shard per worker agar beban tetap rata bila ada shard yang lambat
+SHARD_MIN = 25_000
+SHARD_MAKS = 250_000
+
+# Kolom mentah yang dibaca preprocessing untuk membentuk kategori_tekanan_darah
+KOLOM_TEKANAN_DARAH = ['tekanan_darah', 'tekanan_sistolik', 'tekanan_diastolik']
+
+# Model milik proses worker per path artefak. Maksimal dua versi disimpan
+# (versi lama dan baru) selama penukaran model berlangsung.
+_MODEL_WORKER = {}
+
+def _model_worker(model_path):
+    model = _MODEL_WORKER.get(model_path)
+    if model is None:
+        if len(_MODEL_WORKER) >= 2:
+            _MODEL_WORKER.pop(next(iter(_MODEL_WORKER)))
+        model = _MODEL_WORKER[model_path] = load_compiled_model(model_path)
+    return model
+
+def _init_worker(model_path):
+    _model_worker(model_path)
+
+def _daun_shard(df_raw, model_path):
+    # Worker hanya mengembalikan indeks daun (int64, murah dikirim balik);
+    # kelas dan alasan diambil dari daun di proses utama
+    return _model_worker(model_path).daun(preprocess_input_for_pipeline(df_raw))
+
+def ukuran_shard(jumlah_baris, workers):
+    """Ukuran shard: sekitar SHARD_PER_WORKER shard per worker, dibatasi SHARD_MIN..SHARD_MAKS."""
+    ukuran = math.ceil(jumlah_baris / (workers * SHARD_PER_WORKER))
+    return min(max(ukuran, SHARD_MIN), SHARD_MAKS)
+
+class ParallelScorer:
+    """
+    Menjalankan preprocess_input_for_pipeline + predict secara paralel.
+    Hasil score() identik dengan model.predict(preprocess_input_for_pipeline(df)).
+    Dengan dengan_alasan=True, score() mengembalikan (prediksi, alasan), dengan
+    alasan dari model.alasan_dari_daun untuk daun yang sama.
+    Model tidak disimpan di scorer: setiap panggilan score() menyebut model
+    (dan path artefaknya untuk worker), biasanya dari snapshot model_registry.
+    """
+
+    def __init__(self, workers=None, ambang_paralel=AMBANG_PARALEL):
+        self.workers = workers or os.cpu_count() or 1
+        self.ambang_paralel = ambang_paralel
+        self._executor = None
+
+    def _get_executor(self, model_path):
+        # Dibuat saat pertama dibutuhkan. 'spawn' dipakai karena fork dari
+        # proses Streamlit yang punya banyak thread tidak aman.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_path,)
+            )
+        return self._executor
+
+    def score(self, df_raw, model, model_path, dengan_alasan=False):
+        """Prediksi untuk setiap baris df_raw (data mentah seperti file unggahan)."""
+        return self._dari_daun(self._daun(df_raw, model, model_path), model, dengan_alasan)
+
+    def score_stream(self, chunks, model, model_path, dengan_alasan=False):
+        """
+        Versi score() untuk potongan DataFrame berurutan (mode streaming).
+        Menghasilkan (chunk, hasil score() untuk chunk itu) dengan urutan yang sama.
+        Ambang paralel dihitung dari total baris, bukan per chunk: chunk
+        dikumpulkan sampai ambang tercapai, dan jika input habis lebih dulu
+        semuanya diproses di proses utama. Di atas ambang, sampai `workers`
+        chunk berikutnya sudah dikirim ke pool selagi pemanggil memproses hasil.
+        """
+        chunks = iter(chunks)
+        awal, jumlah = [], 0
+        if self.workers > 1:
+            for chunk in chunks:
+                awal.append(chunk)
+                jumlah += len(chunk)
+                if jumlah >= self.ambang_paralel:
+                    break
+        if self.workers <= 1 or jumlah < self.ambang_paralel:
+            for chunk in itertools.chain(awal, chunks):
+                yield chunk, self.score(chunk, model, model_path, dengan_alasan)
+            return
+
+        executor = self._get_executor(model_path)
+        berjalan = deque()
+        for chunk in itertools.chain(awal, chunks):
+            berjalan.append((chunk, executor.submit(_daun_shard, self._kolom_kirim(chunk, model), model_path)))
+            if len(berjalan) > self.workers:
+                yield self._tunggu(berjalan.popleft(), model, dengan_alasan)
+        while berjalan:
+            yield self._tunggu(berjalan.popleft(), model, dengan_alasan)
+
+    def _tunggu(self, tugas, model, dengan_alasan):
+        chunk, future = tugas
+        with ukur('scoring_paralel'):
+            daun = future.result()
+        return chunk, self._dari_daun(daun, model, dengan_alasan)
+
+    def _dari_daun(self, daun, model, dengan_alasan):
+        prediksi = model.kelas_dari_daun(daun)
+        if not dengan_alasan:
+            return prediksi
+        with ukur('alasan'):
+            return prediksi, model.alasan_dari_daun(daun)
+
+    def _kolom_kirim(self, df_raw, model):
+        # Hanya kolom yang dipakai model yang dikirim ke worker, agar pickling shard murah
+        kolom_input = set(model.fitur_numerik + model.onehot_kolom + KOLOM_TEKANAN_DARAH)
+        return df_raw[[col for col in df_raw.columns if col in kolom_input]]
+
+    def _daun(self, df_raw, model, model_path):
+        n = len(df_raw)
+        if self.workers <= 1 or n < self.ambang_paralel:
+            df = preprocess_input_for_pipeline(df_raw)
+            with ukur('predict'):
+                return model.daun(df)
+
+        df_kirim = self._kolom_kirim(df_raw, model)
+        ukuran = ukuran_shard(n, self.workers)
+        shards = [df_kirim.iloc[mulai:mulai + ukuran] for mulai in range(0, n, ukuran)]
+        # Timer preprocess/predict di worker tidak terlihat dari proses ini,
+        # jadi jalur paralel dicatat sebagai satu tahap
+        with ukur('scoring_paralel'):
+            hasil = self._get_executor(model_path).map(_daun_shard, shards, [model_path] * len(shards))
+            return np.concatenate(list(hasil))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
\ No newline at end of file
@@ -0,0 +1,65 @@
+# ======================================================================
+# --- File: prediction_cache.py ---
+# ======================================================================
+# Cache LRU untuk hasil prediksi individual. Input form individual berupa
+# angka bulat berbatas dan pilihan biner, jadi banyak submit yang identik.
+# Hasil yang sudah pernah dihitung dikembalikan langsung tanpa membangun
+# DataFrame maupun menjalankan preprocessing/pipeline.
+import threading
+from collections import OrderedDict
+
+class PredictionCache:
+    """
+    Cache LRU thread-safe yang dipakai bersama oleh semua sesi dalam satu proses.
+    Setiap entri terikat pada versi model (versi dari model_registry); begitu
+    versi berubah (model baru diterbitkan train_model.py) seluruh isi cache
+    dikosongkan. info() ditampilkan di panel admin.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._versi = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, versi, compute):
+        """Mengembalikan hasil untuk `key`; jika belum ada, hitung dengan compute() lalu simpan."""
+        with self._lock:
+            if versi != self._versi:
+                self._data.clear()
+                self._versi = versi
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        # Dihitung di luar lock agar sesi lain tidak ikut menunggu
+        value = compute()
+
+        with self._lock:
+            if versi == self._versi:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Statistik cache (mirip functools.lru_cache.cache_info)."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'maxsize': self.maxsize,
+                'currsize': len(self._data),
+                'versi_model': self._versi,
+            }
\ No newline at end of file
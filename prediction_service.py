@@ -0,0 +1,288 @@
+# ======================================================================
+# --- File: prediction_service.py ---
+# ======================================================================
+# Layanan HTTP/JSON (asyncio) untuk prediksi risiko kehamilan, berjalan
+# terpisah dari aplikasi Streamlit agar bisa dipanggil sistem lain (EMR).
+#
+#   GET  /health          -> status dan versi model aktif (versi_model dari manifest)
+#   POST /predict         -> body: satu record (objek JSON)
+#                            respon: {"hasil_prediksi": "KRR"}
+#   POST /predict/batch   -> body: list record, atau {"records": [...]}
+#                            respon: {"hasil_prediksi": ["KRR", "KRT", ...]}
+#
+# Format record sama dengan satu baris file unggahan kolektif atau form
+# individual (tekanan_darah "120/80" atau tekanan_sistolik/tekanan_diastolik).
+# Semua field fitur wajib ada (kecuali penyakit_anemia: kosong = Negatif,
+# sama seperti file unggahan); record yang tidak lengkap atau bertipe salah
+# ditolak dengan 422 beserta daftar field-nya, bukan diprediksi dari NaN.
+#
+# Micro-batching: request yang datang dalam selang --max-wait-ms digabung
+# menjadi satu panggilan preprocess_input_for_pipeline + predict, yang
+# dijalankan di thread/process pool sehingga event loop tidak pernah terblokir.
+#
+# Model diambil dari model_registry (models/CURRENT, atau artefak di root repo
+# jika belum ada), sama seperti aplikasi Streamlit. Setiap batch memakai
+# snapshot aktif() sehingga versi yang diterbitkan train_model.py ikut
+# dipakai tanpa restart; di mode process, setiap worker punya registry sendiri.
+#
+# Cara pakai (dari root repo):
+#   python prediction_service.py --port 8080
+#   python prediction_service.py --executor process --workers 4 --max-wait-ms 5
+# Uji beban: python benchmarks/service_loadtest.py --url http://127.0.0.1:8080
+# ======================================================================
+import argparse
+import asyncio
+import json
+import math
+import numbers
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+
+from utils import preprocess_input_for_pipeline
+from model_registry import get_registry
+
+MAKS_BODY_BYTE = 32 * 1024 * 1024
+
+# Field wajib per jenis nilai. Gravida, umur kehamilan, dan tinggi badan juga
+# boleh berupa teks seperti di file unggahan ('3rd', '25 week', "5.3''").
+FIELD_ANGKA = ['umur_ibu']
+FIELD_ANGKA_ATAU_TEKS = ['gravida', 'umur_kehamilan', 'tinggi_badan']
+FIELD_TEKS = ['penyakit_anemia', 'posisi_janin', 'hasil_tes_VDRL', 'hasil_tes_HbsAg']
+FIELD_TEKANAN_DARAH = ['tekanan_sistolik', 'tekanan_diastolik']
+# Boleh tidak ada; preprocessing mengisinya dengan "Negatif"
+FIELD_BOLEH_KOSONG = {'penyakit_anemia'}
+
+def _angka(nilai):
+    return isinstance(nilai, numbers.Real) and not isinstance(nilai, bool) and not math.isnan(nilai)
+
+def _teks(nilai):
+    return isinstance(nilai, str) and nilai.strip() != ''
+
+def validasi_record(record):
+    """
+    (field_hilang, field_tidak_valid) untuk satu record. Tekanan darah boleh
+    berupa teks 'tekanan_darah' ("120/80") atau angka sistolik dan diastolik.
+    """
+    aturan = [(FIELD_ANGKA, _angka), (FIELD_ANGKA_ATAU_TEKS, lambda v: _angka(v) or _teks(v)), (FIELD_TEKS, _teks)]
+    if 'tekanan_darah' in record:
+        aturan.append((['tekanan_darah'], _teks))
+    else:
+        aturan.append((FIELD_TEKANAN_DARAH, _angka))
+    hilang, tidak_valid = [], []
+    for daftar_field, valid in aturan:
+        for field in daftar_field:
+            if record.get(field) is None:
+                if field not in FIELD_BOLEH_KOSONG:
+                    hilang.append(field)
+            elif not valid(record[field]):
+                tidak_valid.append(field)
+    return hilang, tidak_valid
+
+def _init_worker():
+    # Registry (dan model aktifnya) dimuat sekali per proses worker, bukan per batch
+    get_registry()
+
+def _predict_batch(records):
+    """
+    Prediksi sekumpulan record (sudah lolos validasi_record) dalam satu
+    DataFrame. Record yang memakai 'tekanan_darah' dipisah dari yang memakai
+    sistolik/diastolik, karena kolom 'tekanan_darah' yang kosong akan menimpa
+    hasil sistolik/diastolik. Tinggi badan teks juga dipisah dari angka:
+    dalam kolom campuran, angka 155.0 ikut dibaca sebagai feet.inches.
+    """
+    model = get_registry().aktif().model
+    hasil = [None] * len(records)
+    kelompok = {}
+    for i, record in enumerate(records):
+        kelompok.setdefault(('tekanan_darah' in record, isinstance(record.get('tinggi_badan'), str)), []).append(i)
+    kolom_model = list(dict.fromkeys(model.fitur_numerik + model.onehot_kolom))
+    for (pakai_teks, _), indeks in kelompok.items():
+        df = pd.DataFrame.from_records([records[i] for i in indeks])
+        if not pakai_teks:
+            df = df.reindex(columns=df.columns.union(['tekanan_sistolik', 'tekanan_diastolik'], sort=False))
+        df = preprocess_input_for_pipeline(df)
+        df = df.reindex(columns=df.columns.union(kolom_model, sort=False))
+        for i, prediksi in zip(indeks, model.predict(df)):
+            hasil[i] = prediksi
+    return hasil
+
+class MicroBatcher:
+    """Mengumpulkan request yang datang berdekatan lalu memprosesnya dalam satu batch."""
+
+    def __init__(self, executor, max_wait_ms=5.0, max_batch=2048):
+        self.executor = executor
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self._queue = asyncio.Queue()
+        # Event loop hanya menyimpan weak reference ke task; referensi kuat
+        # disimpan di sini sampai task selesai agar tidak di-garbage-collect
+        self._tugas = set()
+        self.jumlah_batch = 0
+        self.jumlah_record = 0
+
+    async def submit(self, records):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n = len(batch[0][0])
+            batas_waktu = loop.time() + self.max_wait
+            while n < self.max_batch:
+                sisa = batas_waktu - loop.time()
+                if sisa <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), sisa)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                n += len(item[0])
+            # Tidak di-await: batch berikutnya bisa dikumpulkan selama batch ini diproses
+            tugas = loop.create_task(self._score(batch))
+            self._tugas.add(tugas)
+            tugas.add_done_callback(self._tugas.discard)
+
+    async def _score(self, batch):
+        loop = asyncio.get_running_loop()
+        records = [record for recs, _ in batch for record in recs]
+        self.jumlah_batch += 1
+        self.jumlah_record += len(records)
+        try:
+            hasil = await loop.run_in_executor(self.executor, _predict_batch, records)
+        except Exception:
+            # Satu record rusak jangan menggagalkan request lain di batch yang sama
+            for recs, future in batch:
+                try:
+                    future.set_result(await loop.run_in_executor(self.executor, _predict_batch, recs))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        mulai = 0
+        for recs, future in batch:
+            future.set_result(hasil[mulai:mulai + len(recs)])
+            mulai += len(recs)
+
+class PredictionService:
+    def __init__(self, batcher, registry):
+        self.batcher = batcher
+        self.registry = registry
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {
+                'status': 'ok',
+                'versi_model': self.registry.aktif().versi,
+                'jumlah_batch': self.batcher.jumlah_batch,
+                'jumlah_record': self.batcher.jumlah_record,
+            }
+        if method != 'POST' or path not in ('/predict', '/predict/batch'):
+            return 404, {'error': f'Endpoint {method} {path} tidak ditemukan.'}
+
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            return 400, {'error': 'Body bukan JSON yang valid.'}
+        if path == '/predict':
+            if not isinstance(data, dict):
+                return 400, {'error': 'Body /predict harus berupa satu objek record.'}
+            records = [data]
+        else:
+            records = data.get('records') if isinstance(data, dict) else data
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                return 400, {'error': 'Body /predict/batch harus berupa list record atau {"records": [...]}.'}
+            if not records:
+                return 200, {'hasil_prediksi': []}
+
+        tidak_lengkap = []
+        for i, record in enumerate(records):
+            hilang, tidak_valid = validasi_record(record)
+            if hilang or tidak_valid:
+                tidak_lengkap.append({'indeks': i, 'field_hilang': hilang, 'field_tidak_valid': tidak_valid})
+        if tidak_lengkap:
+            if path == '/predict':
+                return 422, {'error': 'Record tidak lengkap atau bertipe salah.', **{
+                    k: v for k, v in tidak_lengkap[0].items() if k != 'indeks'}}
+            return 422, {'error': f'{len(tidak_lengkap)} record tidak lengkap atau bertipe salah.',
+                         'record': tidak_lengkap}
+
+        try:
+            hasil = await self.batcher.submit(records)
+        except Exception as e:
+            return 422, {'error': f'Gagal memproses data: {e}'}
+        return 200, {'hasil_prediksi': hasil[0] if path == '/predict' else hasil}
+
+    async def handle(self, reader, writer):
+        """Parser HTTP/1.1 minimal (dengan keep-alive), cukup untuk request JSON."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                panjang = int(headers.get('content-length', 0))
+                if panjang > MAKS_BODY_BYTE:
+                    status, payload = 413, {'error': 'Body terlalu besar.'}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(panjang) if panjang else b''
+                    status, payload = await self.route(method, path.split('?')[0], body)
+                    keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                isi = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(isi)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + isi
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(args):
+    # Registry proses utama dipakai /health dan, di mode thread, oleh semua batch
+    registry = get_registry()
+    if args.executor == 'process':
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+
+    batcher = MicroBatcher(executor, max_wait_ms=args.max_wait_ms, max_batch=args.max_batch)
+    service = PredictionService(batcher, registry)
+    server = await asyncio.start_server(service.handle, args.host, args.port)
+    print(f"Layanan prediksi berjalan di http://{args.host}:{args.port} (model versi {registry.aktif().versi}, "
+          f"executor={args.executor}, workers={args.workers}, max_wait_ms={args.max_wait_ms})")
+    async with server:
+        await asyncio.gather(server.serve_forever(), batcher.run())
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Layanan HTTP/JSON prediksi risiko kehamilan.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="Lama maksimum menunggu request lain untuk digabung dalam satu batch.")
+    parser.add_argument('--max-batch', type=int, default=2048, help="Jumlah record maksimum per batch.")
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    asyncio.run(serve(parse_args()))
\ No newline at end of file
@@ -0,0 +1,83 @@
+# ======================================================================
+# --- File: resampling.py ---
+# ======================================================================
+# Pilihan tahap resampling untuk pipeline training (train_model.py
+# --resampling). Semua pilihan memakai langkah 'resampling' di pipeline
+# yang sama sehingga hasilnya ikut di-cache per fold lewat --cache-dir.
+#
+#   smote           : SMOTE dengan kNN eksak bawaan imblearn (default, sama
+#                     dengan artefak yang sudah ada)
+#   smote_balltree  : SMOTE dengan index ball tree
+#   smote_unik      : SMOTE dengan kNN yang dicari di baris unik saja. Fitur
+#                     kita (one-hot + empat integer berentang kecil) hanya
+#                     punya sedikit kombinasi berbeda, jadi ratusan ribu baris
+#                     cukup dicari di beberapa ribu titik. Berbeda dengan SMOTE
+#                     eksak, duplikat tidak dihitung sebagai tetangga.
+#   class_weight    : tanpa resampling, DecisionTree dengan class_weight='balanced'
+# ======================================================================
+import numpy as np
+from scipy.sparse import csr_matrix
+from imblearn.over_sampling import SMOTE
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import NearestNeighbors
+
+PILIHAN_RESAMPLING = ['smote', 'smote_balltree', 'smote_unik', 'class_weight']
+K_TETANGGA = 5
+
+class TetanggaUnik(BaseEstimator):
+    """
+    Pengganti NearestNeighbors untuk SMOTE: fit dan query dilakukan pada
+    baris unik, lalu indeks dipetakan kembali ke baris asli (baris pertama
+    dengan nilai yang sama). Kolom pertama hasil kneighbors selalu titik itu
+    sendiri, seperti yang diharapkan SMOTE.
+    """
+
+    def __init__(self, n_neighbors=K_TETANGGA + 1, algorithm='auto'):
+        self.n_neighbors = n_neighbors
+        self.algorithm = algorithm
+
+    def fit(self, X, y=None):
+        X = np.asarray(X, dtype=float)
+        self.n_samples_fit_ = len(X)
+        self.unik_, self.indeks_wakil_ = np.unique(X, axis=0, return_index=True)
+        self.nn_ = NearestNeighbors(n_neighbors=min(self.n_neighbors, len(self.unik_)),
+                                    algorithm=self.algorithm).fit(self.unik_)
+        return self
+
+    def kneighbors(self, X=None, n_neighbors=None, return_distance=True):
+        n_neighbors = n_neighbors or self.n_neighbors
+        X = self.unik_ if X is None else np.asarray(X, dtype=float)
+        unik, invers = np.unique(X, axis=0, return_inverse=True)
+        k = min(n_neighbors, len(self.unik_))
+        jarak, indeks = self.nn_.kneighbors(unik, n_neighbors=k)
+        if k < n_neighbors:
+            # Titik unik lebih sedikit dari k: sisa tetangga diisi titik itu sendiri
+            tambahan = n_neighbors - k
+            jarak = np.hstack([jarak, np.repeat(jarak[:, :1], tambahan, axis=1)])
+            indeks = np.hstack([indeks, np.repeat(indeks[:, :1], tambahan, axis=1)])
+        invers = invers.ravel()
+        indeks = self.indeks_wakil_[indeks][invers]
+        return (jarak[invers], indeks) if return_distance else indeks
+
+    def kneighbors_graph(self, X=None, n_neighbors=None, mode='connectivity'):
+        n_neighbors = n_neighbors or self.n_neighbors
+        jarak, indeks = self.kneighbors(X, n_neighbors)
+        nilai = np.ones(indeks.size) if mode == 'connectivity' else jarak.ravel()
+        baris = np.repeat(np.arange(len(indeks)), n_neighbors)
+        return csr_matrix((nilai, (baris, indeks.ravel())), shape=(len(indeks), self.n_samples_fit_))
+
+def buat_resampler(nama, random_state=42):
+    """Langkah resampling untuk pipeline, atau None jika `nama` tidak melakukan resampling."""
+    if nama == 'smote':
+        return SMOTE(random_state=random_state, k_neighbors=K_TETANGGA)
+    if nama == 'smote_balltree':
+        return SMOTE(random_state=random_state,
+                     k_neighbors=NearestNeighbors(n_neighbors=K_TETANGGA + 1, algorithm='ball_tree'))
+    if nama == 'smote_unik':
+        return SMOTE(random_state=random_state, k_neighbors=TetanggaUnik())
+    if nama == 'class_weight':
+        return None
+    raise ValueError(f"Resampling '{nama}' tidak dikenal (pilihan: {', '.join(PILIHAN_RESAMPLING)}).")
+
+def class_weight_untuk(nama):
+    return 'balanced' if nama == 'class_weight' else None
\ No newline at end of file
@@ -1,10 +1,27 @@
 
 # ======================================================================
+# Cara pakai:
+#   python train_model.py                                  # sama seperti sebelumnya (serial)
+#   python train_model.py --n-jobs -1 --cache-dir .cache_training
+#       -> GridSearchCV di process pool, hasil preprocessor+SMOTE per fold di-cache
+#          di disk sehingga untuk setiap kombinasi parameter hanya tree yang di-fit ulang
+#   python train_model.py --search halving --n-jobs -1 --cache-dir .cache_training
+#       -> successive halving, berguna untuk grid yang lebih besar
+#   python train_model.py --resampling smote_unik --bandingkan-resampling
+#       -> pilihan tahap resampling (lihat resampling.py); --bandingkan-resampling
+#          mencetak waktu fit dan F1-macro CV semua pilihan untuk parameter terbaik
+#   python train_model.py --data snapshot
+#       -> ekstrak baris data_pasien yang baru (lihat ekstraksi_data.py) lalu
+#          training dari snapshot Parquet, bukan dari pregnancy-dataset.csv
+# ======================================================================
+import argparse
+import time
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (mengaktifkan HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV, HalvingGridSearchCV, cross_validate
 from sklearn.tree import DecisionTreeClassifier
-from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline
 import pickle
 from sklearn.compose import ColumnTransformer
@@ -13,106 +30,276 @@ import joblib
 
 # Impor fungsi yang dibutuhkan dari utils.py
 from utils import preprocess_input_for_pipeline
-
-print("Memulai proses training model pipeline...")
+from compiled_model import export_compiled_model
+from model_manifest import buat_manifest, simpan_manifest, MANIFEST_PATH
+from model_registry import terbitkan_model
+from resampling import PILIHAN_RESAMPLING, buat_resampler, class_weight_untuk
 
 # --- FUNGSI PEMBUATAN TARGET (LOGIKA BISNIS ANDA) ---
-def realistic_labeling(df_cleaned):
+# Bobot skor per faktor risiko. Skor dasar 2, lalu ditambah bobot untuk
+# setiap faktor yang terpenuhi.
+SKOR_DASAR = 2
+LABEL_RISIKO = np.array(['KRR', 'KRT', 'KRST'], dtype=object)
+# Noise ketidakpastian: -1/0/+1 dengan peluang 15%/70%/15%
+NILAI_NOISE = np.array([-1, 0, 1])
+PELUANG_NOISE = np.array([0.15, 0.70, 0.15])
+
+def _noise_ketidakpastian(n, seed, parity):
+    """
+    Menarik n nilai noise sekaligus.
+    - parity=False: memakai np.random.Generator (default_rng(seed)).
+    - parity=True : mereproduksi PERSIS urutan lama, yaitu np.random.seed(seed)
+      lalu np.random.choice(...) sekali per baris. choice() versi legacy menarik
+      satu random_sample() per panggilan lalu mencari posisinya di CDF, jadi
+      random_sample(n) dalam satu batch menghasilkan urutan yang sama.
+    """
+    if parity:
+        rs = np.random.RandomState(seed)
+        cdf = PELUANG_NOISE.cumsum()
+        cdf /= cdf[-1]
+        return NILAI_NOISE[cdf.searchsorted(rs.random_sample(n), side='right')]
+    rng = np.random.default_rng(seed)
+    return rng.choice(NILAI_NOISE, size=n, p=PELUANG_NOISE)
+
+def realistic_labeling(df_cleaned, seed=42, parity=False):
+    """
+    Membuat skor_risiko dan label_risiko untuk seluruh baris sekaligus
+    (tanpa iterrows). Skor dibangun dari mask boolean per faktor risiko,
+    lalu noise ketidakpastian ditarik dalam satu batch.
+
+    Hasilnya reproducible untuk seed yang sama. Dengan parity=True label
+    yang dihasilkan identik dengan versi per-baris lama (np.random.seed(42)
+    + np.random.choice per baris), dipakai agar model yang dilatih ulang
+    tetap sama dengan artefak yang sudah ada.
+    """
     df = df_cleaned.copy()
-    np.random.seed(42)
-    labels, scores = [], []
-    for _, row in df.iterrows():
-        score = 2
-        if float(row['umur_ibu']) < 18 or float(row['umur_ibu']) > 35: score += 4
-        if float(row['gravida']) >= 4: score += 4
-        if float(row['umur_kehamilan']) > 42: score += 4
-        if float(row['tinggi_badan']) < 145: score += 4
-        if row['penyakit_anemia'] == 'Positif': score += 4
-        if row['hasil_tes_VDRL'] == 'Positif': score += 4
-        if row['hasil_tes_HbsAg'] == 'Positif': score += 4
-        if row['kategori_tekanan_darah'] == 'Hipertensi Stage 1': score += 6
-        if row['kategori_tekanan_darah'] == 'Hipertensi Stage 2': score += 8
-        if row['posisi_janin'] == 'Abnormal': score += 8
-        uncertainty_magnitude = np.random.choice([-1, 0, 1], p=[0.15, 0.70, 0.15])
-        score += uncertainty_magnitude
-        score = max(2, score)
-        scores.append(score)
-        if score <= 5: labels.append('KRR')
-        elif score <= 10: labels.append('KRT')
-        else: labels.append('KRST')
-    df['skor_risiko'] = scores
-    df['label_risiko'] = labels
+    umur_ibu = df['umur_ibu'].astype(float)
+    gravida = df['gravida'].astype(float)
+    umur_kehamilan = df['umur_kehamilan'].astype(float)
+    tinggi_badan = df['tinggi_badan'].astype(float)
+
+    score = np.full(len(df), SKOR_DASAR, dtype=np.int64)
+    score += 4 * ((umur_ibu < 18) | (umur_ibu > 35)).to_numpy()
+    score += 4 * (gravida >= 4).to_numpy()
+    score += 4 * (umur_kehamilan > 42).to_numpy()
+    score += 4 * (tinggi_badan < 145).to_numpy()
+    score += 4 * (df['penyakit_anemia'] == 'Positif').to_numpy()
+    score += 4 * (df['hasil_tes_VDRL'] == 'Positif').to_numpy()
+    score += 4 * (df['hasil_tes_HbsAg'] == 'Positif').to_numpy()
+    score += 6 * (df['kategori_tekanan_darah'] == 'Hipertensi Stage 1').to_numpy()
+    score += 8 * (df['kategori_tekanan_darah'] == 'Hipertensi Stage 2').to_numpy()
+    score += 8 * (df['posisi_janin'] == 'Abnormal').to_numpy()
+
+    score += _noise_ketidakpastian(len(df), seed, parity)
+    score = np.maximum(score, SKOR_DASAR)
+
+    # <=5 KRR, 6-10 KRT, >10 KRST
+    df['skor_risiko'] = score
+    df['label_risiko'] = LABEL_RISIKO[np.searchsorted([5, 10], score, side='left')]
     return df
 
-# --- PROSES UTAMA ---
-# 1. Muat data mentah
-df_raw = pd.read_csv('pregnancy-dataset.csv')
-print("Dataset dimuat.")
-
-# 2. Lakukan cleaning dan feature engineering menggunakan fungsi dari utils
-df_cleaned = preprocess_input_for_pipeline(df_raw.copy())
-print("Data cleaning & feature engineering selesai.")
-
-# 3. Buat variabel target
-df_with_target = realistic_labeling(df_cleaned)
-y = df_with_target['label_risiko']
-print("\n" + "="*40)
-print("DISTRIBUSI LABEL YANG DIHASILKAN:")
-print(y.value_counts())
-print("="*40 + "\n")
-
-# 4. Siapkan Fitur (X) MENTAH untuk pipeline
-X_raw = df_with_target.drop(columns=['label_risiko', 'skor_risiko', 'tekanan_sistolik', 'tekanan_diastolik'], errors='ignore')
-print(f"Fitur mentah (X_raw) yang akan masuk pipeline: {X_raw.columns.tolist()}")
-
-# 5. DEFINISIKAN PIPELINE LENGKAP
+# --- DEFINISI PIPELINE ---
 numeric_features = ['umur_ibu', 'gravida', 'umur_kehamilan', 'tinggi_badan']
 categorical_features = ['penyakit_anemia', 'posisi_janin', 'hasil_tes_VDRL', 'hasil_tes_HbsAg', 'kategori_tekanan_darah']
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('num', 'passthrough', numeric_features),
-        ('cat', OneHotEncoder(handle_unknown='ignore', drop='if_binary'), categorical_features)
-    ],
-    remainder='drop'
-)
-full_pipeline = Pipeline([
-    ('preprocessor', preprocessor),
-    ('smote', SMOTE(random_state=42, k_neighbors=5)),
-    ('classifier', DecisionTreeClassifier(random_state=42))
-])
-
-# 6. Split data
-X_train, X_test, y_train, y_test = train_test_split(X_raw, y, test_size=0.2, random_state=42, stratify=y)
-
-# 7. Setup dan jalankan GridSearchCV
 param_grid = {
     'classifier__max_depth': [3, 5, 7, 10],
     'classifier__min_samples_split': [10, 20, 30],
     'classifier__criterion': ['gini', 'entropy']
 }
-skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
-grid_search = GridSearchCV(estimator=full_pipeline, param_grid=param_grid, cv=skf, scoring='f1_macro', n_jobs=1, verbose=1)
-
-print("\nMemulai GridSearchCV dengan full pipeline...")
-grid_search.fit(X_train, y_train)
-print("GridSearchCV selesai.")
-
-# 8. Simpan Hasil Terbaik
-best_full_pipeline = grid_search.best_estimator_
-print(f"\nParameter terbaik: {grid_search.best_params_}")
-print(f"Skor F1-Macro CV terbaik: {grid_search.best_score_:.4f}")
-
-# --- LANGKAH BARU: EKSTRAK NAMA FITUR DAN SIMPAN ---
-# Ambil nama fitur setelah preprocessing (setelah one-hot encoding)
-# Ini adalah nama-nama kolom yang sebenarnya dilihat oleh model
-feature_names_transformed = best_full_pipeline.named_steps['preprocessor'].get_feature_names_out()
-joblib.dump(feature_names_transformed.tolist(), 'feature_names.pkl')
-print("Nama fitur yang sudah ditransformasi berhasil disimpan.")
-# ----------------------------------------------------
-
-# Simpan pipeline lengkap
-with open('pregnancy_risk_full_pipeline.pkl', 'wb') as f:
-    pickle.dump(best_full_pipeline, f)
-    
-print("\nPipeline LENGKAP berhasil disimpan sebagai 'pregnancy_risk_full_pipeline.pkl'.")
-print("Proses training selesai!")
\ No newline at end of file
+# Kolom hasil labeling / tekanan darah mentah yang tidak masuk ke pipeline
+KOLOM_BUKAN_FITUR = ['label_risiko', 'skor_risiko', 'tekanan_sistolik', 'tekanan_diastolik']
+# Kolom mentah yang dibaca dari snapshot data_pasien (tekanan darah disimpan
+# sebagai sistolik/diastolik, diubah menjadi kategori oleh preprocess)
+KOLOM_SNAPSHOT = numeric_features + ['penyakit_anemia', 'posisi_janin', 'hasil_tes_VDRL', 'hasil_tes_HbsAg',
+                                     'tekanan_sistolik', 'tekanan_diastolik']
+
+def build_full_pipeline(memory=None, resampling='smote'):
+    """
+    Membuat pipeline lengkap preprocessor -> resampling -> DecisionTree.
+    `resampling` adalah salah satu PILIHAN_RESAMPLING (default SMOTE eksak);
+    'class_weight' tidak punya langkah resampling.
+    Jika `memory` diisi (path atau joblib.Memory), hasil fit preprocessor dan
+    fit_resample di-cache per data fold, sehingga GridSearchCV hanya
+    mengulang training tree untuk setiap kombinasi parameter.
+    """
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('num', 'passthrough', numeric_features),
+            ('cat', OneHotEncoder(handle_unknown='ignore', drop='if_binary'), categorical_features)
+        ],
+        remainder='drop'
+    )
+    langkah = [('preprocessor', preprocessor)]
+    resampler = buat_resampler(resampling)
+    if resampler is not None:
+        langkah.append(('resampling', resampler))
+    langkah.append(('classifier', DecisionTreeClassifier(random_state=42, class_weight=class_weight_untuk(resampling))))
+    return Pipeline(langkah, memory=memory)
+
+def bandingkan_resampling(X, y, params, cv, n_jobs=1, pilihan=PILIHAN_RESAMPLING):
+    """
+    F1-macro CV dan rata-rata waktu fit per fold (preprocess + resampling +
+    tree) untuk setiap pilihan resampling dengan parameter tree yang sama.
+    """
+    hasil = []
+    for nama in pilihan:
+        pipeline = build_full_pipeline(resampling=nama).set_params(**params)
+        skor = cross_validate(pipeline, X, y, cv=cv, scoring='f1_macro', n_jobs=n_jobs)
+        hasil.append({'resampling': nama,
+                      'f1_macro': round(float(skor['test_score'].mean()), 6),
+                      'f1_std': round(float(skor['test_score'].std()), 6),
+                      'detik_fit_per_fold': round(float(skor['fit_time'].mean()), 4)})
+    return hasil
+
+def cetak_perbandingan_resampling(hasil):
+    print(f"{'resampling':<16} {'F1-macro':>9} {'std':>8} {'fit/fold':>10}")
+    for h in hasil:
+        print(f"{h['resampling']:<16} {h['f1_macro']:>9.4f} {h['f1_std']:>8.4f} {h['detik_fit_per_fold']:>9.3f}s")
+
+@contextmanager
+def catat_waktu(nama_tahap):
+    """Mencetak waktu (wall-clock) yang dihabiskan sebuah tahap training."""
+    mulai = time.perf_counter()
+    yield
+    print(f"[waktu] {nama_tahap}: {time.perf_counter() - mulai:.2f} detik")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Training pipeline risiko kehamilan.")
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help="Jumlah proses untuk pencarian hyperparameter (-1 = semua core).")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Folder cache joblib.Memory untuk hasil preprocessor+SMOTE per fold.")
+    parser.add_argument('--search', choices=['grid', 'halving'], default='grid',
+                        help="'grid' = GridSearchCV, 'halving' = HalvingGridSearchCV (successive halving).")
+    parser.add_argument('--resampling', choices=PILIHAN_RESAMPLING, default='smote',
+                        help="Tahap penanganan kelas tidak seimbang (lihat resampling.py).")
+    parser.add_argument('--bandingkan-resampling', action='store_true',
+                        help="Bandingkan F1-macro CV dan waktu fit semua pilihan resampling untuk parameter terbaik.")
+    parser.add_argument('--data', choices=['csv', 'snapshot'], default='csv',
+                        help="'csv' = pregnancy-dataset.csv, 'snapshot' = snapshot Parquet dari data_pasien.")
+    parser.add_argument('--snapshot-dir', default=None,
+                        help="Folder snapshot untuk --data snapshot (default: snapshot/data_pasien).")
+    parser.add_argument('--tanpa-ekstraksi', action='store_true',
+                        help="Dengan --data snapshot: pakai snapshot yang ada tanpa menghubungi database.")
+    return parser.parse_args()
+
+# --- PROSES UTAMA ---
+def main():
+    args = parse_args()
+    print("Memulai proses training model pipeline...")
+    mulai_total = time.perf_counter()
+
+    # 1. Muat data mentah
+    if args.data == 'snapshot':
+        # Impor lazy: pyarrow dan koneksi database hanya dibutuhkan untuk snapshot
+        from ekstraksi_data import ekstrak_inkremental, muat_snapshot, koneksi_dari_secrets, DIREKTORI_SNAPSHOT
+        snapshot_dir = args.snapshot_dir or DIREKTORI_SNAPSHOT
+        if not args.tanpa_ekstraksi:
+            with catat_waktu("ekstraksi inkremental data_pasien"):
+                conn = koneksi_dari_secrets()
+                try:
+                    ekstrak_inkremental(conn, snapshot_dir)
+                finally:
+                    conn.close()
+        with catat_waktu("memuat snapshot"):
+            df_raw = muat_snapshot(snapshot_dir, kolom=KOLOM_SNAPSHOT)
+    else:
+        with catat_waktu("memuat dataset"):
+            df_raw = pd.read_csv('pregnancy-dataset.csv')
+    print(f"Dataset dimuat ({len(df_raw):,} baris).")
+
+    # 2. Lakukan cleaning dan feature engineering menggunakan fungsi dari utils
+    # (preprocess sudah bekerja pada salinan; df_raw dilepas agar data mentah
+    # tidak tersimpan dua kali di memori)
+    with catat_waktu("cleaning & feature engineering"):
+        df_cleaned = preprocess_input_for_pipeline(df_raw)
+    del df_raw
+    print("Data cleaning & feature engineering selesai.")
+
+    # 3. Buat variabel target
+    # parity=True agar label (dan model hasil training) sama dengan versi sebelumnya
+    with catat_waktu("pembuatan label"):
+        df_with_target = realistic_labeling(df_cleaned, parity=True)
+    y = df_with_target['label_risiko']
+    print("\n" + "="*40)
+    print("DISTRIBUSI LABEL YANG DIHASILKAN:")
+    print(y.value_counts())
+    print("="*40 + "\n")
+
+    # 4. Siapkan Fitur (X) MENTAH untuk pipeline
+    X_raw = df_with_target.drop(columns=KOLOM_BUKAN_FITUR, errors='ignore')
+    print(f"Fitur mentah (X_raw) yang akan masuk pipeline: {X_raw.columns.tolist()}")
+
+    # 5. DEFINISIKAN PIPELINE LENGKAP
+    memory = joblib.Memory(args.cache_dir, verbose=0) if args.cache_dir else None
+    full_pipeline = build_full_pipeline(memory=memory, resampling=args.resampling)
+
+    # 6. Split data
+    X_train, X_test, y_train, y_test = train_test_split(X_raw, y, test_size=0.2, random_state=42, stratify=y)
+
+    # 7. Setup dan jalankan pencarian hyperparameter
+    skf = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    if args.search == 'halving':
+        search = HalvingGridSearchCV(estimator=full_pipeline, param_grid=param_grid, cv=skf, scoring='f1_macro',
+                                     factor=3, random_state=42, n_jobs=args.n_jobs, verbose=1)
+    else:
+        search = GridSearchCV(estimator=full_pipeline, param_grid=param_grid, cv=skf, scoring='f1_macro',
+                              n_jobs=args.n_jobs, verbose=1)
+
+    print(f"\nMemulai {type(search).__name__} dengan full pipeline (resampling={args.resampling}, "
+          f"n_jobs={args.n_jobs}, cache={args.cache_dir})...")
+    with catat_waktu(f"{type(search).__name__}"):
+        search.fit(X_train, y_train)
+    print(f"{type(search).__name__} selesai.")
+
+    # 8. Simpan Hasil Terbaik
+    best_full_pipeline = search.best_estimator_
+    # Cache hanya berguna saat training; jangan ikut tersimpan di artefak
+    best_full_pipeline.set_params(memory=None)
+    print(f"\nParameter terbaik: {search.best_params_}")
+    print(f"Skor F1-Macro CV terbaik: {search.best_score_:.4f}")
+
+    perbandingan = None
+    if args.bandingkan_resampling:
+        print("\nPerbandingan resampling (parameter terbaik, CV yang sama):")
+        with catat_waktu("perbandingan resampling"):
+            perbandingan = bandingkan_resampling(X_train, y_train, search.best_params_, skf, n_jobs=args.n_jobs)
+        cetak_perbandingan_resampling(perbandingan)
+
+    with catat_waktu("menyimpan artefak"):
+        # --- LANGKAH BARU: EKSTRAK NAMA FITUR DAN SIMPAN ---
+        # Ambil nama fitur setelah preprocessing (setelah one-hot encoding)
+        # Ini adalah nama-nama kolom yang sebenarnya dilihat oleh model
+        feature_names_transformed = best_full_pipeline.named_steps['preprocessor'].get_feature_names_out()
+        joblib.dump(feature_names_transformed.tolist(), 'feature_names.pkl')
+        print("Nama fitur yang sudah ditransformasi berhasil disimpan.")
+        # ----------------------------------------------------
+
+        # Simpan pipeline lengkap
+        with open('pregnancy_risk_full_pipeline.pkl', 'wb') as f:
+            pickle.dump(best_full_pipeline, f)
+
+        # Versi ringan tanpa sklearn untuk dipakai aplikasi Streamlit
+        export_compiled_model(best_full_pipeline, 'pregnancy_risk_model.npz')
+
+        # Manifest JSON (nama fitur, importance, skor CV, dst.) yang dibaca aplikasi
+        manifest = buat_manifest(best_full_pipeline, search, X_train, y_train, X_test, y_test,
+                                 'pregnancy_risk_model.npz')
+        manifest['cv']['resampling'] = args.resampling
+        if perbandingan is not None:
+            manifest['perbandingan_resampling'] = perbandingan
+        simpan_manifest(manifest, MANIFEST_PATH)
+
+        # Salinan berversi di models/<versi>/; aplikasi yang sedang berjalan
+        # menukar modelnya sendiri tanpa restart (lihat model_registry.py)
+        terbitkan_model('pregnancy_risk_model.npz', MANIFEST_PATH)
+
+    print("\nPipeline LENGKAP berhasil disimpan sebagai 'pregnancy_risk_full_pipeline.pkl'.")
+    print("Model ringan (tanpa sklearn) berhasil disimpan sebagai 'pregnancy_risk_model.npz'.")
+    print(f"Manifest model (versi {manifest['versi_model']}) berhasil disimpan sebagai '{MANIFEST_PATH}'.")
+    print(f"Versi {manifest['versi_model']} diterbitkan ke 'models/' dan menjadi model aktif.")
+    print(f"[waktu] total: {time.perf_counter() - mulai_total:.2f} detik")
+    print("Proses training selesai!")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
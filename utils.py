@@ -2,27 +2,104 @@
 # --- File: utils.py (VERSI FINAL & LENGKAP) ---
 # ======================================================================
 import mysql.connector
+from mysql.connector import pooling
+import datetime
 import hashlib
+import math
+import numbers
+import re
+import time
+from collections import Counter
 import pandas as pd
 import numpy as np
 import streamlit as st
 
-# --- FUNGSI-FUNGSI LOGIKA DATABASE & AUTENTIKASI (TIDAK BERUBAH) ---
+from instrumentasi import ukur, diukur, tambah
+
+# --- FUNGSI-FUNGSI LOGIKA DATABASE & AUTENTIKASI ---
+
+# Nilai default pool; bisa di-override lewat [mysql] di secrets.toml
+# (pool_size, pool_timeout, reconnect_attempts).
+DEFAULT_POOL_SIZE = 5
+DEFAULT_POOL_TIMEOUT = 5.0      # detik menunggu koneksi bebas saat pool penuh
+DEFAULT_RECONNECT_ATTEMPTS = 3  # percobaan ulang jika koneksi basi gagal reconnect
+
+def create_connection_pool(db_config, pool_size=DEFAULT_POOL_SIZE, pool_name="pregnancy_risk_pool"):
+    """
+    Membuat MySQLConnectionPool dari dict konfigurasi koneksi
+    (host, user, password, database, port, ...). Dipisah dari st.secrets
+    supaya bisa diarahkan ke database lokal pengganti saat pengujian.
+    """
+    return pooling.MySQLConnectionPool(
+        pool_name=pool_name,
+        pool_size=pool_size,
+        pool_reset_session=True,
+        **db_config
+    )
+
+@st.cache_resource
+def get_connection_pool():
+    """Pool koneksi bersama untuk satu proses, dibuat sekali saja. Error tidak di-cache."""
+    secrets = st.secrets.mysql
+    db_config = {
+        'host': secrets.host,
+        'user': secrets.user,
+        'password': secrets.password,
+        'database': secrets.database,
+    }
+    if 'port' in secrets:
+        db_config['port'] = int(secrets.port)
+    return create_connection_pool(db_config, pool_size=int(secrets.get('pool_size', DEFAULT_POOL_SIZE)))
+
+def get_pooled_connection(pool, timeout=DEFAULT_POOL_TIMEOUT, reconnect_attempts=DEFAULT_RECONNECT_ATTEMPTS):
+    """
+    Mengambil koneksi dari pool. pool.get_connection() sudah melakukan health
+    check (ping) dan reconnect untuk koneksi yang basi; di sini ditambah
+    menunggu saat pool penuh dan mencoba ulang jika reconnect gagal.
+    """
+    batas_waktu = time.monotonic() + timeout
+    percobaan_reconnect = 0
+    while True:
+        try:
+            return pool.get_connection()
+        except pooling.PoolError:
+            # Pool penuh: tunggu sebentar sampai ada koneksi yang dikembalikan
+            if time.monotonic() >= batas_waktu:
+                raise
+            time.sleep(0.05)
+        except mysql.connector.InterfaceError:
+            # Koneksi basi dan gagal reconnect (mis. server baru restart)
+            percobaan_reconnect += 1
+            if percobaan_reconnect >= reconnect_attempts:
+                raise
+            time.sleep(0.1 * percobaan_reconnect)
 
 def get_db_connection():
-    """Membuat koneksi ke database. Tidak menampilkan error di layar."""
+    """
+    Mengambil koneksi dari pool bersama. Tidak menampilkan error di layar.
+    Panggil release_db_connection (atau conn.close()) setelah selesai agar
+    koneksi kembali ke pool.
+    """
     try:
-        connection = mysql.connector.connect(
-            host=st.secrets.mysql.host,
-            user=st.secrets.mysql.user,
-            password=st.secrets.mysql.password,
-            database=st.secrets.mysql.database
+        secrets = st.secrets.mysql
+        return get_pooled_connection(
+            get_connection_pool(),
+            timeout=float(secrets.get('pool_timeout', DEFAULT_POOL_TIMEOUT)),
+            reconnect_attempts=int(secrets.get('reconnect_attempts', DEFAULT_RECONNECT_ATTEMPTS))
         )
-        return connection
     except mysql.connector.Error as e:
         print(f"DATABASE CONNECTION ERROR: {e}")
         return None
 
+def release_db_connection(conn):
+    """Mengembalikan koneksi ke pool. Error saat reset sesi diabaikan (koneksi tetap kembali ke pool)."""
+    if not conn:
+        return
+    try:
+        conn.close()
+    except mysql.connector.Error as e:
+        print(f"DATABASE RELEASE ERROR: {e}")
+
 def make_hashes(password):
     """Membuat hash dari password."""
     return hashlib.sha256(str.encode(password)).hexdigest()
@@ -31,111 +108,492 @@ def check_hashes(password, hashed_text):
     """Memeriksa apakah password cocok dengan hash."""
     return make_hashes(password) == hashed_text
 
-def save_prediction_to_db(data_pasien):
-    """Menyimpan data prediksi ke database."""
-    if not st.session_state.get('logged_in'):
-        return False, "Gagal menyimpan: Pengguna tidak login."
-    conn = get_db_connection()
-    if not conn:
-        return False, "Gagal menyimpan: Tidak dapat terhubung ke database."
-    try:
-        cursor = conn.cursor()
-        query = """
+# Kolom tabel data_pasien yang diisi dari aplikasi (created_by diisi dari sesi login).
+# versi_model mencatat versi model yang menghasilkan prediksi (model_registry).
+KOLOM_DATA_PASIEN = [
+    'nama_pasien', 'umur_ibu', 'gravida', 'umur_kehamilan', 'tinggi_badan',
+    'tekanan_sistolik', 'tekanan_diastolik', 'penyakit_anemia', 'posisi_janin',
+    'hasil_tes_VDRL', 'hasil_tes_HbsAg', 'hasil_prediksi', 'versi_model'
+]
+QUERY_INSERT_DATA_PASIEN = """
         INSERT INTO data_pasien (
             nama_pasien, umur_ibu, gravida, umur_kehamilan, tinggi_badan, 
             tekanan_sistolik, tekanan_diastolik, penyakit_anemia, posisi_janin, 
-            hasil_tes_VDRL, hasil_tes_HbsAg, hasil_prediksi, created_by
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            hasil_tes_VDRL, hasil_tes_HbsAg, hasil_prediksi, versi_model, created_by
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
-        values = (
-            data_pasien.get('nama_pasien'), data_pasien.get('umur_ibu'), data_pasien.get('gravida'), 
-            data_pasien.get('umur_kehamilan'), data_pasien.get('tinggi_badan'), 
-            data_pasien.get('tekanan_sistolik'), data_pasien.get('tekanan_diastolik'),
-            data_pasien.get('penyakit_anemia'), data_pasien.get('posisi_janin'), 
-            data_pasien.get('hasil_tes_VDRL'), data_pasien.get('hasil_tes_HbsAg'), 
-            data_pasien.get('hasil_prediksi'), st.session_state.get('user_id')
-        )
-        cursor.execute(query, values)
+
+@diukur('db.simpan_tertunda')
+def simpan_prediksi_tertunda(daftar_record):
+    """
+    Menyimpan sekumpulan prediksi dari antrian_simpan dalam satu transaksi.
+    Setiap record berisi kolom KOLOM_DATA_PASIEN serta 'created_by', karena
+    thread antrian tidak punya session_state. Seperti jalur simpan lain,
+    created_at dan tanggal statistik diisi jam database (CURRENT_TIMESTAMP /
+    CURDATE()) saat ditulis, jadi record dari jurnal tercatat pada waktu
+    diputar ulang. Berbeda dengan fungsi simpan lain, error tidak ditangkap
+    (mysql.connector.Error) agar antrian bisa memutuskan untuk mencoba ulang.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise mysql.connector.errors.InterfaceError("Tidak dapat terhubung ke database.")
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(QUERY_INSERT_DATA_PASIEN, [
+            tuple(r.get(kolom) for kolom in KOLOM_DATA_PASIEN) + (r['created_by'],) for r in daftar_record
+        ])
+        kunci_per_user = {}
+        for r in daftar_record:
+            kunci_per_user.setdefault(r['created_by'], []).append(
+                (r.get('hasil_prediksi'),) + kelompok_umur_gravida(r.get('umur_ibu'), r.get('gravida')))
+        for user_id, daftar_kunci in kunci_per_user.items():
+            tambah_statistik(cursor, user_id, daftar_kunci)
         conn.commit()
-        return True, "Data berhasil disimpan ke riwayat."
-    except mysql.connector.Error as e:
-        print(f"DATABASE SAVE ERROR: {e}")
-        return False, f"Gagal menyimpan: Terjadi error pada database. ({e})"
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        if conn and conn.is_connected():
-            conn.close()
+        release_db_connection(conn)
 
-def get_user_history(user_id):
-    """Mengambil riwayat prediksi untuk user_id tertentu."""
+def _siapkan_baris_bulk(df, user_id, versi_model=None):
+    """
+    Menyusun tuple nilai INSERT untuk seluruh DataFrame secara per kolom.
+    'tekanan_darah' (format 'sistolik/diastolik' dari file) dipecah menjadi
+    tekanan_sistolik/tekanan_diastolik; NaN diubah menjadi NULL.
+    """
+    df = df.copy()
+    if 'tekanan_darah' in df.columns and df['tekanan_darah'].dtype == object:
+        # .str hanya memproses nilai string; nilai lain (NaN, angka) menjadi NaN
+        parts = df['tekanan_darah'].str.split('/', expand=True).reindex(columns=[0, 1])
+        ada = parts[0].notna()
+        for i, kolom in enumerate(['tekanan_sistolik', 'tekanan_diastolik']):
+            df[kolom] = parts[i].where(ada, df[kolom] if kolom in df.columns else None)
+    nilai = df.reindex(columns=KOLOM_DATA_PASIEN).astype(object)
+    nilai = nilai.where(nilai.notna(), None)
+    if versi_model is not None:
+        nilai['versi_model'] = versi_model
+    nilai['created_by'] = user_id
+    return list(nilai.itertuples(index=False, name=None))
+
+def save_predictions_bulk(df, chunk_size=1000, progress_callback=None, versi_model=None):
+    """
+    Menyimpan banyak hasil prediksi sekaligus dengan executemany per chunk
+    (satu koneksi dan satu transaksi per chunk), bukan satu koneksi + commit
+    per baris.
+
+    Jika sebuah chunk gagal, chunk itu di-rollback lalu disimpan ulang baris
+    per baris di transaksi yang sama sehingga hanya baris yang bermasalah yang
+    gagal. progress_callback(chunk_ke, jumlah_chunk, jumlah_tersimpan)
+    dipanggil setelah setiap chunk. versi_model (jika diisi) dicatat untuk
+    semua baris.
+
+    Mengembalikan (jumlah_berhasil, daftar_gagal) dengan daftar_gagal berisi
+    tuple (index_baris, pesan_error).
+    """
+    if not st.session_state.get('logged_in'):
+        return 0, [(idx, "Gagal menyimpan: Pengguna tidak login.") for idx in df.index]
+
+    user_id = st.session_state.get('user_id')
+    baris = _siapkan_baris_bulk(df, user_id, versi_model)
+    kunci_statistik = _kunci_statistik_bulk(df)
+    index = list(df.index)
+    jumlah_chunk = max(1, -(-len(baris) // chunk_size))
+    berhasil, gagal = 0, []
+
+    for chunk_ke, mulai in enumerate(range(0, len(baris), chunk_size), start=1):
+        chunk, chunk_index = baris[mulai:mulai + chunk_size], index[mulai:mulai + chunk_size]
+        chunk_kunci = kunci_statistik[mulai:mulai + chunk_size]
+        with ukur('db.simpan_chunk'):
+            conn = get_db_connection()
+            if not conn:
+                gagal.extend((idx, "Gagal menyimpan: Tidak dapat terhubung ke database.") for idx in chunk_index)
+            else:
+                try:
+                    cursor = conn.cursor()
+                    tersimpan, gagal_chunk, kunci_tersimpan = 0, [], chunk_kunci
+                    try:
+                        cursor.executemany(QUERY_INSERT_DATA_PASIEN, chunk)
+                        tersimpan = len(chunk)
+                    except mysql.connector.Error as e:
+                        print(f"DATABASE BULK SAVE ERROR (chunk {chunk_ke}): {e}")
+                        tambah('db.chunk_ulang_per_baris')
+                        conn.rollback()
+                        # Ulangi per baris untuk menemukan baris yang bermasalah
+                        kunci_tersimpan = []
+                        for idx, values, kunci in zip(chunk_index, chunk, chunk_kunci):
+                            try:
+                                cursor.execute(QUERY_INSERT_DATA_PASIEN, values)
+                                tersimpan += 1
+                                kunci_tersimpan.append(kunci)
+                            except mysql.connector.Error as e_baris:
+                                gagal_chunk.append((idx, f"Terjadi error pada database. ({e_baris})"))
+                    tambah_statistik(cursor, user_id, kunci_tersimpan)
+                    conn.commit()
+                    berhasil += tersimpan
+                    gagal.extend(gagal_chunk)
+                except mysql.connector.Error as e:
+                    print(f"DATABASE BULK SAVE ERROR (chunk {chunk_ke}): {e}")
+                    gagal.extend((idx, f"Terjadi error pada database. ({e})") for idx in chunk_index)
+                finally:
+                    release_db_connection(conn)
+        if progress_callback:
+            progress_callback(chunk_ke, jumlah_chunk, berhasil)
+
+    tambah('db.baris_tersimpan', berhasil)
+    tambah('db.baris_gagal', len(gagal))
+    return berhasil, gagal
+
+# --- STATISTIK AGREGAT UNTUK DASHBOARD ---
+# Tabel statistik_risiko_harian (migrations/002) menyimpan jumlah prediksi per
+# (tanggal, created_by, hasil_prediksi, kelompok_umur, kelompok_gravida) dan
+# diperbarui di transaksi yang sama dengan INSERT ke data_pasien. Dashboard
+# cukup menjumlahkan tabel kecil ini, tanpa GROUP BY atas seluruh data_pasien.
+# Isi ulang dari data_pasien dengan: python backfill_statistik.py
+QUERY_UPSERT_STATISTIK = """
+        INSERT INTO statistik_risiko_harian (
+            tanggal, created_by, hasil_prediksi, kelompok_umur, kelompok_gravida, jumlah
+        ) VALUES (CURDATE(), %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE jumlah = jumlah + VALUES(jumlah)
+        """
+
+def get_age_group(age):
+    if age < 20:
+        return "< 20 Tahun"
+    elif 20 <= age <= 35:
+        return "20-35 Tahun (Optimal)"
+    else:
+        return "> 35 Tahun"
+
+def get_gravida_group(gravida):
+    if gravida == 1:
+        return "1 (Primigravida)"
+    elif 2 <= gravida <= 4:
+        return "2-4"
+    else:
+        return "> 4 (Grande Multigravida)"
+
+# Batas bin untuk pd.cut (right=False, jadi setiap bin [kiri, kanan)). Harus
+# sama dengan get_age_group/get_gravida_group di atas: batas atas 20-35 dibuat
+# sedikit di atas 35 agar umur tepat 35 tetap masuk kelompok optimal.
+_BIN_UMUR = [-np.inf, 20, np.nextafter(35, np.inf), np.inf]
+_LABEL_UMUR = np.array(["< 20 Tahun", "20-35 Tahun (Optimal)", "> 35 Tahun"], dtype=object)
+_BIN_GRAVIDA = [-np.inf, 1, 2, 5, np.inf]
+_LABEL_GRAVIDA = np.array(["> 4 (Grande Multigravida)", "1 (Primigravida)", "2-4", "> 4 (Grande Multigravida)"], dtype=object)
+
+def _potong(nilai, bins, label):
+    """pd.cut ke indeks bin lalu ke label; nilai +inf (di luar bin terakhir) masuk bin terakhir."""
+    indeks = pd.cut(nilai, bins, right=False, labels=False)
+    return pd.Series(label[indeks.fillna(len(label) - 1).to_numpy(dtype=int)], index=nilai.index)
+
+def kelompokkan_umur_gravida(umur, gravida):
+    """
+    Kelompok umur dan gravida untuk Series umur_ibu dan gravida (dipakai grafik
+    dan tabel statistik). Umur yang bukan angka dianggap 0; gravida diambil
+    angkanya dari teks seperti '3rd', dan dianggap 0 jika tidak ada angka.
+    """
+    umur = pd.to_numeric(umur, errors='coerce').fillna(0)
+    gravida = pd.to_numeric(_per_nilai_unik(gravida, _ekstrak_angka), errors='coerce')
+    return _potong(umur, _BIN_UMUR, _LABEL_UMUR), _potong(gravida, _BIN_GRAVIDA, _LABEL_GRAVIDA)
+
+def kelompok_umur_gravida(umur, gravida):
+    """Versi satu nilai dari kelompokkan_umur_gravida, mengembalikan tuple (kelompok_umur, kelompok_gravida)."""
+    umur = _ke_angka(umur)
+    cocok = _POLA_ANGKA.search(str(gravida))
+    return (get_age_group(0 if math.isnan(umur) else umur),
+            get_gravida_group(float(cocok.group(1)) if cocok else 0))
+
+def _kunci_statistik_bulk(df):
+    """Kunci statistik (hasil_prediksi, kelompok_umur, kelompok_gravida) per baris df."""
+    df = df.reindex(columns=['umur_ibu', 'gravida', 'hasil_prediksi'])
+    kelompok_umur, kelompok_gravida = kelompokkan_umur_gravida(df['umur_ibu'], df['gravida'])
+    return list(zip(df['hasil_prediksi'], kelompok_umur, kelompok_gravida))
+
+def tambah_statistik(cursor, user_id, daftar_kunci):
+    """Menambahkan jumlah per kunci ke statistik hari ini (satu upsert per kombinasi unik)."""
+    jumlah = Counter(daftar_kunci)
+    if jumlah:
+        cursor.executemany(QUERY_UPSERT_STATISTIK, [(user_id,) + kunci + (n,) for kunci, n in jumlah.items()])
+
+@diukur('db.statistik_risiko')
+def get_statistik_risiko(tanggal_mulai=None, tanggal_akhir=None, created_by=None):
+    """
+    Ringkasan untuk dashboard agregat, dibaca hanya dari statistik_risiko_harian.
+    Bentuknya sama dengan page_collective.hitung_ringkasan (dict Series
+    'risiko', 'umur', 'gravida'). Mengembalikan None jika gagal terhubung.
+    """
     conn = get_db_connection()
     if not conn: return None
+    kondisi, params = ["1 = 1"], []
+    if tanggal_mulai is not None:
+        kondisi.append("tanggal >= %s")
+        params.append(tanggal_mulai)
+    if tanggal_akhir is not None:
+        kondisi.append("tanggal <= %s")
+        params.append(tanggal_akhir)
+    if created_by is not None:
+        kondisi.append("created_by = %s")
+        params.append(created_by)
     try:
-        query = """
-            SELECT nama_pasien, umur_ibu, gravida, umur_kehamilan, tinggi_badan, 
-                   tekanan_sistolik, tekanan_diastolik, penyakit_anemia, posisi_janin, 
-                   hasil_tes_VDRL, hasil_tes_HbsAg, hasil_prediksi, created_at
-            FROM data_pasien 
-            WHERE created_by = %s ORDER BY created_at DESC LIMIT 10
+        query = f"""
+            SELECT hasil_prediksi, kelompok_umur, kelompok_gravida, SUM(jumlah) AS jumlah
+            FROM statistik_risiko_harian
+            WHERE {' AND '.join(kondisi)}
+            GROUP BY hasil_prediksi, kelompok_umur, kelompok_gravida
+        """
+        df_stat = pd.read_sql(query, conn, params=params)
+    except Exception as e:
+        print(f"ERROR saat mengambil statistik: {e}")
+        df_stat = pd.DataFrame(columns=['hasil_prediksi', 'kelompok_umur', 'kelompok_gravida', 'jumlah'])
+    finally:
+        release_db_connection(conn)
+
+    df_stat['jumlah'] = df_stat['jumlah'].astype(int)
+    return {
+        'risiko': df_stat.groupby('hasil_prediksi')['jumlah'].sum(),
+        'umur': df_stat.groupby(['kelompok_umur', 'hasil_prediksi'])['jumlah'].sum(),
+        'gravida': df_stat.groupby(['kelompok_gravida', 'hasil_prediksi'])['jumlah'].sum(),
+    }
+
+# --- RIWAYAT PEMERIKSAAN (KEYSET PAGINATION) ---
+# Riwayat diurutkan dari yang terbaru: ORDER BY created_at DESC, id DESC.
+# Halaman berikutnya diambil dengan kursor (created_at, id) dari baris terakhir
+# halaman sebelumnya, bukan OFFSET, sehingga biaya per halaman tetap sama
+# sedalam apa pun halamannya. Butuh index dari migrations/001 dan 004
+# (jalankan: python migrate.py).
+UKURAN_HALAMAN_RIWAYAT = 25
+KOLOM_RIWAYAT = """
+            id, nama_pasien, umur_ibu, gravida, umur_kehamilan, tinggi_badan, 
+            tekanan_sistolik, tekanan_diastolik, penyakit_anemia, posisi_janin, 
+            hasil_tes_VDRL, hasil_tes_HbsAg, hasil_prediksi, versi_model, created_at
+"""
+
+def query_riwayat(user_id, cursor=None, page_size=UKURAN_HALAMAN_RIWAYAT, risiko=None,
+                  tanggal_mulai=None, tanggal_akhir=None):
+    """
+    Menyusun (sql, params) untuk satu halaman riwayat. Mengambil page_size + 1
+    baris; baris kelebihan hanya menandakan masih ada halaman berikutnya.
+    tanggal_mulai/tanggal_akhir berupa date dan keduanya inklusif.
+
+    Filter risiko ditulis sebagai hasil_prediksi = %s per tingkat, bukan
+    IN (...): dengan IN, MySQL harus mengurutkan (filesort) semua baris yang
+    cocok. Untuk beberapa tingkat, setiap tingkat dibaca dari index risiko
+    sebanyak satu halaman lalu digabung (UNION ALL), sehingga yang diurutkan
+    paling banyak len(risiko) * (page_size + 1) baris sedalam apa pun halamannya.
+    """
+    kondisi, params = [], []
+    if tanggal_mulai is not None:
+        kondisi.append("created_at >= %s")
+        params.append(tanggal_mulai)
+    if tanggal_akhir is not None:
+        kondisi.append("created_at < %s")
+        params.append(tanggal_akhir + datetime.timedelta(days=1))
+    if cursor is not None:
+        # Ditulis sebagai OR (bukan (created_at, id) < (%s, %s)) agar MySQL
+        # tetap bisa memakai range scan pada index
+        kondisi.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params.extend([cursor[0], cursor[0], cursor[1]])
+
+    def satu_query(tingkat):
+        where = ["created_by = %s"] + (["hasil_prediksi = %s"] if tingkat is not None else []) + kondisi
+        sql = f"""
+            SELECT {KOLOM_RIWAYAT.strip()}
+            FROM data_pasien
+            WHERE {' AND '.join(where)}
+            ORDER BY created_at DESC, id DESC LIMIT %s
         """
-        df_history = pd.read_sql(query, conn, params=(user_id,))
-        return df_history
+        return sql, [user_id] + ([tingkat] if tingkat is not None else []) + params + [page_size + 1]
+
+    risiko = list(dict.fromkeys(risiko or []))
+    if len(risiko) <= 1:
+        return satu_query(risiko[0] if risiko else None)
+
+    bagian, params_gabungan = [], []
+    for i, tingkat in enumerate(risiko):
+        sql, params_bagian = satu_query(tingkat)
+        bagian.append(f"SELECT * FROM ({sql}) AS riwayat_{i}")
+        params_gabungan.extend(params_bagian)
+    sql = "\n        UNION ALL\n        ".join(bagian) + "\n        ORDER BY created_at DESC, id DESC LIMIT %s"
+    return sql, params_gabungan + [page_size + 1]
+
+def get_user_history_page(user_id, cursor=None, page_size=UKURAN_HALAMAN_RIWAYAT, risiko=None,
+                          tanggal_mulai=None, tanggal_akhir=None):
+    """
+    Mengambil satu halaman riwayat prediksi untuk user_id tertentu.
+    Mengembalikan (df_halaman, cursor_berikutnya); cursor_berikutnya None jika
+    ini halaman terakhir. df_halaman None jika gagal terhubung ke database
+    atau query gagal.
+    """
+    conn = get_db_connection()
+    if not conn: return None, None
+    try:
+        sql, params = query_riwayat(user_id, cursor, page_size, risiko, tanggal_mulai, tanggal_akhir)
+        df_history = pd.read_sql(sql, conn, params=params)
     except Exception as e:
         print(f"ERROR saat mengambil riwayat: {e}")
-        return pd.DataFrame()
+        return None, None
     finally:
-        if conn and conn.is_connected():
-            conn.close()
+        release_db_connection(conn)
+
+    cursor_berikutnya = None
+    if len(df_history) > page_size:
+        df_history = df_history.iloc[:page_size]
+        terakhir = df_history.iloc[-1]
+        cursor_berikutnya = (terakhir['created_at'].to_pydatetime(), int(terakhir['id']))
+    return df_history, cursor_berikutnya
 
 # --- FUNGSI BARU UNTUK DATA CLEANING & FEATURE ENGINEERING ---
 # Ini akan menjadi satu-satunya sumber kebenaran untuk preprocessing
 
+# Urutan kategori tekanan darah. Indeks di sini dipakai sebagai kode oleh
+# klasifikasi vektor di bawah (np.select bekerja pada kode integer).
+KATEGORI_TEKANAN_DARAH = np.array(
+    ['Tidak diketahui', 'Hipotensi', 'Normal', 'Prehipertensi', 'Hipertensi Stage 1', 'Hipertensi Stage 2'],
+    dtype=object
+)
+
+# Format feet.inches yang paling umum (mis. 5.3'' -> "5.3" setelah tanda kutip dibuang)
+_POLA_FEET_INCHES = r'^([0-9]+)\.([0-9]+)$'
+
+def feet_to_cm(value):
+    """Konversi satu nilai format feet.inches ke cm. Nilai yang tidak cocok dikembalikan apa adanya."""
+    try:
+        feet, inches = map(float, str(value).replace('"', '').replace("'", '').split('.'))
+        return round((feet * 30.48) + (inches * 2.54), 2)
+    except ValueError:
+        return value # Kembalikan apa adanya jika format tidak cocok
+
+def klasifikasi_tekanan_darah(sistolik, diastolik):
+    """
+    Versi skalar klasifikasi tekanan darah untuk satu record (tanpa pandas).
+    Aturannya harus sama dengan _kode_tekanan_darah di bawah.
+    """
+    try:
+        s, d = float(sistolik), float(diastolik)
+    except (TypeError, ValueError):
+        return 'Tidak diketahui'
+    if math.isnan(s) or math.isnan(d): return 'Tidak diketahui'
+    if s < 90 or d < 60: return 'Hipotensi'
+    elif 90 <= s < 120 and 60 <= d < 80: return 'Normal'
+    elif 120 <= s < 140 or 80 <= d < 90: return 'Prehipertensi'
+    elif 140 <= s < 160 or 90 <= d < 100: return 'Hipertensi Stage 1'
+    elif s >= 160 or d >= 100: return 'Hipertensi Stage 2'
+    else: return 'Tidak diketahui'
+
+def _per_nilai_unik(series, fungsi):
+    """
+    Menjalankan `fungsi` (yang menerima Series teks) hanya pada nilai unik
+    dari kolom, lalu memetakan hasilnya kembali ke semua baris. Kolom unggahan
+    (tinggi badan, tekanan darah, gravida) hanya punya sedikit nilai berbeda,
+    jadi operasi .str yang mahal cukup dijalankan beberapa puluh kali.
+    """
+    kode, unik = pd.factorize(series.astype(str))
+    hasil = fungsi(pd.Series(unik, dtype=object))
+    if isinstance(hasil, pd.DataFrame):
+        return pd.DataFrame(hasil.to_numpy()[kode], index=series.index, columns=hasil.columns)
+    return pd.Series(np.asarray(hasil)[kode], index=series.index)
+
+def _ekstrak_angka(teks):
+    """Ambil angka pertama dari teks (mis. '3rd' -> 3, '25 week' -> 25)."""
+    return pd.to_numeric(teks.str.extract(r'(\d+)', expand=False), errors='coerce').fillna(0)
+
+def _feet_inches_unik(teks):
+    """Parse nilai unik tinggi badan; kolom 'berhasil' menandai nilai yang berhasil dikonversi."""
+    bersih = teks.str.replace('"', '', regex=False).str.replace("'", '', regex=False)
+    cm = pd.Series(np.nan, index=teks.index, dtype=float)
+    berhasil = pd.Series(False, index=teks.index)
+
+    bagian = bersih.str.extract(_POLA_FEET_INCHES)
+    cocok = bagian[0].notna()
+    # round() bawaan Python (bukan np.round) supaya pembulatan sama persis dengan feet_to_cm
+    cm[cocok] = [round(v, 2) for v in bagian.loc[cocok, 0].astype(float) * 30.48 + bagian.loc[cocok, 1].astype(float) * 2.54]
+    berhasil[cocok] = True
+
+    # Format tidak lazim tapi tetap bertitik satu (mis. "5 . 3") diserahkan ke feet_to_cm
+    for i in bersih.index[~cocok & (bersih.str.count(r'\.') == 1)]:
+        nilai = feet_to_cm(teks[i])
+        if not isinstance(nilai, str):
+            cm[i], berhasil[i] = nilai, True
+
+    return pd.DataFrame({'cm': cm, 'berhasil': berhasil})
+
+def _konversi_tinggi_badan(series):
+    """Versi kolom dari feet_to_cm: nilai yang tidak cocok format dibiarkan apa adanya lalu dijadikan float."""
+    parsed = _per_nilai_unik(series, _feet_inches_unik)
+    berhasil = parsed['berhasil'].to_numpy(dtype=bool)
+    if berhasil.all():
+        return parsed['cm'].astype(float)
+    hasil = series.astype(object).copy()
+    hasil[berhasil] = parsed.loc[berhasil, 'cm']
+    return hasil.astype(float)
+
+def _kode_tekanan_darah(sistolik, diastolik):
+    """Klasifikasi tekanan darah untuk seluruh kolom sekaligus, mengembalikan kode indeks KATEGORI_TEKANAN_DARAH."""
+    s = pd.to_numeric(sistolik, errors='coerce').to_numpy(dtype=float)
+    d = pd.to_numeric(diastolik, errors='coerce').to_numpy(dtype=float)
+    # Urutan kondisi sama dengan rantai if/elif lama: kondisi pertama yang benar menang
+    return np.select(
+        [
+            np.isnan(s) | np.isnan(d),
+            (s < 90) | (d < 60),
+            (90 <= s) & (s < 120) & (60 <= d) & (d < 80),
+            ((120 <= s) & (s < 140)) | ((80 <= d) & (d < 90)),
+            ((140 <= s) & (s < 160)) | ((90 <= d) & (d < 100)),
+            (s >= 160) | (d >= 100),
+        ],
+        [0, 1, 2, 3, 4, 5],
+        default=0
+    )
+
+def _kode_tekanan_darah_teks(teks):
+    """Klasifikasi nilai unik kolom 'tekanan_darah' berformat 'sistolik/diastolik'."""
+    parts = teks.str.split('/', expand=True)
+    diastolik = parts[1] if 1 in parts.columns else pd.Series(np.nan, index=teks.index)
+    return _kode_tekanan_darah(parts[0], diastolik)
+
+def _kolom_angka(series):
+    """True jika kolom bertipe numerik (bukan bool dan bukan teks)."""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+@diukur('preprocess')
 def preprocess_input_for_pipeline(df_raw):
     """
     Membersihkan dan melakukan feature engineering pada data mentah
     agar SIAP dimasukkan ke dalam pipeline.
     Output dari fungsi ini adalah DataFrame dengan kolom yang diharapkan pipeline.
+    Semua langkah bekerja per kolom (tanpa apply per baris), sehingga aman
+    untuk file unggahan kolektif yang berisi ratusan ribu baris.
     """
     df = df_raw.copy()
 
-    # Fungsi kecil di dalam untuk menangani format feet.inches
-    def feet_to_cm(value):
-        try:
-            feet, inches = map(float, str(value).replace('"', '').replace("'", '').split('.'))
-            return round((feet * 30.48) + (inches * 2.54), 2)
-        except:
-            return value # Kembalikan apa adanya jika format tidak cocok
-
-    # Fungsi kecil di dalam untuk klasifikasi tekanan darah
-    def klasifikasi_tekanan_darah(s, d):
-        s, d = pd.to_numeric(s, errors='coerce'), pd.to_numeric(d, errors='coerce')
-        if pd.isna(s) or pd.isna(d): return 'Tidak diketahui'
-        if s < 90 or d < 60: return 'Hipotensi'
-        elif 90 <= s < 120 and 60 <= d < 80: return 'Normal'
-        elif 120 <= s < 140 or 80 <= d < 90: return 'Prehipertensi'
-        elif 140 <= s < 160 or 90 <= d < 100: return 'Hipertensi Stage 1'
-        elif s >= 160 or d >= 100: return 'Hipertensi Stage 2'
-        else: return 'Tidak diketahui'
-    
-    # 1. Cleaning kolom numerik dari teks (seperti '3rd', '25 week')
+    # 1. Cleaning kolom numerik dari teks (seperti '3rd', '25 week').
+    # Kolom yang sudah bertipe integer (mis. dari Parquet/Feather) tidak perlu
+    # diparse; hasilnya sama dengan mengekstrak digit dari teksnya.
     for col in ['gravida', 'umur_kehamilan']:
         if col in df.columns:
-            df[col] = pd.to_numeric(df[col].astype(str).str.extract(r'(\d+)', expand=False), errors='coerce').fillna(0)
+            if pd.api.types.is_integer_dtype(df[col].dtype):
+                df[col] = np.abs(df[col].fillna(0).to_numpy(dtype=np.int64))
+            else:
+                df[col] = _per_nilai_unik(df[col], _ekstrak_angka)
     
-    # 2. Cleaning dan konversi 'tinggi_badan'
+    # 2. Cleaning dan konversi 'tinggi_badan'. Kolom numerik (integer atau float,
+    # mis. FLOAT dari database/snapshot) sudah dalam cm; format feet.inches hanya
+    # berlaku untuk teks, kalau tidak 155.0 terbaca sebagai 155 kaki 0 inci.
     if 'tinggi_badan' in df.columns:
-        df['tinggi_badan'] = df['tinggi_badan'].apply(feet_to_cm).astype(float)
+        if _kolom_angka(df['tinggi_badan']):
+            df['tinggi_badan'] = df['tinggi_badan'].astype(float)
+        else:
+            df['tinggi_badan'] = _konversi_tinggi_badan(df['tinggi_badan'])
 
     # 3. Proses 'tekanan_darah' (dari file) atau sistolik/diastolik (dari form)
+    kode = None
     if 'tekanan_darah' in df.columns:
-        parts = df['tekanan_darah'].astype(str).str.split('/', expand=True)
-        sistolik = pd.to_numeric(parts[0], errors='coerce')
-        diastolik = pd.to_numeric(parts.get(1), errors='coerce') # .get(1) lebih aman
-        df['kategori_tekanan_darah'] = [klasifikasi_tekanan_darah(s, d) for s, d in zip(sistolik, diastolik)]
+        kode = _per_nilai_unik(df['tekanan_darah'], _kode_tekanan_darah_teks).to_numpy(dtype=int)
     elif 'tekanan_sistolik' in df.columns and 'tekanan_diastolik' in df.columns:
-        df['kategori_tekanan_darah'] = df.apply(
-            lambda row: klasifikasi_tekanan_darah(row['tekanan_sistolik'], row['tekanan_diastolik']),
-            axis=1
-        )
+        kode = _kode_tekanan_darah(df['tekanan_sistolik'], df['tekanan_diastolik'])
+    if kode is not None:
+        # Disimpan sebagai object (bukan category) agar identik dengan output lama
+        # yang dipakai saat OneHotEncoder di-fit
+        df['kategori_tekanan_darah'] = KATEGORI_TEKANAN_DARAH[kode]
 
     # 4. Cleaning kolom kategorikal lain
     if 'penyakit_anemia' in df.columns:
@@ -144,4 +602,76 @@ def preprocess_input_for_pipeline(df_raw):
         if col in df.columns:
             df[col] = df[col].replace({'Negative': 'Negatif', 'Positive': 'Positif'})
 
-    return df
\ No newline at end of file
+    return df
+
+# --- JALUR CEPAT UNTUK SATU RECORD (TANPA DATAFRAME) ---
+# Aturan cleaning di bawah adalah versi skalar dari preprocess_input_for_pipeline
+# dan harus selalu diubah bersamaan dengannya.
+
+_POLA_ANGKA = re.compile(r'(\d+)')
+
+def _ke_angka(value):
+    """Setara pd.to_numeric(value, errors='coerce') untuk satu nilai."""
+    if isinstance(value, str):
+        # pd.to_numeric menolak digit non-ASCII dan pemisah '_' yang diterima float()
+        if not value.isascii() or '_' in value:
+            return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _angka(value):
+    """Setara _kolom_angka untuk satu nilai: int/float (termasuk numpy), bukan bool."""
+    return isinstance(value, numbers.Real) and not isinstance(value, (bool, np.bool_))
+
+def _kosong(value):
+    """Setara pd.isna untuk satu nilai skalar."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+def preprocess_record(record):
+    """
+    Cleaning & feature engineering untuk satu record (dict) dengan aturan
+    yang sama seperti preprocess_input_for_pipeline, tetapi memakai nilai
+    Python biasa sehingga tidak perlu membangun DataFrame.
+    """
+    rec = dict(record)
+
+    # 1. Cleaning kolom numerik dari teks (seperti '3rd', '25 week')
+    for col in ['gravida', 'umur_kehamilan']:
+        if col in rec:
+            cocok = _POLA_ANGKA.search(str(rec[col]))
+            angka = _ke_angka(cocok.group(1)) if cocok else math.nan
+            rec[col] = 0 if math.isnan(angka) else angka
+
+    # 2. Cleaning dan konversi 'tinggi_badan' (angka = sudah dalam cm)
+    if 'tinggi_badan' in rec:
+        rec['tinggi_badan'] = float(rec['tinggi_badan'] if _angka(rec['tinggi_badan']) else feet_to_cm(rec['tinggi_badan']))
+
+    # 3. Proses 'tekanan_darah' (dari file) atau sistolik/diastolik (dari form)
+    if 'tekanan_darah' in rec:
+        parts = str(rec['tekanan_darah']).split('/')
+        diastolik = parts[1] if len(parts) > 1 else None
+        rec['kategori_tekanan_darah'] = klasifikasi_tekanan_darah(_ke_angka(parts[0]), _ke_angka(diastolik))
+    elif 'tekanan_sistolik' in rec and 'tekanan_diastolik' in rec:
+        rec['kategori_tekanan_darah'] = klasifikasi_tekanan_darah(
+            _ke_angka(rec['tekanan_sistolik']), _ke_angka(rec['tekanan_diastolik'])
+        )
+
+    # 4. Cleaning kolom kategorikal lain
+    if 'penyakit_anemia' in rec:
+        anemia = "Negatif" if _kosong(rec['penyakit_anemia']) else rec['penyakit_anemia']
+        rec['penyakit_anemia'] = {'Minimal': 'Positif', 'Medium': 'Positif'}.get(anemia, anemia)
+    for col in ['hasil_tes_VDRL', 'hasil_tes_HbsAg']:
+        if col in rec:
+            rec[col] = {'Negative': 'Negatif', 'Positive': 'Positif'}.get(rec[col], rec[col])
+
+    return rec
+
+def predict_one(record, model):
+    """
+    Prediksi satu record tanpa DataFrame: cleaning skalar (preprocess_record)
+    lalu vektor fitur langsung ditelusuri di tree model ringan (CompiledModel).
+    Hasilnya sama dengan model.predict(preprocess_input_for_pipeline(pd.DataFrame([record])))[0].
+    """
+    return model.predict_record(preprocess_record(record))
\ No newline at end of file